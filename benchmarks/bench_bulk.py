@@ -0,0 +1,91 @@
+"""Пакетні операції проти циклу з поодиноких викликів.
+
+Запуск: python -m benchmarks.bench_bulk [кількість_записів]
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import parse_size, speedup, timed
+from contacts.models import AddressBook, Contact
+from notes.services import NoteService
+
+
+def make_records(count):
+    return [{"name": f"Контакт{index}", "phones": [f"050{index:07d}"],
+             "email": f"user{index}@example.com", "birthday": "01.02.1990"}
+            for index in range(count)]
+
+
+def add_loop(records):
+    book = AddressBook(thread_safe=True)
+    for record in records:
+        book.add_record(Contact.from_dict(record))
+
+
+def add_bulk(records):
+    AddressBook(thread_safe=True).add_many(records)
+
+
+def delete_loop(book, names):
+    for name in names:
+        book.delete(name)
+
+
+def update_loop(book, changes):
+    for name, fields in changes.items():
+        book.find(name).edit_field("email", fields["email"])
+
+
+def filled(records):
+    book = AddressBook(thread_safe=True)
+    book.add_many(records)
+    return book
+
+
+def notes_loop(directory, count):
+    service = NoteService(filename=str(directory / "loop.json"))
+    for index in range(count):
+        service.create(f"Нотатка {index}", ["bench"])
+    service.repo.clear()
+
+
+def notes_bulk(directory, count):
+    service = NoteService(filename=str(directory / "bulk.json"))
+    service.add_many({"text": f"Нотатка {index}", "tags": ["bench"]} for index in range(count))
+    service.repo.clear()
+
+
+def main():
+    count = parse_size(50_000)
+    records = make_records(count)
+    print(f"Додавання {count} контактів")
+    old = timed("add_record у циклі", add_loop, records)
+    new = timed("add_many", add_bulk, records)
+    speedup(old, new)
+
+    names = [record["name"] for record in records[::2]]
+    print(f"Видалення {len(names)} контактів")
+    old = timed("delete у циклі", delete_loop, filled(records), names, repeat=1)
+    new = timed("delete_many", lambda book: book.delete_many(names), filled(records), repeat=1)
+    speedup(old, new)
+
+    changes = {name: {"email": f"new.{index}@example.com"} for index, name in enumerate(names)}
+    print(f"Зміна email у {len(changes)} контактів")
+    old = timed("edit_field у циклі", update_loop, filled(records), changes, repeat=1)
+    new = timed("update_many", lambda book: book.update_many(changes), filled(records), repeat=1)
+    speedup(old, new)
+
+    directory = Path(tempfile.mkdtemp())
+    try:
+        notes = min(count, 2000)
+        print(f"Додавання {notes} нотаток (кожне create() зберігає окремо)")
+        old = timed("create у циклі", notes_loop, directory, notes, repeat=1)
+        new = timed("add_many (одне збереження)", notes_bulk, directory, notes, repeat=1)
+        speedup(old, new)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
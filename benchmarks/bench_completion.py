@@ -0,0 +1,60 @@
+"""Автодоповнення імен: префіксне дерево проти перебору з сортуванням.
+
+Запуск: python -m benchmarks.bench_completion [кількість_імен]
+"""
+import random
+import string
+
+from benchmarks.common import parse_size, speedup, timed
+from cli.completion import NameTrie
+
+PREFIXES = ("а", "ан", "анд", "ол", "ми", "z")
+
+
+def make_names(count):
+    rng = random.Random(7)
+    syllables = ["ан", "др", "ій", "ол", "ек", "са", "ми", "ко", "ла", "ва", "ри", "на"]
+    return list({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 5))).capitalize()
+                 + "".join(rng.choice(string.digits) for _ in range(3)) for _ in range(count)})
+
+
+def scan(names, prefixes):
+    # Як без дерева: перебір усіх імен і сортування знайдених на кожне натискання Tab
+    for prefix in prefixes:
+        prefix = prefix.casefold()
+        sorted(name for name in names if name.casefold().startswith(prefix))[:100]
+
+
+def lookup(trie, prefixes):
+    for prefix in prefixes:
+        trie.complete(prefix)
+
+
+def churn(trie):
+    for index in range(1000):
+        trie.update(f"Новий{index}", None)
+        trie.remove(f"Новий{index}")
+
+
+def build(names):
+    trie = NameTrie()
+    trie.add_many((name, None) for name in names)
+    return trie
+
+
+def main():
+    count = parse_size(1_000_000)
+    names = make_names(count)
+    print(f"Імен: {len(names)}")
+    timed("побудова дерева (один раз при запуску)", build, names, repeat=1)
+    trie = build(names)
+    print(f"Доповнення {len(PREFIXES)} префіксів")
+    old = timed("перебір і сортування", scan, names, PREFIXES, repeat=1)
+    new = timed("префіксне дерево", lookup, trie, PREFIXES)
+    speedup(old, new)
+    print("Зміни книги (1000 додавань і видалень)")
+    timed("оновлення дерева", churn, trie)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Книга з обмеженням max_resident: скільки пам'яті процесу це заощаджує і чого коштують звернення до холодних.
+
+Обмежується лише кількість об'єктів Contact; індекси лишаються в пам'яті,
+тож поруч з tracemalloc звіт показує реальний приріст RSS процесу. Кожна
+конфігурація міряється в окремому свіжому процесі (RSS не зменшується
+після звільнення пам'яті).
+
+Запуск: python -m benchmarks.bench_contact_cache [кількість_контактів]
+"""
+import gc
+import multiprocessing
+import random
+import resource
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import parse_size, timed
+from contacts.models import AddressBook, Contact
+
+LOOKUPS = 20_000
+
+
+def records(count):
+    for index in range(count):
+        yield {"name": f"Контакт{index}", "phones": [f"050{index:07d}"], "email": f"user{index}@example.com",
+               "address": f"м. Київ, вул. Вулиця{index % 500} {index % 200}", "birthday": "01.02.1990"}
+
+
+def load(count, limit):
+    # Як load_book: контакти додаються по одному
+    book = AddressBook(max_resident=limit)
+    for record in records(count):
+        book.add_record(Contact.from_dict(record))
+    book.clear_changes()
+    return book
+
+
+def rss():
+    """Поточний RSS процесу, байт (Linux), інакше пік (ru_maxrss)."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as file:
+            return int(file.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def footprint(count, limit):
+    """(приріст RSS, пам'ять Python за tracemalloc, з неї — індекси) після завантаження книги."""
+    gc.collect()
+    before = rss()
+    book = load(count, limit)
+    gc.collect()
+    grown = rss() - before
+    del book
+    gc.collect()
+    tracemalloc.start()
+    book = load(count, limit)
+    gc.collect()
+    traced = tracemalloc.get_traced_memory()[0]
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    indexes = sum(stat.size for stat in snapshot.statistics("filename")
+                  if stat.traceback[0].filename.endswith(("indexes.py", "sortedlist.py")))
+    return grown, traced, indexes
+
+
+def measure(label, count, limit):
+    # Свіжий процес (spawn) на кожну конфігурацію
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        grown, traced, indexes = pool.submit(footprint, count, limit).result()
+    mb = 1024 * 1024
+    print(f"{label:<45} RSS +{grown / mb:7.1f} МБ, Python {traced / mb:7.1f} МБ (виділено в індексах {indexes / mb:.1f} МБ)")
+
+
+def lookups(book, names):
+    for name in names:
+        book.find(name)
+
+
+def main():
+    count = parse_size(100_000)
+    limit = max(count // 10, 1)
+    print(f"Пам'ять після завантаження {count} контактів")
+    measure("усі контакти в пам'яті", count, 0)
+    measure(f"max_resident={limit}", count, limit)
+
+    # Звернення зосереджені на «робочому наборі» з 5% контактів, решта — випадкові
+    book = load(count, limit)
+    rng = random.Random(42)
+    working = [f"Контакт{index}" for index in rng.sample(range(count), max(count // 20, 1))]
+    names = [rng.choice(working) if rng.random() < 0.9 else f"Контакт{rng.randrange(count)}"
+             for _ in range(LOOKUPS)]
+    print(f"{LOOKUPS} пошуків find (90% у робочому наборі з {len(working)} контактів)")
+    timed("усі контакти в пам'яті", lookups, load(count, 0), names)
+    timed(f"max_resident={limit}", lookups, book, names)
+    stats = book.contact_cache_stats()
+    label = "Влучання в пам'яті"
+    print(f"{label:<45} {stats.hit_rate:10.0%}")
+    timed("show-all з max_resident (повний перебір)", lambda: list(book.data.values()), repeat=1)
+
+
+if __name__ == "__main__":
+    main()
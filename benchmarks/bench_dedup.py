@@ -0,0 +1,47 @@
+"""Пошук дублікатів: блокування + union-find проти попарного порівняння.
+
+Запуск: python -m benchmarks.bench_dedup [кількість_контактів]
+"""
+import random
+
+from benchmarks.common import parse_size, speedup, timed
+from contacts.dedup import blocking_keys, find_duplicates
+from contacts.models import Contact
+
+
+def make_contacts(count, duplicate_share=0.05):
+    rng = random.Random(42)
+    contacts = []
+    for index in range(count):
+        if contacts and rng.random() < duplicate_share:
+            source = rng.choice(contacts)
+            contact = Contact(source.name.value.upper())
+            contact.add_phone("38" + source.phones[0].value[-10:])
+        else:
+            contact = Contact(f"Контакт{index}", email=f"user{index}@example.com")
+            contact.add_phone(f"0{rng.randint(500000000, 999999999)}")
+        contacts.append(contact)
+    return contacts
+
+
+def pairwise(contacts):
+    # Наївний варіант: порівнюємо кожну пару за множинами ключів
+    keys = [set(blocking_keys(contact)) for contact in contacts]
+    return [(i, j) for i in range(len(keys)) for j in range(i + 1, len(keys)) if keys[i] & keys[j]]
+
+
+def main():
+    count = parse_size(1_000_000)
+    contacts = make_contacts(count)
+    print(f"Пошук дублікатів серед {count} контактів")
+    timed("блокування + union-find", find_duplicates, contacts, repeat=1)
+
+    sample = contacts[:3000]
+    print(f"Порівняння на вибірці з {len(sample)} контактів")
+    old = timed("попарне порівняння O(n²)", pairwise, sample, repeat=1)
+    new = timed("блокування + union-find", find_duplicates, sample)
+    speedup(old, new)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Інтернування тегів, імен і доменів: пам'ять і швидкість порівнянь.
+
+Запуск: python -m benchmarks.bench_interning [кількість_нотаток]
+"""
+import json
+import random
+import tracemalloc
+
+from benchmarks.common import parse_size, speedup, timed
+from contacts.models import AddressBook
+from notes.models import Note
+
+TAGS = ["робота", "дім", "Важливо", "покупки", "ідеї", "здоров'я", "навчання", "подорожі", "фінанси", "сім'я"]
+
+
+def make_text(count):
+    rng = random.Random(42)
+    return json.dumps([{"text": f"Нотатка {index}", "tags": rng.sample(TAGS, rng.randint(1, 4))}
+                       for index in range(count)], ensure_ascii=False)
+
+
+def measure(label, build, text):
+    # Вимірюємо все, що лишається після читання файлу: нотатки або списки тегів
+    tracemalloc.start()
+    result = build(text)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<45} {size / 1024 / 1024:10.1f} МБ")
+    return result
+
+
+def raw_tags(text):
+    # Без інтернування: кожен тег кожної нотатки — окремий рядок з json
+    return [record["tags"] for record in json.loads(text)]
+
+
+def interned_tags(text):
+    # Те, що тримає Note: інтерновані теги та їхні канонічні форми
+    return [(note.tags, note.tag_keys) for note in map(Note.from_dict, json.loads(text))]
+
+
+def scan_lower(tag_lists, tag):
+    return [tags for tags in tag_lists if tag.lower() in [t.lower() for t in tags]]
+
+
+def scan_keys(notes, key):
+    return [note for note in notes if key in note.tag_keys]
+
+
+def find_linear(book, name):
+    # Колишній find: lower() кожного імені книги
+    return next((book.data[key] for key in book.data if key.lower() == name.lower()), None)
+
+
+def main():
+    count = parse_size(200_000)
+    print(f"Пам'ять тегів для {count} нотаток ({len(TAGS)} різних тегів)")
+    text = make_text(count)
+    tag_lists = measure("теги як прочитані (окремі рядки)", raw_tags, text)
+    measure("інтерновані теги + канонічні ключі", interned_tags, text)
+    notes = [Note.from_dict(record) for record in json.loads(text)]
+
+    print("Пошук нотаток за тегом")
+    old = timed("lower() кожного тегу (sort_by_tag раніше)", scan_lower, tag_lists, "важливо")
+    new = timed("канонічні ключі тегів", scan_keys, notes, "важливо")
+    speedup(old, new)
+
+    book = AddressBook()
+    book.add_many({"name": f"Контакт {index}"} for index in range(min(count, 100_000)))
+    print(f"find без урахування регістру в книзі з {len(book.data)} контактів (100 пошуків)")
+    old = timed("перебір з lower()", lambda: [find_linear(book, "контакт 99999") for _ in range(100)])
+    new = timed("індекс імен", lambda: [book.find("контакт 99999") for _ in range(100)])
+    speedup(old, new)
+
+
+if __name__ == "__main__":
+    main()
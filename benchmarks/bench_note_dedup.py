@@ -0,0 +1,61 @@
+"""Майже однакові нотатки: MinHash/LSH проти попарного порівняння.
+
+Запуск: python -m benchmarks.bench_note_dedup [кількість_нотаток]
+"""
+import random
+
+from benchmarks.common import parse_size, speedup, timed
+from notes.dedup import DEFAULT_THRESHOLD, NoteDuplicateIndex, shingle_hashes
+
+SYLLABLES = ("ко", "ма", "ні", "до", "ро", "ва", "лі", "те", "сп", "ра", "ви", "на", "за", "ку", "пи",
+             "ти", "зу", "стр", "іч", "ре", "ліз", "дзв", "ін", "ок", "бю", "дже", "кн", "ига", "кур", "с")
+
+
+def make_words(rng, count=5000):
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(count)]
+
+
+def make_notes(count, duplicate_share=0.05):
+    rng = random.Random(42)
+    words = make_words(rng)
+    notes = []
+    for _ in range(count):
+        if notes and rng.random() < duplicate_share:
+            # Майже копія: одне слово замінено
+            text = rng.choice(notes).split()
+            text[rng.randrange(len(text))] = rng.choice(words)
+            notes.append(" ".join(text))
+        else:
+            notes.append(" ".join(rng.choice(words) for _ in range(rng.randint(8, 16))))
+    return notes
+
+
+def lsh(notes):
+    index = NoteDuplicateIndex()
+    for number, text in enumerate(notes):
+        index.add(str(number), text)
+    return index.clusters(DEFAULT_THRESHOLD)
+
+
+def pairwise(notes):
+    # Наївний варіант: точна подібність Жаккара для кожної пари
+    sets = [shingle_hashes(text) for text in notes]
+    return [(i, j) for i in range(len(sets)) for j in range(i + 1, len(sets))
+            if len(sets[i] & sets[j]) >= DEFAULT_THRESHOLD * len(sets[i] | sets[j])]
+
+
+def main():
+    count = parse_size(500_000)
+    notes = make_notes(count)
+    print(f"Пошук майже однакових серед {count} нотаток")
+    timed("MinHash + LSH (побудова індексу і кластери)", lsh, notes, repeat=1)
+
+    sample = notes[:3000]
+    print(f"Порівняння на вибірці з {len(sample)} нотаток")
+    old = timed("попарне порівняння O(n²)", pairwise, sample, repeat=1)
+    new = timed("MinHash + LSH", lsh, sample)
+    speedup(old, new)
+
+
+if __name__ == "__main__":
+    main()
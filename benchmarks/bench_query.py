@@ -0,0 +1,57 @@
+"""Пошук контактів: запити з планувальником за індексами проти повного перебору.
+
+Запуск: python -m benchmarks.bench_query [кількість_контактів]
+"""
+import random
+
+from benchmarks.common import parse_size, speedup, timed
+from contacts.models import AddressBook, Contact
+from contacts.query import execute, parse_query
+
+QUERIES = (
+    "domain:ukr.net name:Контакт12*",
+    "phone:0501*",
+    "birthday:03 AND domain:example.com",
+    "email:user777@gmail.com",
+    "address:Одеса domain:gmail.com",
+)
+
+
+def make_book(count):
+    rng = random.Random(42)
+    domains = ["example.com", "gmail.com", "ukr.net", "company.org"]
+    cities = ["Київ", "Львів", "Одеса", "Харків", "Дніпро", "Ужгород", "Полтава", "Чернігів"]
+    book = AddressBook()
+    for index in range(count):
+        birthday = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1950, 2010)}"
+        address = f"м. {rng.choice(cities)}, вул. Вулиця{rng.randint(1, 500)} {rng.randint(1, 200)}"
+        contact = Contact(f"Контакт{index}", address=address, email=f"user{index}@{rng.choice(domains)}",
+                          birthday=birthday)
+        contact.add_phone(f"0{rng.randint(500000000, 999999999)}")
+        book.add_record(contact)
+    return book
+
+
+def scan(book, queries):
+    # Ті самі умови без планування: перевірка кожного запису
+    for query in queries:
+        node = parse_query(query)
+        [record for record in book.data.values() if node.matches(record, book._indexes)]
+
+
+def planned(book, queries):
+    for query in queries:
+        execute(parse_query(query), book.data, book._indexes)
+
+
+def main():
+    count = parse_size(200_000)
+    book = make_book(count)
+    print(f"{len(QUERIES)} запити до книги з {count} контактів")
+    old = timed("повний перебір", scan, book, QUERIES)
+    new = timed("планувальник з індексами", planned, book, QUERIES)
+    speedup(old, new)
+
+
+if __name__ == "__main__":
+    main()
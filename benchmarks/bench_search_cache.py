@@ -0,0 +1,62 @@
+"""Повторні запити search / note-search: кеш результатів проти повторного виконання.
+
+Запуск: python -m benchmarks.bench_search_cache [кількість_записів]
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_query import QUERIES, make_book
+from benchmarks.common import parse_size, speedup, timed
+from contacts.query import execute, parse_query
+from notes.services import NoteService
+
+ROUNDS = 20
+SEARCHES = QUERIES + ("Контакт12",)
+NOTE_QUERIES = ((["звіт"], None), (["молоко", "хліб"], None), ([], ["робота"]), (["нотатка"], ["дім"]))
+
+
+def uncached(book):
+    # Як раніше: кожен запит виконується заново
+    for _ in range(ROUNDS):
+        for query in SEARCHES:
+            execute(parse_query(query), book.data, book._indexes)
+
+
+def cached(book):
+    for _ in range(ROUNDS):
+        for query in SEARCHES:
+            book.search(query)
+
+
+def repeat_note_search(service):
+    for _ in range(ROUNDS):
+        for keywords, tags in NOTE_QUERIES:
+            service.search(keywords, tags)
+
+
+def main():
+    count = parse_size(100_000)
+    book = make_book(count)
+    print(f"{ROUNDS} повторів {len(SEARCHES)} запитів search у книзі з {count} контактів")
+    old = timed("без кешу", uncached, book, repeat=1)
+    new = timed("кеш результатів", cached, book, repeat=1)
+    speedup(old, new)
+
+    directory = Path(tempfile.mkdtemp())
+    try:
+        print(f"{ROUNDS} повторів {len(NOTE_QUERIES)} запитів note-search серед {count} нотаток")
+        records = [{"text": f"Нотатка {index}: звіт, молоко і хліб", "tags": ["робота" if index % 3 else "дім"]}
+                   for index in range(count)]
+        timings = []
+        for size, label in ((0, "без кешу"), (256, "кеш результатів")):
+            service = NoteService(filename=str(directory / f"notes{size}.json"), search_cache=size)
+            service.add_many(records)
+            timings.append(timed(label, repeat_note_search, service, repeat=1))
+        speedup(*timings)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Відсортований show-all: підтримуваний порядок проти сортування на кожен запит.
+
+Запуск: python -m benchmarks.bench_sorted [кількість_контактів]
+"""
+from benchmarks.common import parse_size, speedup, timed
+from contacts.dedup import name_key
+from contacts.models import AddressBook
+
+QUERIES = 20
+
+
+def make_book(count):
+    book = AddressBook()
+    book.add_many({"name": f"Контакт{(index * 7919) % count}", "birthday": f"{index % 28 + 1:02d}.{index % 12 + 1:02d}.1990"}
+                  for index in range(count))
+    return book
+
+
+def edit(book, step):
+    # Між запитами змінюється день народження одного контакту
+    contact = book.find(f"Контакт{step}")
+    contact.edit_field("birthday", f"{step % 28 + 1:02d}.{(step + 5) % 12 + 1:02d}.1991")
+
+
+def sort_each_time(book):
+    for step in range(QUERIES):
+        edit(book, step)
+        sorted(book.data.values(), key=lambda contact: name_key(contact.name.value))
+
+
+def maintained(book):
+    for step in range(QUERIES):
+        edit(book, step)
+        book.sorted_records('name')
+
+
+def main():
+    count = parse_size(200_000)
+    book = make_book(count)
+    print(f"{QUERIES} змін і show-all --sort name у книзі з {count} контактів")
+    old = timed("сортування при кожному запиті", sort_each_time, book)
+    new = timed("підтримуваний порядок", maintained, book)
+    speedup(old, new)
+    print("Одна зміна дня народження (оновлення всіх індексів і видів)")
+    timed("1000 змін", lambda: [edit(book, step) for step in range(1000)])
+
+
+if __name__ == "__main__":
+    main()
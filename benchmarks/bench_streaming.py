@@ -0,0 +1,60 @@
+"""Завантаження контактів зі звичайного JSON-файлу: пік пам'яті json.load проти потокового читання.
+
+Запуск: python -m benchmarks.bench_streaming [кількість_контактів]
+"""
+import json
+import shutil
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.common import parse_size, speedup, timed
+from contacts.models import Contact
+from storage.repo import ContactRepository
+
+
+def write_contacts(path, count):
+    records = [{"name": f"Контакт {index}", "phones": [f"050{index:07d}"], "email": f"user{index}@example.com",
+                "address": f"вул. Шевченка, {index % 200}, Київ", "birthday": None}
+               for index in range(count)]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(records, file, ensure_ascii=False, indent=4)
+
+
+def load_whole(path):
+    # Як раніше: увесь файл і всі словники в пам'яті, потім контакти
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    return [Contact.from_dict(record) for record in data]
+
+
+def measure(label, load, *args):
+    tracemalloc.start()
+    result = load(*args)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<45} {size / 1024 / 1024:8.1f} МБ (пік {peak / 1024 / 1024:.1f} МБ)")
+    return peak
+
+
+def main():
+    count = parse_size(100_000)
+    directory = Path(tempfile.mkdtemp())
+    try:
+        path = directory / "contacts.json"
+        write_contacts(path, count)
+        repo = ContactRepository(path.name, storage_dir=directory)
+        print(f"Пам'ять після завантаження {count} контактів ({path.stat().st_size / 1024 / 1024:.1f} МБ JSON)")
+        old = measure("json.load + Contact.from_dict", load_whole, path)
+        new = measure("потокове читання (load_contacts)", repo.load_contacts)
+        print(f"{'Зменшення піку':<45} {old / new:8.1f}x")
+        print("Час завантаження")
+        old = timed("json.load + Contact.from_dict", load_whole, path)
+        new = timed("потокове читання (load_contacts)", repo.load_contacts)
+        speedup(old, new)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Пошук імен латиницею: індекс транслітерації проти транслітерації під час перебору.
+
+Запуск: python -m benchmarks.bench_translit [кількість_контактів]
+"""
+import random
+
+from benchmarks.common import parse_size, speedup, timed
+from contacts.models import AddressBook
+from utils.translit import translit_tokens
+
+FIRST = ["Ольга", "Юрій", "Марія", "Андрій", "Олексій", "Ганна", "Віталій", "Софія", "Євген", "Ірина"]
+LAST = ["Шевченко", "Коваленко", "Бондаренко", "Ткаченко", "Кравченко", "Олійник", "Шевчук", "Поліщук"]
+QUERIES = ("Olha Shevchenko", "Yuriy Tkachenko", "Yevhen Oliinyk")
+NATIVE = ("Ольга Шевченко", "Юрій Ткаченко", "Євген Олійник")
+
+
+def make_book(count):
+    rng = random.Random(3)
+    book = AddressBook()
+    book.add_many({"name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {index}"} for index in range(count))
+    return book
+
+
+def scan(book, queries):
+    # Без індексу: транслітерація кожного імені на кожен запит
+    for query in queries:
+        wanted = set(translit_tokens(query))
+        [contact for contact in book.data.values() if wanted <= set(translit_tokens(contact.name.value))]
+
+
+def indexed(book, queries):
+    for query in queries:
+        book.lookup('translit', query)
+
+
+def main():
+    count = parse_size(100_000)
+    book = make_book(count)
+    print(f"{len(QUERIES)} запити латиницею до книги з {count} контактів")
+    old = timed("транслітерація під час перебору", scan, book, QUERIES, repeat=1)
+    new = timed("індекс транслітерації", indexed, book, QUERIES)
+    speedup(old, new)
+    timed("для порівняння: ті самі запити кирилицею", indexed, book, NATIVE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Пропускна здатність валідаторів: попередній шлях проти нового.
+
+Попередній шлях — re.fullmatch/re.sub з рядковими шаблонами та
+datetime.strptime з datetime.now() на кожен виклик. Новий — попередньо
+скомпільовані шаблони, ручний розбір ДД.ММ.РРРР, LRU-кеш і validate_many.
+Кожен запуск нового шляху починається з холодного LRU-кешу, інакше
+повтори вимірювали б лише влучання в кеш.
+
+Запуск: python -m benchmarks.bench_validators [кількість_записів]
+"""
+import random
+import re
+from datetime import datetime
+
+from benchmarks.common import parse_size, speedup, timed
+from contacts.validators import ContactValidator, clear_caches
+
+
+def old_phone(phone):
+    cleaned_phone = re.sub(r'[^\d]', '', phone)
+    if not (10 <= len(cleaned_phone) <= 13):
+        raise ValueError("phone")
+    return cleaned_phone
+
+
+def old_email(email):
+    if not re.fullmatch(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$', email):
+        raise ValueError("email")
+    if '..' in email:
+        raise ValueError("email")
+    domain = email.split('@')[1]
+    if domain.startswith('.') or domain.endswith('.'):
+        raise ValueError("email")
+    return email
+
+
+def old_birthday(date_str):
+    date_obj = datetime.strptime(date_str, "%d.%m.%Y").date()
+    if date_obj > datetime.now().date():
+        raise ValueError("birthday")
+    return date_obj
+
+
+def make_data(count):
+    rng = random.Random(42)
+    domains = ["example.com", "gmail.com", "ukr.net", "company.org"]
+    phones = [f"+38(0{rng.randint(50, 99)}){rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}"
+              for _ in range(count)]
+    emails = [f"user{rng.randint(0, count // 4)}@{rng.choice(domains)}" for _ in range(count)]
+    dates = [f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1950, 2010)}" for _ in range(count)]
+    return phones, emails, dates
+
+
+def run_old(phones, emails, dates):
+    [old_phone(value) for value in phones]
+    [old_email(value) for value in emails]
+    [old_birthday(value) for value in dates]
+
+
+def run_single(phones, emails, dates):
+    clear_caches()
+    [ContactValidator.validate_phone(value) for value in phones]
+    [ContactValidator.validate_email(value) for value in emails]
+    [ContactValidator.validate_birthday(value) for value in dates]
+
+
+def run_new(phones, emails, dates):
+    clear_caches()
+    ContactValidator.validate_many("phone", phones)
+    ContactValidator.validate_many("email", emails)
+    ContactValidator.validate_many("birthday", dates)
+
+
+def main():
+    count = parse_size(200_000)
+    data = make_data(count)
+    print(f"Валідація {count} телефонів, email і дат")
+    old = timed("попередній шлях (re + strptime)", run_old, *data)
+    single = timed("validate_* по одному (холодний кеш)", run_single, *data)
+    new = timed("validate_many (холодний кеш)", run_new, *data)
+    speedup(old, new)
+    print(f"{'validate_many проти validate_* по одному':<45} {single / new:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
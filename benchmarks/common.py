@@ -0,0 +1,23 @@
+"""Спільні допоміжні функції для бенчмарків (запуск: python -m benchmarks.<назва>)."""
+import sys
+import time
+
+
+def parse_size(default: int) -> int:
+    """Розмір набору даних з першого аргументу командного рядка."""
+    return int(sys.argv[1]) if len(sys.argv) > 1 else default
+
+
+def timed(label: str, func, *args, repeat: int = 3) -> float:
+    """Найкращий час із repeat запусків; друкує рядок звіту."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<45} {best * 1000:10.1f} мс")
+    return best
+
+
+def speedup(old: float, new: float) -> None:
+    print(f"{'Прискорення':<45} {old / new:10.1f}x")
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from contacts.models import AddressBook
+from contacts.reminders import BirthdayScheduler
 from contacts.services import (
     add_contact,
     change_contact,
@@ -10,18 +11,56 @@ from contacts.services import (
     show_contact_info,
     show_all,
     add_birthday,
+    show_duplicates,
+    merge_contacts,
+)
+from cli import completion
+from cli.config import (
+    ASYNC_SAVES, CONTACT_SHARDS, HISTORY_KEEP, NOTES_MAPPED, REMINDER_HOOK, REMINDERS, RESIDENT_CONTACTS,
+    SEARCH_CACHE, STORAGE_FORMAT,
 )
 from notes.services import NoteService
-from storage.repo import ContactRepository
+from storage.binary import NoteCodec
+from storage.history import HistoryStore
+from storage.pipeline import BackgroundPipeline
+from storage.repo import ContactRepository, Repository
+
+
+def _import_legacy_json(repo: Repository, legacy_name: str) -> None:
+    """Перший запуск у бінарному форматі: переносимо наявні JSON-дані."""
+    legacy = Repository(legacy_name, storage_dir=repo.storage_dir, key=repo.key)
+    if repo.codec is not None and not repo.has_data() and legacy.has_data():
+        repo.import_json(legacy.filepath)
+
+
+def _import_single_file(repo, filename: str) -> None:
+    """Перший запуск із шардами: переносимо дані зі звичайного файлу того ж формату.
+
+    Після успішного перенесення файл перейменовується на <файл>.migrated.
+    """
+    single = Repository(filename, storage_dir=repo.storage_dir, key=repo.key, codec=repo.codec)
+    if not repo.has_data() and single.has_data() and repo.save(single.load()):
+        single.retire()
+
+
+def _check_shard_count(repo) -> None:
+    """Кількість шардів на диску (manifest.json) головніша за PA_CONTACT_SHARDS — попереджаємо про розбіжність."""
+    if repo.count != CONTACT_SHARDS:
+        print(f"Увага: контакти збережено в {repo.count} шардах, а PA_CONTACT_SHARDS={CONTACT_SHARDS}; "
+              f"використовується {repo.count}. Змінити: python -m storage.sharding {CONTACT_SHARDS}")
 
 
 def init_address_book() -> tuple[AddressBook, ContactRepository]:
     """Завантажуємо контакти з диска в AddressBook."""
-    repo = ContactRepository()
-    book = AddressBook()
-    contacts = repo.load_contacts()
-    for contact in contacts:
-        book.add_record(contact)
+    binary = STORAGE_FORMAT == "binary"
+    filename = "contacts.bin" if binary else "contacts.json"
+    repo = ContactRepository(filename, binary=binary, shards=CONTACT_SHARDS)
+    if CONTACT_SHARDS > 0:
+        _check_shard_count(repo.repo)
+        _import_single_file(repo.repo, filename)
+    _import_legacy_json(repo.repo, "contacts.json")
+    book = AddressBook(search_cache=SEARCH_CACHE, max_resident=RESIDENT_CONTACTS)
+    repo.load_book(book)
     return book, repo
 
 
@@ -29,8 +68,124 @@ def init_notes() -> NoteService:
     """Ініціалізуємо сервіс нотаток з файлом у теці користувача."""
     storage_dir = Path.home() / ".personal_assistant"
     storage_dir.mkdir(parents=True, exist_ok=True)
-    notes_file = storage_dir / "notes.json"
-    return NoteService(filename=str(notes_file))
+    binary = STORAGE_FORMAT == "binary"
+    notes_file = storage_dir / ("notes.bin" if binary else "notes.json")
+    if binary:
+        _import_legacy_json(Repository(notes_file.name, storage_dir=storage_dir, key="id", codec=NoteCodec), "notes.json")
+    return NoteService(filename=str(notes_file), binary=binary, mapped=NOTES_MAPPED, search_cache=SEARCH_CACHE)
+
+
+def save_book(book: AddressBook, contact_repo: ContactRepository, pipeline=None) -> None:
+    """Зберігає зміни книги: через фоновий конвеєр (не чекаючи диска) або одразу."""
+    if pipeline is None:
+        contact_repo.sync_book(book)
+    else:
+        pipeline.submit("contacts", contact_repo.delta_job(book))
+
+
+def start_reminders(book: AddressBook):
+    """Фонові нагадування про дні народження (PA_REMINDERS=1); книга сама оновлює їхній розклад."""
+    if not REMINDERS:
+        return None
+    storage_dir = Path.home() / ".personal_assistant"
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    scheduler = BirthdayScheduler(hook=REMINDER_HOOK or None, state_path=storage_dir / "reminders.json")
+    book.attach_index("reminders", scheduler)
+    scheduler.start()
+    return scheduler
+
+
+def init_history(book: AddressBook, contact_repo: ContactRepository, notes: NoteService):
+    """Історія версій поруч зі сховищем; перший запуск фіксує початковий стан."""
+    if HISTORY_KEEP <= 0:
+        return None
+    history = HistoryStore(contact_repo.repo.storage_dir / "history", keep=HISTORY_KEEP)
+    if history.is_empty():
+        history.stage("contacts", [contact.to_dict() for contact in book.records()], [], key="name")
+        history.stage("notes", [note.to_dict() for note in notes.read()], [], key="id")
+        history.commit("початковий стан")
+    contact_repo.history = history
+    notes.history = history
+    return history
+
+
+def show_history(args: list[str], history) -> str:
+    """history [N] — останні N версій (за замовчуванням 10)."""
+    if history is None:
+        return "Історію змін вимкнено (PA_HISTORY_KEEP=0)."
+    try:
+        count = int(args[0]) if args else 10
+    except ValueError:
+        return "N має бути цілим числом."
+    versions = history.versions()[-count:] if count > 0 else []
+    if not versions:
+        return "Історія змін порожня."
+    lines = ["Версії (найновіші зверху):"]
+    for version in reversed(versions):
+        lines.append(f"{version.number:>5}  {version.timestamp.replace('T', ' ')}  {version.label}"
+                     f"  (+{version.changed} / -{version.deleted})")
+    return "\n".join(lines)
+
+
+def _restore(number: int, label: str, history, book: AddressBook, contact_repo: ContactRepository,
+             notes: NoteService, pipeline=None) -> str:
+    # Відновлення теж стає новою версією, тож його можна скасувати
+    try:
+        records = history.records_at(number)
+    except KeyError:
+        return f"Версію {number} не знайдено (можливо, її вже видалено з історії)."
+    notes.refresh()
+    book.restore_records(records.get("contacts", {}))
+    save_book(book, contact_repo, pipeline)
+    notes.restore_records(records.get("notes", {}))
+    history.commit(label, restored=number)
+    return f"Відновлено стан версії {number}."
+
+
+def undo_change(history, book: AddressBook, contact_repo: ContactRepository, notes: NoteService,
+                pipeline=None) -> str:
+    """undo — скасовує останню зміну (повторні undo йдуть далі в минуле)."""
+    if history is None:
+        return "Історію змін вимкнено (PA_HISTORY_KEEP=0)."
+    target = history.undo_target()
+    if target is None:
+        return "Немає змін, які можна скасувати."
+    return _restore(target, "undo", history, book, contact_repo, notes, pipeline)
+
+
+def restore_version(args: list[str], history, book: AddressBook, contact_repo: ContactRepository,
+                    notes: NoteService, pipeline=None) -> str:
+    """restore [версія] — повертає контакти й нотатки до стану вказаної версії."""
+    if history is None:
+        return "Історію змін вимкнено (PA_HISTORY_KEEP=0)."
+    if not args or not args[0].isdigit():
+        return "Використання: restore [номер_версії]"
+    return _restore(int(args[0]), f"restore {args[0]}", history, book, contact_repo, notes, pipeline)
+
+
+def export_data(args: list[str], book: AddressBook, contact_repo: ContactRepository, notes: NoteService) -> str:
+    """export [тека] — зберігає контакти й нотатки у звичайному JSON."""
+    target = Path(args[0]) if args else Path.cwd()
+    try:
+        target.mkdir(parents=True, exist_ok=True)
+        saved = contact_repo.export_json(book.records(), target / "contacts.json")
+        saved = notes.export_json(target / "notes.json") and saved
+    except OSError as e:
+        return f"Помилка експорту: {e}"
+    return f"Дані експортовано в {target}." if saved else "Не вдалося експортувати дані."
+
+
+def show_stats(book: AddressBook, notes: NoteService) -> str:
+    """stats — влучання й промахи кешів пошуку (і контактів у пам'яті з PA_RESIDENT_CONTACTS)."""
+    lines = []
+    for label, stats in (("search", book.cache_stats()), ("note-search", notes.cache_stats())):
+        lines.append(f"Кеш {label}: влучань {stats.hits}, промахів {stats.misses} "
+                     f"({stats.hit_rate:.0%}), записів {stats.size}/{stats.maxsize}")
+    contacts = book.contact_cache_stats()
+    if contacts is not None:
+        lines.append(f"Контакти в пам'яті: влучань {contacts.hits}, промахів {contacts.misses} "
+                     f"({contacts.hit_rate:.0%}), у пам'яті {contacts.size}/{contacts.maxsize} з {len(book.data)}")
+    return "\n".join(lines)
 
 
 def print_help() -> None:
@@ -42,23 +197,35 @@ def print_help() -> None:
   add [ім'я] [телефон] [email/None] [адреса/None] [ДД.ММ.РРРР/None]
   change [ім'я] [phone/email/address/birthday] [...]
   delete [ім'я]
-  search [рядок_пошуку]
+  search [запит]             – слова та фільтри name: phone: email: domain: birthday:ММ address:,
+                               AND/OR/NOT, дужки, префікс* (напр. name:Іва* NOT domain:ukr.net)
+                               ім'я — і кирилицею, і латиницею (Olha знайде Ольгу)
   show-info [ім'я]
-  show-all
+  show-all [--sort name|birthday]
+                             – за ім'ям або від найближчого дня народження
   birthdays [N]              – дні народження протягом N днів (за замовчуванням 7)
   add-birthday [ім'я] [ДД.ММ.РРРР]
+  dupes                      – групи ймовірних дублікатів (ім'я, телефон, email)
+  merge [ім'я] [ім'я] ...    – злити контакти в перший; merge #N — групу N з dupes
+                               (без аргументів лише показує групи)
 
 НОТАТКИ:
   note-add
   note-edit
   note-delete
-  note-list
+  note-list [--sort text|tag]
   note-search
   note-tags
   note-by-tag
+  note-dupes [поріг%]        – групи майже однакових нотаток (за замовчуванням 70%)
 
 СИСТЕМА:
   help
+  history [N]                – останні N версій даних (за замовчуванням 10)
+  undo                       – скасувати останню зміну
+  restore [версія]           – повернути контакти й нотатки до стану версії
+  export [тека]              – експорт контактів і нотаток у JSON
+  stats                      – статистика кешів пошуку й контактів у пам'яті (влучання/промахи)
   exit / вихід / quit
 """
     )
@@ -67,77 +234,136 @@ def print_help() -> None:
 def run_cli() -> None:
     book, contact_repo = init_address_book()
     notes = init_notes()
+    pipeline = BackgroundPipeline() if ASYNC_SAVES else None
+    notes.pipeline = pipeline
+    history = init_history(book, contact_repo, notes)
+    reminders = start_reminders(book)
+    # Tab доповнює команди, імена контактів і теги (якщо є readline)
+    completion.install(book, notes)
+    last_command = None
 
     print("Персональний помічник запущено. Введіть 'help' для списку команд.")
 
-    while True:
-        try:
-            user_input = input("> ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("\nДо побачення!")
-            break
-
-        if not user_input:
-            continue
-
-        parts = user_input.split()
-        command = parts[0].lower()
-        args = parts[1:]
-
-        # Вихід
-        if command in ("exit", "quit", "вихід"):
-            # зберігаємо контакти перед виходом
-            contact_repo.save_contacts(list(book.data.values()))
-            print("До побачення!")
-            break
-
-        # Допомога
-        if command in ("help", "допомога"):
-            print_help()
-            continue
-
-        # КОМАНДИ ДЛЯ КОНТАКТІВ
-        if command == "add":
-            print(add_contact(args, book))
-            contact_repo.save_contacts(list(book.data.values()))
-            continue
-
-        if command == "change":
-            print(change_contact(args, book))
-            contact_repo.save_contacts(list(book.data.values()))
-            continue
-
-        if command == "delete":
-            print(delete_contact(args, book))
-            contact_repo.save_contacts(list(book.data.values()))
-            continue
-
-        if command == "search":
-            print(search_contacts(args, book))
-            continue
-
-        if command == "birthdays":
-            print(show_birthdays(args, book))
-            continue
-
-        if command == "show-info":
-            print(show_contact_info(args, book))
-            continue
-
-        if command == "show-all":
-            print(show_all(args, book))
-            continue
-
-        if command == "add-birthday":
-            print(add_birthday(args, book))
-            contact_repo.save_contacts(list(book.data.values()))
-            continue
-
-        # КОМАНДИ ДЛЯ НОТАТОК – делегуємо в handlers
-        from cli.handlers import handle_notes_command
-
-        handled = handle_notes_command(command, args, notes)
-        if handled:
-            continue
-
-        print("Невідома команда. Введіть 'help' для списку доступних команд.")
+    try:
+        while True:
+            # Зміни попередньої команди стають новою версією в історії
+            if history is not None and last_command:
+                history.commit(last_command)
+                last_command = None
+
+            try:
+                user_input = completion.prompt("> ", "command").strip()
+            except (EOFError, KeyboardInterrupt):
+                print("\nДо побачення!")
+                break
+
+            if not user_input:
+                continue
+            last_command = user_input
+
+            # Підтягуємо зміни, зроблені іншими запущеними копіями (дешево: лише stat)
+            contact_repo.refresh_book(book)
+
+            parts = user_input.split()
+            command = parts[0].lower()
+            args = parts[1:]
+
+            # Вихід
+            if command in ("exit", "quit", "вихід"):
+                # контакти зберігаються у finally
+                print("До побачення!")
+                break
+
+            # Допомога
+            if command in ("help", "допомога"):
+                print_help()
+                continue
+
+            if command == "history":
+                print(show_history(args, history))
+                continue
+
+            if command == "undo":
+                print(undo_change(history, book, contact_repo, notes, pipeline))
+                continue
+
+            if command == "restore":
+                print(restore_version(args, history, book, contact_repo, notes, pipeline))
+                continue
+
+            if command == "export":
+                print(export_data(args, book, contact_repo, notes))
+                continue
+
+            if command == "stats":
+                print(show_stats(book, notes))
+                continue
+
+            # КОМАНДИ ДЛЯ КОНТАКТІВ
+            if command == "add":
+                print(add_contact(args, book))
+                save_book(book, contact_repo, pipeline)
+                continue
+
+            if command == "change":
+                print(change_contact(args, book))
+                save_book(book, contact_repo, pipeline)
+                continue
+
+            if command == "delete":
+                print(delete_contact(args, book))
+                save_book(book, contact_repo, pipeline)
+                continue
+
+            if command == "search":
+                print(search_contacts(args, book))
+                continue
+
+            if command == "birthdays":
+                print(show_birthdays(args, book))
+                continue
+
+            if command == "show-info":
+                print(show_contact_info(args, book))
+                continue
+
+            if command == "show-all":
+                print(show_all(args, book))
+                continue
+
+            if command == "add-birthday":
+                print(add_birthday(args, book))
+                save_book(book, contact_repo, pipeline)
+                continue
+
+            if command == "dupes":
+                print(show_duplicates(args, book))
+                continue
+
+            if command == "merge":
+                print(merge_contacts(args, book))
+                save_book(book, contact_repo, pipeline)
+                continue
+
+            # КОМАНДИ ДЛЯ НОТАТОК – делегуємо в handlers
+            from cli.handlers import handle_notes_command
+
+            handled = handle_notes_command(command, args, notes)
+            if handled:
+                continue
+
+            print("Невідома команда. Введіть 'help' для списку доступних команд.")
+    finally:
+        # І при звичайному виході, і після помилки чи Ctrl+C: незбережені зміни не губимо
+        if history is not None and last_command:
+            history.commit(last_command)
+        save_book(book, contact_repo, pipeline)
+        notes.save()
+        # Дописуємо все, що ще стоїть у черзі фонового запису
+        if pipeline is not None:
+            pipeline.close()
+        # Журнали змін — у файли даних, щоб вони були актуальні й для інших програм
+        contact_repo.compact()
+        notes.compact()
+        if reminders is not None:
+            reminders.stop()
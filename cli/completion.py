@@ -0,0 +1,115 @@
+"""Автодоповнення за Tab у командному рядку (через readline, якщо він є).
+
+Команди, імена контактів і теги нотаток доповнюються з префіксних дерев
+(utils.trie), які оновлюються разом із даними: дерево імен під'єднане до
+AddressBook як вторинна структура, дерево тегів веде NoteService. Тож
+натискання Tab не перебирає книгу чи нотатки і не сортує їх.
+"""
+from typing import List, Optional
+
+from utils.trie import Trie
+
+try:
+    import readline
+except ImportError:  # немає readline (наприклад, Windows) — працюємо без доповнення
+    readline = None
+
+COMMANDS = (
+    "add", "change", "delete", "search", "show-info", "show-all", "birthdays", "add-birthday", "dupes", "merge",
+    "note-add", "note-edit", "note-delete", "note-list", "note-search", "note-tags", "note-by-tag", "note-dupes",
+    "help", "history", "undo", "restore", "export", "stats", "exit", "quit", "вихід",
+)
+# Команди, перший аргумент яких — ім'я контакту
+NAME_COMMANDS = frozenset({"change", "delete", "show-info", "add-birthday"})
+
+
+class NameTrie(Trie):
+    """Імена контактів з інтерфейсом вторинної структури AddressBook (add_many/update/remove/remove_many)."""
+
+    # Залежить лише від імені: update_many книги (зміна полів) дерево не чіпає
+    fields = ('name',)
+
+    def add_many(self, items):
+        if len(self):
+            for name, contact in items:
+                self.update(name, contact)
+        else:
+            self.extend(name for name, _ in items)
+
+    def update(self, name: str, contact):
+        if name not in self:
+            self.add(name)
+
+    def remove(self, name: str):
+        self.discard(name)
+
+    def remove_many(self, names):
+        for name in names:
+            self.discard(name)
+
+
+class Completer:
+    def __init__(self, book, notes):
+        self.commands = Trie()
+        for command in COMMANDS:
+            self.commands.add(command)
+        self.names = NameTrie()
+        book.attach_index("completion", self.names)
+        self.notes = notes
+        # "command" — головний запит, "tags" — запит тегів, None — без доповнення
+        self.mode: Optional[str] = None
+        self._matches: List[str] = []
+
+    def candidates(self, line: str) -> List[str]:
+        """Варіанти всього рядка введення (ім'я контакту може містити пробіли)."""
+        if self.mode == "tags":
+            prefix = line.rsplit(",", 1)[-1].lstrip()
+            head = line[:len(line) - len(prefix)]
+            return [head + tag for tag in self.notes.complete_tags(prefix)]
+        if self.mode != "command":
+            return []
+        command, space, rest = line.lstrip().partition(" ")
+        if not space:
+            return [found + " " for found in self.commands.complete(command)]
+        if command.lower() not in NAME_COMMANDS:
+            return []
+        prefix = rest.lstrip()
+        head = line[:len(line) - len(prefix)]
+        return [head + name + " " for name in self.names.complete(prefix)]
+
+    def complete(self, text: str, state: int) -> Optional[str]:
+        # Протокол readline: state 0, 1, 2, ... доки не повернемо None
+        if state == 0:
+            self._matches = self.candidates(text)
+        return self._matches[state] if state < len(self._matches) else None
+
+
+_active: Optional[Completer] = None
+
+
+def install(book, notes) -> Optional[Completer]:
+    """Вмикає доповнення за Tab; без readline повертає None."""
+    global _active
+    if readline is None:
+        return None
+    completer = Completer(book, notes)
+    readline.set_completer(completer.complete)
+    # Доповнюємо весь рядок, а не окреме слово
+    readline.set_completer_delims("")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    _active = completer
+    return completer
+
+
+def prompt(text: str, mode: Optional[str] = None) -> str:
+    """input() з доповненням у режимі mode ("command", "tags" або None)."""
+    if _active is None:
+        return input(text)
+    _active.mode = mode
+    try:
+        return input(text)
+    finally:
+        _active.mode = None
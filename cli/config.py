@@ -0,0 +1,34 @@
+"""Налаштування застосунку зі змінних оточення."""
+import os
+
+# Формат знімків сховища: "json" (за замовчуванням) або "binary" (storage.binary)
+STORAGE_FORMAT = os.environ.get("PA_STORAGE_FORMAT", "json").lower()
+
+# Нотатки у файлі даних через mmap (у пам'яті лише метадані): PA_NOTES_MAPPED=1
+NOTES_MAPPED = os.environ.get("PA_NOTES_MAPPED", "") == "1"
+
+# Фоновий запис змін через asyncio-конвеєр (storage.pipeline): PA_ASYNC_SAVES=1;
+# за замовчуванням кожна зміна записується одразу
+ASYNC_SAVES = os.environ.get("PA_ASYNC_SAVES", "") == "1"
+
+# Скільки версій зберігати в історії змін (storage.history); 0 — вимкнути історію
+HISTORY_KEEP = int(os.environ.get("PA_HISTORY_KEEP", "50"))
+
+# Кількість шардів для контактів (storage.sharding); 0 — один файл.
+# Змінити кількість для наявних шардів: python -m storage.sharding N (інакше діє кількість
+# з manifest.json, а про розбіжність CLI попереджає під час запуску)
+CONTACT_SHARDS = int(os.environ.get("PA_CONTACT_SHARDS", "0"))
+
+# Нагадування про дні народження у фоні (contacts.reminders); PA_REMINDERS=1 — увімкнути
+REMINDERS = os.environ.get("PA_REMINDERS", "") == "1"
+
+# Команда, яку запускати замість друку для кожного нагадування (отримує ім'я та дату), напр. notify-send
+REMINDER_HOOK = os.environ.get("PA_REMINDER_HOOK", "")
+
+# Скільки результатів search / note-search тримати в кеші (utils.cache); 0 — без кешу
+SEARCH_CACHE = int(os.environ.get("PA_SEARCH_CACHE", "256"))
+
+# Скільки об'єктів Contact тримати в пам'яті (contacts.cache); решта скидається в тимчасовий
+# файл і читається при зверненні. Лише кількість записів (не МБ): індекси пошуку лишаються
+# в пам'яті. 0 — усі в пам'яті
+RESIDENT_CONTACTS = int(os.environ.get("PA_RESIDENT_CONTACTS", "0"))
@@ -1,15 +1,66 @@
+import sys
 from typing import List
 
+from cli.completion import prompt
+from notes.dedup import DEFAULT_THRESHOLD
+from notes.search import snippet
 from notes.services import NoteService
 
 
-def _print_notes(notes) -> str:
+def _print_notes(notes, numbers=None) -> str:
+    """numbers: id → номер нотатки (для відсортованого виводу номери лишаються ті, що в note-edit/note-delete)."""
     if not notes:
         return "Нотаток поки немає."
     lines = []
     for idx, note in enumerate(notes, 1):
-        tags_part = f" [теги: {', '.join(note.tags)}]" if note.tags else ""
-        lines.append(f"{idx}. {note.text}{tags_part}")
+        lines.append(f"{numbers[note.id] if numbers else idx}. {note}")
+    return "\n".join(lines)
+
+
+def _list_notes(args: List[str], notes: NoteService) -> str:
+    """note-list [--sort text|tag]"""
+    if not args:
+        return _print_notes(notes.read())
+    if len(args) != 2 or args[0] != "--sort":
+        return "Використання: note-list [--sort text|tag]"
+    try:
+        ordered = notes.sorted_notes(args[1].lower())
+    except ValueError as e:
+        return str(e)
+    numbers = {note.id: idx for idx, note in enumerate(notes.read(), 1)}
+    return _print_notes(ordered, numbers)
+
+
+def _print_matches(matches) -> str:
+    """Результати пошуку: лише фрагменти навколо збігів, а не весь текст нотаток."""
+    if not matches:
+        return "Нотаток не знайдено."
+    # У терміналі — підсвітка кольором, інакше (вивід у файл) — лапки
+    mark = ("\033[1;33m", "\033[0m") if sys.stdout.isatty() else ("«", "»")
+    lines = []
+    for idx, match in enumerate(matches, 1):
+        tags = match.note.tags
+        tags_part = f" [теги: {', '.join(tags)}]" if tags else ""
+        lines.append(f"{idx}. {snippet(match.note.text, match.spans, mark=mark)}{tags_part}")
+    return "\n".join(lines)
+
+
+def _print_duplicates(args: List[str], notes: NoteService) -> str:
+    """note-dupes [поріг у %] — групи майже однакових нотаток (за замовчуванням 70%)."""
+    try:
+        threshold = int(args[0]) / 100 if args else DEFAULT_THRESHOLD
+    except ValueError:
+        return "Поріг має бути цілим числом відсотків, напр. note-dupes 80."
+    clusters = notes.find_duplicates(threshold)
+    if not clusters:
+        return "Схожих нотаток не знайдено."
+    # Номери — як у note-list, щоб зайві можна було видалити через note-delete
+    numbers = {note.id: idx for idx, note in enumerate(notes.read(), 1)}
+    lines = []
+    for group, cluster in enumerate(clusters, 1):
+        lines.append(f"Група {group}:")
+        for note in cluster:
+            lines.append(f"  {numbers[note.id]}. {snippet(note.text, [])}")
     return "\n".join(lines)
 
 
@@ -21,9 +72,11 @@ def handle_notes_command(command: str, args: List[str], notes: NoteService) -> b
     if not command.startswith("note-"):
         return False
 
+    notes.refresh()
+
     if command == "note-add":
         text = input("Введіть текст нотатки: ").strip()
-        tags_raw = input("Введіть теги через кому (або залиште порожнім): ").strip()
+        tags_raw = prompt("Введіть теги через кому (або залиште порожнім): ", "tags").strip()
         tags = [t.strip() for t in tags_raw.split(",") if t.strip()] if tags_raw else []
         try:
             notes.create(text, tags)
@@ -33,7 +86,7 @@ def handle_notes_command(command: str, args: List[str], notes: NoteService) -> b
         return True
 
     if command == "note-list":
-        print(_print_notes(notes.read()))
+        print(_list_notes(args, notes))
         return True
 
     if command == "note-edit":
@@ -48,7 +101,7 @@ def handle_notes_command(command: str, args: List[str], notes: NoteService) -> b
         new_text = input("Новий текст (або Enter, щоб залишити): ").strip()
         new_text = new_text if new_text else None
 
-        tags_raw = input("Нові теги через кому (або Enter, щоб залишити): ").strip()
+        tags_raw = prompt("Нові теги через кому (або Enter, щоб залишити): ", "tags").strip()
         new_tags = [t.strip() for t in tags_raw.split(",") if t.strip()] if tags_raw else None
 
         try:
@@ -71,13 +124,13 @@ def handle_notes_command(command: str, args: List[str], notes: NoteService) -> b
 
     if command == "note-search":
         text_part = input("Ключові слова для пошуку в тексті (через пробіл, або Enter): ").strip()
-        tags_raw = input("Теги для пошуку (через кому, або Enter): ").strip()
+        tags_raw = prompt("Теги для пошуку (через кому, або Enter): ", "tags").strip()
 
         keywords = text_part.split() if text_part else None
         tags = [t.strip() for t in tags_raw.split(",") if t.strip()] if tags_raw else None
 
-        results = notes.search(keywords=keywords, tags=tags)
-        print(_print_notes(results))
+        results = notes.search_matches(keywords=keywords, tags=tags)
+        print(_print_matches(results))
         return True
 
     if command == "note-tags":
@@ -89,9 +142,13 @@ def handle_notes_command(command: str, args: List[str], notes: NoteService) -> b
         return True
 
     if command == "note-by-tag":
-        tag = input("Введіть тег: ").strip()
+        tag = prompt("Введіть тег: ", "tags").strip()
         results = notes.sort_by_tag(tag)
         print(_print_notes(results))
         return True
 
+    if command == "note-dupes":
+        print(_print_duplicates(args, notes))
+        return True
+
     return False
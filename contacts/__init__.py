@@ -8,6 +8,8 @@ from .services import (
     search_contacts, 
     add_birthday, 
     show_birthdays, 
+    show_duplicates,
+    merge_contacts,
     input_error
 )
 
@@ -22,5 +24,7 @@ __all__ = [
     "search_contacts",
     "add_birthday",
     "show_birthdays",
+    "show_duplicates",
+    "merge_contacts",
     "input_error"
 ]
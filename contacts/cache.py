@@ -0,0 +1,181 @@
+"""Обмеження кількості об'єктів Contact у пам'яті: LRU гарячих записів і скидання холодних на диск.
+
+ContactCache підміняє словник AddressBook.data (ім'я → Contact), коли
+задано max_resident. Усі імена відомі завжди, але об'єктами Contact в
+пам'яті лишаються не більше maxsize нещодавно використаних. Витіснений
+контакт записується рядком JSON у тимчасовий файл скидання і
+відновлюється з нього при наступному зверненні.
+
+Це обмеження лише на самі контакти, а не на пам'ять процесу: індекси
+книги (ім'я, телефон, email, адреса, транслітерація, впорядковані види)
+лишаються в пам'яті повністю і на великих книгах займають більшу її
+частину (див. benchmarks/bench_contact_cache.py). Тому ліміт задається
+лише кількістю записів, без варіанта в мегабайтах.
+
+Поки витіснений об'єкт ще живий (його тримає виклик, що отримав контакт
+раніше), звернення повертає той самий об'єкт, а не копію з диска — тож
+зміни через нього не губляться. Повний перебір (values/items) читає
+холодні записи, не витісняючи ними гарячі.
+"""
+import json
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from utils.cache import CacheStats
+
+# Файл скидання стискається, коли застарілі записи займають більше половини (але не менше ліміту)
+SPILL_COMPACT_MIN = 1 << 20
+# Позиція у файлі скидання — одне ціле: зміщення << _LENGTH_BITS | довжина (кортеж удвічі більший)
+_LENGTH_BITS = 24
+_LENGTH_MASK = (1 << _LENGTH_BITS) - 1
+
+
+class _ScanValues(ValuesView):
+    def __iter__(self):
+        for key in self._mapping:
+            yield self._mapping.peek(key)
+
+
+class _ScanItems(ItemsView):
+    def __iter__(self):
+        for key in self._mapping:
+            yield key, self._mapping.peek(key)
+
+
+class ContactCache(MutableMapping):
+    def __init__(self, maxsize: int, decode: Callable[[Dict], Any], adopt: Callable[[str, Any], None]):
+        self.maxsize = maxsize
+        self.decode = decode
+        # adopt(ключ, об'єкт) — прив'язує відновлений з диска контакт до книги
+        self.adopt = adopt
+        # Усі імена в порядку додавання → позиція актуальної копії у файлі скидання або None
+        self._keys: Dict[str, Optional[int]] = {}
+        self._hot: "OrderedDict[str, Any]" = OrderedDict()
+        # Витіснені, але ще живі об'єкти
+        self._alive: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+        self._spill = None
+        self._spill_size = 0
+        self._live_bytes = 0
+        # Читання книги йдуть паралельно, а звернення тут змінює LRU
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __getitem__(self, key: str):
+        with self._lock:
+            contact = self._hot.get(key)
+            if contact is not None:
+                self._hot.move_to_end(key)
+                self.hits += 1
+                return contact
+            contact = self._restore(key)
+            self.misses += 1
+            self._hot[key] = contact
+            self._evict()
+            return contact
+
+    def __setitem__(self, key: str, contact):
+        with self._lock:
+            # Новий або змінений контакт: копія на диску (якщо була) застаріла
+            position = self._keys.get(key)
+            self._keys[key] = None
+            self._forget(position)
+            self._alive.pop(key, None)
+            self._hot[key] = contact
+            self._hot.move_to_end(key)
+            self._evict()
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            self._forget(self._keys.pop(key))
+            self._hot.pop(key, None)
+            self._alive.pop(key, None)
+
+    def resident(self, key: str):
+        """Контакт, якщо він зараз у пам'яті, інакше None (нічого не читає з диска)."""
+        with self._lock:
+            contact = self._hot.get(key)
+            return contact if contact is not None else self._alive.get(key)
+
+    def peek(self, key: str):
+        """Контакт без зміни порядку LRU (для повного перебору)."""
+        with self._lock:
+            contact = self._hot.get(key)
+            return contact if contact is not None else self._restore(key)
+
+    def values(self):
+        return _ScanValues(self)
+
+    def items(self):
+        return _ScanItems(self)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, len(self._hot), self.maxsize)
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    # -- Внутрішнє: відновлення, витіснення, файл скидання --
+    def _restore(self, key: str):
+        position = self._keys[key]
+        contact = self._alive.get(key)
+        if contact is not None:
+            return contact
+        contact = self.decode(json.loads(self._read(position)))
+        self.adopt(key, contact)
+        self._alive[key] = contact
+        return contact
+
+    def _evict(self):
+        while len(self._hot) > self.maxsize:
+            key, contact = self._hot.popitem(last=False)
+            if self._keys[key] is None:
+                line = json.dumps(contact.to_dict(), ensure_ascii=False) + "\n"
+                self._keys[key] = self._append(line.encode("utf-8"))
+            self._alive[key] = contact
+
+    def _append(self, data: bytes) -> int:
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(prefix="contacts-", suffix=".spill")
+        self._spill.seek(self._spill_size)
+        self._spill.write(data)
+        position = self._spill_size << _LENGTH_BITS | len(data)
+        self._spill_size += len(data)
+        self._live_bytes += len(data)
+        return position
+
+    def _read(self, position: int) -> bytes:
+        self._spill.seek(position >> _LENGTH_BITS)
+        return self._spill.read(position & _LENGTH_MASK)
+
+    def _forget(self, position: Optional[int]):
+        if position is None:
+            return
+        self._live_bytes -= position & _LENGTH_MASK
+        if self._spill_size > max(SPILL_COMPACT_MIN, 2 * self._live_bytes):
+            self._compact()
+
+    def _compact(self):
+        old, self._spill = self._spill, None
+        self._spill_size = self._live_bytes = 0
+        for key, position in self._keys.items():
+            if position is not None:
+                old.seek(position >> _LENGTH_BITS)
+                self._keys[key] = self._append(old.read(position & _LENGTH_MASK))
+        old.close()
@@ -0,0 +1,99 @@
+"""Пошук і злиття дублікатів контактів.
+
+Замість попарного порівняння (O(n²)) кожен контакт дає кілька ключів
+блокування: ім'я без урахування регістру, останні 10 цифр кожного
+телефону та email у нижньому регістрі. Контакти зі спільним ключем
+об'єднуються в один кластер через систему неперетинних множин
+(union-find), тож увесь пошук — один прохід зі словником, майже лінійний
+за кількістю контактів.
+"""
+from typing import Dict, Iterable, Iterator, List
+
+from utils.disjointset import DisjointSet
+from utils.normalize import canonical
+
+# Скільки останніх цифр телефону порівнюємо: 0501234567 і 380501234567 — той самий номер
+PHONE_KEY_DIGITS = 10
+
+
+def phone_key(phone: str) -> str:
+    return phone[-PHONE_KEY_DIGITS:]
+
+
+def name_key(name: str) -> str:
+    return canonical(" ".join(name.split()))
+
+
+def blocking_keys(contact) -> Iterator[str]:
+    """Ключі, за якими контакт може збігтися з іншими."""
+    yield "n:" + name_key(contact.name.value)
+    for phone in contact.phones:
+        yield "p:" + phone_key(phone.value)
+    if contact.email:
+        yield "e:" + contact.email.value.casefold()
+
+
+def find_duplicates(contacts: Iterable) -> List[List]:
+    """Кластери з двох і більше контактів, що ймовірно описують одну людину.
+
+    Кластери й контакти в них ідуть у порядку появи у вхідній послідовності.
+    """
+    items = []
+    sets = DisjointSet()
+    first_seen: Dict[str, int] = {}
+    for contact in contacts:
+        index = sets.add()
+        items.append(contact)
+        for key in blocking_keys(contact):
+            other = first_seen.setdefault(key, index)
+            if other != index:
+                sets.union(index, other)
+
+    clusters: Dict[int, List] = {}
+    for index, contact in enumerate(items):
+        if sets.size[sets.find(index)] > 1:
+            clusters.setdefault(sets.find(index), []).append(contact)
+    return list(clusters.values())
+
+
+def cluster_keys(keys: Iterable[str], groups: Iterable[Iterable[str]]) -> List[List[str]]:
+    """Кластери ключів за готовими групами зі спільним ключем блокування (бакети індексів книги).
+
+    Той самий union-find, що й у find_duplicates, але без перебору самих
+    контактів; кластери й ключі в них — у порядку keys.
+    """
+    positions = {key: index for index, key in enumerate(keys)}
+    order = list(positions)
+    sets = DisjointSet()
+    for _ in order:
+        sets.add()
+    for group in groups:
+        members = iter(group)
+        first = positions[next(members)]
+        for key in members:
+            sets.union(first, positions[key])
+    clusters: Dict[int, List[str]] = {}
+    for index, key in enumerate(order):
+        root = sets.find(index)
+        if sets.size[root] > 1:
+            clusters.setdefault(root, []).append(key)
+    return list(clusters.values())
+
+
+def merge_into(primary, others: Iterable) -> None:
+    """Переносить дані інших контактів у primary.
+
+    Телефони додаються, якщо такого номера ще немає; email, адреса й день
+    народження беруться з інших контактів лише тоді, коли в primary їх немає.
+    """
+    known = {phone_key(phone.value) for phone in primary.phones}
+    for other in others:
+        for phone in other.phones:
+            key = phone_key(phone.value)
+            if key not in known:
+                known.add(key)
+                primary.add_phone(phone.value)
+        for field_name in ('email', 'address', 'birthday'):
+            value = getattr(other, field_name)
+            if value is not None and getattr(primary, field_name) is None:
+                primary.edit_field(field_name, str(value))
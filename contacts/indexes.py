@@ -0,0 +1,285 @@
+"""Зворотні індекси адресної книги: значення поля → імена контактів.
+
+AddressBook оновлює індекси при додаванні, видаленні та зміні контакту,
+тож пошук за точним значенням коштує O(кількості результатів), а не
+повного перебору книги. Пошук за префіксом іде по відсортованому списку
+ключів (bisect), який перебудовується ліниво після змін набору ключів.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from .dedup import name_key, phone_key
+except ImportError:
+    from dedup import name_key, phone_key
+
+from utils.normalize import canonical, word_tokens
+from utils.sortedlist import SortedView
+from utils.translit import translit_tokens
+
+
+class RecordIndex:
+    """Базовий індекс; підкласи визначають keys() (і за потреби normalize())."""
+
+    # Поля контакту, з яких keys() будує ключі: зміна інших полів індекс не зачіпає (None — невідомо)
+    fields: Optional[Tuple[str, ...]] = None
+
+    def __init__(self):
+        self._buckets: Dict[str, Set[str]] = {}
+        # Ключі, під якими проіндексовано кожен контакт (для швидкого видалення)
+        self._entries: Dict[str, Tuple[str, ...]] = {}
+        self._sorted: Optional[List[str]] = None
+
+    def keys(self, contact) -> Iterable[str]:
+        raise NotImplementedError
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return value.casefold()
+
+    def add(self, name: str, contact):
+        keys = tuple(set(self.keys(contact)))
+        self._entries[name] = keys
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = set()
+                self._sorted = None
+            bucket.add(name)
+
+    def add_many(self, items: Iterable[Tuple[str, object]]):
+        """Додає пачку (ім'я, контакт) одним проходом (для пакетних операцій книги)."""
+        buckets, entries = self._buckets, self._entries
+        new_keys = False
+        for name, contact in items:
+            keys = entries[name] = tuple(set(self.keys(contact)))
+            for key in keys:
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = {name}
+                    new_keys = True
+                else:
+                    bucket.add(name)
+        if new_keys:
+            self._sorted = None
+
+    def remove(self, name: str):
+        for key in self._entries.pop(name, ()):
+            bucket = self._buckets[key]
+            bucket.discard(name)
+            if not bucket:
+                del self._buckets[key]
+                self._sorted = None
+
+    def remove_many(self, names: Iterable[str]):
+        """Видаляє пачку імен (для пакетних операцій книги)."""
+        buckets, entries = self._buckets, self._entries
+        for name in names:
+            for key in entries.pop(name, ()):
+                bucket = buckets[key]
+                bucket.discard(name)
+                if not bucket:
+                    del buckets[key]
+                    self._sorted = None
+
+    def update(self, name: str, contact):
+        self.remove(name)
+        self.add(name, contact)
+
+    def lookup(self, value: str) -> Set[str]:
+        return self._buckets.get(self.normalize(value), set())
+
+    def shared(self) -> Iterable[Set[str]]:
+        """Набори з двох і більше імен під одним ключем (для пошуку дублікатів)."""
+        return (names for names in self._buckets.values() if len(names) > 1)
+
+    def _prefix_keys(self, prefix: str) -> List[str]:
+        # Порожній префікс (напр. телефон без жодної цифри) нічого не знаходить, а не все
+        if not prefix:
+            return []
+        if self._sorted is None:
+            self._sorted = sorted(self._buckets)
+        start = bisect_left(self._sorted, prefix)
+        end = bisect_left(self._sorted, prefix + "\U0010ffff", start)
+        return self._sorted[start:end]
+
+    def prefix(self, value: str) -> Set[str]:
+        names = set()
+        for key in self._prefix_keys(self.normalize(value)):
+            names |= self._buckets[key]
+        return names
+
+    def estimate(self, value: str, prefix: bool = False) -> int:
+        """Оцінка кількості результатів (для вибору найселективнішого індексу)."""
+        if not prefix:
+            return len(self.lookup(value))
+        return sum(len(self._buckets[key]) for key in self._prefix_keys(self.normalize(value)))
+
+    def matches(self, contact, value: str, prefix: bool = False) -> bool:
+        """Перевірка одного контакту тими самими ключами, що й в індексі."""
+        value = self.normalize(value)
+        if prefix:
+            return bool(value) and any(key.startswith(value) for key in self.keys(contact))
+        return value in self.keys(contact)
+
+
+class NameIndex(RecordIndex):
+    fields = ('name',)
+
+    def keys(self, contact) -> Iterable[str]:
+        yield name_key(contact.name.value)
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return name_key(value)
+
+
+class PhoneIndex(RecordIndex):
+    fields = ('phones',)
+
+    # Кожен номер індексується повністю та за останніми цифрами (0501234567 = 380501234567)
+    def keys(self, contact) -> Iterable[str]:
+        for phone in contact.phones:
+            yield phone.value
+            yield phone_key(phone.value)
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return "".join(char for char in value if char.isdigit())
+
+
+class EmailIndex(RecordIndex):
+    fields = ('email',)
+
+    def keys(self, contact) -> Iterable[str]:
+        if contact.email:
+            yield canonical(contact.email.value)
+
+
+class DomainIndex(RecordIndex):
+    fields = ('email',)
+
+    def keys(self, contact) -> Iterable[str]:
+        if contact.email:
+            yield canonical(contact.email.value.rsplit('@', 1)[1])
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return value.casefold().lstrip('@')
+
+
+class BirthdayMonthIndex(RecordIndex):
+    fields = ('birthday',)
+
+    def keys(self, contact) -> Iterable[str]:
+        if contact.birthday:
+            yield f"{contact.birthday.value.month:02d}"
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return value.strip().zfill(2)
+
+
+class TokenIndex(RecordIndex):
+    """Індекс за словами: значення запиту теж розбивається на токени, і
+    контакт має містити кожен з них; з prefix=True останній токен
+    порівнюється за префіксом. Підкласи визначають tokens() і keys().
+    """
+
+    @staticmethod
+    def tokens(value: str) -> List[str]:
+        return word_tokens(value)
+
+    def _query_sets(self, value: str, prefix: bool) -> List[Set[str]]:
+        tokens = self.tokens(value)
+        sets = [self._buckets.get(token, set()) for token in tokens[:-1 if prefix else None]]
+        if prefix and tokens:
+            names = set()
+            for key in self._prefix_keys(tokens[-1]):
+                names |= self._buckets[key]
+            sets.append(names)
+        return sets
+
+    def _intersect(self, value: str, prefix: bool) -> Set[str]:
+        sets = sorted(self._query_sets(value, prefix), key=len)
+        if not sets:
+            return set()
+        result = set(sets[0])
+        for names in sets[1:]:
+            result &= names
+        return result
+
+    def lookup(self, value: str) -> Set[str]:
+        return self._intersect(value, False)
+
+    def prefix(self, value: str) -> Set[str]:
+        return self._intersect(value, True)
+
+    def estimate(self, value: str, prefix: bool = False) -> int:
+        return min((len(names) for names in self._query_sets(value, prefix)), default=0)
+
+    def matches(self, contact, value: str, prefix: bool = False) -> bool:
+        tokens = self.tokens(value)
+        if not tokens:
+            return False
+        keys = set(self.keys(contact))
+        if prefix:
+            last = tokens.pop()
+            if not any(key.startswith(last) for key in keys):
+                return False
+        return all(token in keys for token in tokens)
+
+
+class AddressIndex(TokenIndex):
+    """Токени адреси: місто, вулиця, номер, поштовий індекс."""
+
+    fields = ('address',)
+
+    def keys(self, contact) -> Iterable[str]:
+        if contact.address:
+            yield from word_tokens(contact.address.value)
+
+
+class TranslitIndex(TokenIndex):
+    """Слова імені в латинській транслітерації (utils.translit), порахованій
+    один раз при додаванні чи зміні контакту. Запит кирилицею чи латиницею
+    перетворюється так само, тож «Olha» знаходить «Ольга» і навпаки.
+    """
+
+    fields = ('name',)
+
+    @staticmethod
+    def tokens(value: str) -> List[str]:
+        return translit_tokens(value)
+
+    def keys(self, contact) -> Iterable[str]:
+        return translit_tokens(contact.name.value)
+
+    def lookup_exact(self, value: str) -> Set[str]:
+        """Імена з тим самим набором слів, що й value (для підказок «можливо, ви мали на увазі»)."""
+        tokens = set(self.tokens(value))
+        return {name for name in self.lookup(value) if set(self._entries[name]) == tokens}
+
+    def contains(self, name: str, fragment: str) -> bool:
+        """Підрядок (уже транслітерований) у словах імені — за збереженими ключами."""
+        return any(fragment in key for key in self._entries.get(name, ()))
+
+
+# Впорядковані види книги (utils.sortedlist.SortedView): ключі сортування контакту
+def name_order(contact) -> Tuple:
+    return (name_key(contact.name.value),)
+
+
+def birthday_order(contact) -> Tuple:
+    # За днем і місяцем, без року; контакти без дня народження — в кінці
+    if contact.birthday is None:
+        return (1,)
+    day = contact.birthday.value
+    return (0, day.month, day.day)
+
+
+ORDERS = {'name': name_order, 'birthday': birthday_order}
+
+
+def sorted_views() -> Dict[str, SortedView]:
+    return {f'sort:{order}': SortedView(sort_key, fields=(order,)) for order, sort_key in ORDERS.items()}
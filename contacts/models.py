@@ -1,22 +1,53 @@
 from collections import UserDict
-from datetime import datetime, timedelta
-from typing import Optional, List
-import re
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
 
 try:
     from .validators import ContactValidator
 except ImportError:
     from validators import ContactValidator
 
+try:
+    from .cache import ContactCache
+    from .dedup import cluster_keys, merge_into, phone_key
+    from .indexes import (
+        ORDERS, AddressIndex, BirthdayMonthIndex, DomainIndex, EmailIndex, NameIndex, PhoneIndex, TranslitIndex,
+        sorted_views,
+    )
+    from .query import execute, parse_query
+    from .reminders import congratulation_date, next_birthday
+except ImportError:
+    from cache import ContactCache
+    from dedup import cluster_keys, merge_into, phone_key
+    from indexes import (
+        ORDERS, AddressIndex, BirthdayMonthIndex, DomainIndex, EmailIndex, NameIndex, PhoneIndex, TranslitIndex,
+        sorted_views,
+    )
+    from query import execute, parse_query
+    from reminders import congratulation_date, next_birthday
+
+from utils.bulk import BulkResult
+from utils.cache import CacheStats, ResultCache
+from utils.locks import RWLock, reader, writer
+
 # ПОЛЯ (Field)
 
 class Field:
     #Базовий клас для полів контакту.
     def __init__(self, value):
         self._value = value 
+        self._owner = None  # контакт, якому належить поле (для відстеження змін)
     
     def __str__(self):
         return str(self._value)
+
+    @classmethod
+    def trusted(cls, value):
+        """Поле з уже перевіреного значення (без повторної валідації)."""
+        field = cls.__new__(cls)
+        Field.__init__(field, value)
+        return field
     
     @property
     def value(self):
@@ -25,6 +56,8 @@ class Field:
     @value.setter
     def value(self, new_value):
         self._value = new_value
+        if self._owner is not None:
+            self._owner._mark_dirty()
 
 class Name(Field):
     pass
@@ -53,35 +86,66 @@ class Contact:
     def __init__(self, name: str, address: Optional[str] = None, email: Optional[str] = None, birthday: Optional[str] = None):
         if not isinstance(name, str): raise TypeError("Ім'я має бути рядком.")
         
-        self.name = Name(name)
+        # Книга, що містить контакт, і ключ, під яким він там лежить
+        self._book = None
+        self._key = None
+        self._dirty = False
+        # Кеш рядка __str__; скидається в _mark_dirty
+        self._rendered = None
+
+        self.name = self._own(Name(name))
         self.phones: List[Phone] = [] 
         
-        self.address: Optional[Address] = Address(address) if address else None
-        self.email: Optional[Email] = Email(email) if email else None
-        self.birthday: Optional[Birthday] = Birthday(birthday) if birthday else None
+        self.address: Optional[Address] = self._own(Address(address)) if address else None
+        self.email: Optional[Email] = self._own(Email(email)) if email else None
+        self.birthday: Optional[Birthday] = self._own(Birthday(birthday)) if birthday else None
+
+    def _own(self, field: Field) -> Field:
+        field._owner = self
+        return field
+
+    def _mark_dirty(self):
+        """Позначає контакт зміненим і повідомляє книгу, якій він належить."""
+        self._dirty = True
+        self._rendered = None
+        if self._book is not None:
+            self._book._record_changed(self)
 
     def add_phone(self, phone: str):
-        self.phones.append(Phone(phone))
+        self.phones.append(self._own(Phone(phone)))
+        self._mark_dirty()
+
+    def has_phone(self, phone: str) -> bool:
+        """Чи є вже такий номер (порівнюються останні цифри, без форматування)."""
+        key = phone_key(ContactValidator.validate_phone(phone))
+        return any(phone_key(p.value) == key for p in self.phones)
 
     def edit_phone(self, old_phone: str, new_phone: str):
         for phone_obj in self.phones:
             if phone_obj.value == old_phone:
+                # Сетер Field.value сам позначить контакт зміненим
                 phone_obj.value = Phone(new_phone).value
                 return
         raise ValueError(f"Старий номер телефону {old_phone} не знайдено.")
     
     def edit_field(self, field_name: str, new_value: str):
         if field_name == 'email':
-            self.email = Email(new_value)
+            self.email = self._own(Email(new_value))
         elif field_name == 'address':
-            self.address = Address(new_value)
+            self.address = self._own(Address(new_value))
         elif field_name == 'birthday':
-            self.birthday = Birthday(new_value)
+            self.birthday = self._own(Birthday(new_value))
         else:
             raise ValueError(f"Поле '{field_name}' не підтримується для прямого редагування.")
+        self._mark_dirty()
 
     def __str__(self):
-        #Виведення контакту у зручному форматі.
+        #Виведення контакту у зручному форматі (результат кешується до наступної зміни).
+        if self._rendered is None:
+            self._rendered = self._render()
+        return self._rendered
+
+    def _render(self) -> str:
         phone_strings = '; '.join(str(p) for p in self.phones)
         bday_str = f" | ДН: {self.birthday}" if self.birthday else ""
         email_str = f" | Email: {self.email}" if self.email else ""
@@ -107,91 +171,503 @@ class Contact:
             email=data.get('email'),
             birthday=data.get('birthday')
         )
-        for phone in data.get('phones', []):
-            contact.add_phone(phone)
+        # Телефони перевіряємо одним пакетом і не валідуємо вдруге у Phone()
+        phones = ContactValidator.validate_many('phone', data.get('phones', []))
+        contact.phones = [contact._own(Phone.trusted(phone)) for phone in phones]
         return contact
 
 # КНИГА (AddressBook)
 
+def _remove_many(index, keys: List[str]):
+    # remove_many необов'язковий для зовнішніх структур (attach_index): інакше — по одному ключу
+    remove_many = getattr(index, 'remove_many', None)
+    if remove_many is not None:
+        remove_many(keys)
+    else:
+        for key in keys:
+            index.remove(key)
+
+
 class AddressBook(UserDict):
-    """Адресна книга для контактів."""
-    
+    """Адресна книга для контактів.
+
+    З thread_safe=True читання (find, search, get_upcoming_birthdays)
+    виконуються паралельно, а зміни серіалізуються через RWLock.
+
+    Книга веде облік змін від останнього збереження: змінені й додані
+    контакти та видалені імена (див. changes / clear_changes).
+
+    Зворотні індекси (ім'я, телефон, email, домен, місяць народження, слова адреси,
+    транслітерація імені) оновлюються разом із книгою і використовуються search та lookup.
+
+    З max_resident=N у пам'яті лишаються не більше N нещодавно використаних
+    об'єктів Contact, решта — у файлі скидання (contacts/cache.py); find, search і
+    show-all працюють так само, а dupes і birthdays читають лише кандидатів з індексів.
+    Ліміт рахує лише записи (не мегабайти), індекси лишаються в пам'яті повністю.
+    """
+
+    def __init__(self, *args, thread_safe: bool = False, search_cache: int = 256, max_resident: int = 0,
+                 **kwargs):
+        self._lock = RWLock() if thread_safe else None
+        # Покоління: зростає при кожній зміні, що зачіпає індекси; ним перевіряється кеш пошуку
+        self._generation = 0
+        self._results = ResultCache(search_cache)
+        self._changed = set()
+        self._removed = set()
+        # Зміни, передані на фоновий запис, але ще не підтверджені (begin_save/end_save)
+        self._inflight = set()
+        self._indexes = {
+            'name': NameIndex(),
+            'phone': PhoneIndex(),
+            'email': EmailIndex(),
+            'domain': DomainIndex(),
+            'birthday': BirthdayMonthIndex(),
+            'address': AddressIndex(),
+            'translit': TranslitIndex(),
+        }
+        # Впорядковані види ('sort:name', 'sort:birthday') — для show-all --sort без сортування при запиті
+        self._indexes.update(sorted_views())
+        super().__init__()
+        self._max_resident = max_resident
+        if max_resident > 0:
+            self.data = ContactCache(max_resident, Contact.from_dict, self._adopt)
+        self.update(*args, **kwargs)
+
+    def _adopt(self, key: str, contact: Contact):
+        contact._book = self
+        contact._key = key
+
+    def _resident(self, key: str) -> Optional[Contact]:
+        """Контакт, якщо він у пам'яті: з max_resident холодні записи не читаються з диска."""
+        return self.data.resident(key) if self._max_resident else self.data.get(key)
+
+    def _peek(self, key: str) -> Contact:
+        """Контакт для перебору: з max_resident не витісняє гарячі записи."""
+        return self.data.peek(key) if self._max_resident else self.data[key]
+
+    # Приєднання/від'єднання контакту без обліку змін (спільне для всіх шляхів)
+    def _attach(self, key: str, contact: Contact):
+        old = self.data.get(key)
+        if old is not None and old is not contact:
+            self._detach(key)
+        self.data[key] = contact
+        self._adopt(key, contact)
+        self._generation += 1
+        for index in self._indexes.values():
+            index.update(key, contact)
+
+    def _detach(self, key: str) -> Optional[Contact]:
+        contact = self._resident(key)
+        del self.data[key]
+        self._generation += 1
+        for index in self._indexes.values():
+            index.remove(key)
+        if contact is not None:
+            contact._book = None
+            contact._key = None
+        return contact
+
+    @writer
+    def __setitem__(self, key: str, contact: Contact):
+        self._attach(key, contact)
+        self._changed.add(key)
+        self._removed.discard(key)
+
+    @writer
+    def __delitem__(self, key: str):
+        self._detach(key)
+        self._changed.discard(key)
+        self._removed.add(key)
+
+    @writer
+    def _record_changed(self, contact: Contact):
+        key = contact._key
+        if self.data.get(key) is not contact:
+            return
+        if key != contact.name.value:
+            # Ім'я змінили через Field.value — переносимо запис під новий ключ
+            del self[key]
+            key = contact.name.value
+            self[key] = contact
+        else:
+            # З max_resident це ще й скидає застарілу копію у файлі скидання
+            self.data[key] = contact
+            self._generation += 1
+            for index in self._indexes.values():
+                index.update(key, contact)
+        self._changed.add(key)
+
+    @reader
+    def changes(self) -> tuple[List[Contact], List[str]]:
+        """Контакти, змінені або додані після збереження, та видалені імена."""
+        return [self.data[key] for key in self._changed], list(self._removed)
+
+    @reader
+    def pending_keys(self) -> set:
+        """Імена з незбереженими локальними змінами."""
+        return self._changed | self._removed | self._inflight
+
+    @writer
+    def clear_changes(self):
+        """Викликається після успішного збереження змін."""
+        for key in self._changed:
+            contact = self._resident(key)
+            if contact is not None:
+                contact._dirty = False
+        self._changed.clear()
+        self._removed.clear()
+
+    @writer
+    def begin_save(self) -> tuple[List[Contact], List[str]]:
+        """Як changes(), але одразу передає зміни «в дорогу» для фонового запису.
+
+        Поки запис не підтверджено (end_save), ці імена лишаються
+        незбереженими для merge_external.
+        """
+        upserts, deletes = self.changes()
+        self._inflight |= self._changed | self._removed
+        self._changed.clear()
+        self._removed.clear()
+        return upserts, deletes
+
+    @writer
+    def end_save(self, keys, ok: bool):
+        """Результат фонового запису: при помилці зміни знову стають незбереженими."""
+        for key in keys:
+            self._inflight.discard(key)
+            if key in self._changed or key in self._removed:
+                continue
+            if key in self.data:
+                if ok:
+                    contact = self._resident(key)
+                    if contact is not None:
+                        contact._dirty = False
+                else:
+                    self._changed.add(key)
+            elif not ok:
+                self._removed.add(key)
+
+    @writer
+    def merge_external(self, records: List[dict], deleted: List[str], reset: bool = False):
+        """Застосовує зміни інших процесів (словники у форматі to_dict).
+
+        reset=True означає, що records — повний стан сховища. Контакти
+        з незбереженими локальними змінами не чіпаємо: локальні зміни
+        мають пріоритет і потраплять на диск при наступному збереженні.
+        """
+        pending = self._changed | self._removed | self._inflight
+        if reset:
+            present = {record['name'] for record in records}
+            deleted = [key for key in self.data if key not in present]
+        for key in deleted:
+            if key not in pending and key in self.data:
+                self._detach(key)
+        for record in records:
+            key = record['name']
+            if key in pending:
+                continue
+            current = self.data.get(key)
+            if current is not None and current.to_dict() == record:
+                continue
+            self._attach(key, Contact.from_dict(record))
+
+    @writer
+    def restore_records(self, records: dict):
+        """Приводить книгу до стану з історії (ім'я → словник to_dict) як звичайні зміни."""
+        for key in [key for key in self.data if key not in records]:
+            del self[key]
+        for key, record in records.items():
+            current = self.data.get(key)
+            if current is None or current.to_dict() != record:
+                self[key] = Contact.from_dict(record)
+
+    @writer
     def add_record(self, contact: Contact) -> str:
         """Додає контакт до адресної книги. Перевіряє дублікати."""
         if contact.name.value in self.data:
             return f"Контакт '{contact.name.value}' вже існує в адресній книзі."
-        self.data[contact.name.value] = contact
+        self[contact.name.value] = contact
         return f"Контакт '{contact.name.value}' успішно додано."
     
+    def _key_for(self, name: str) -> Optional[str]:
+        # Спочатку точний збіг, потім без урахування регістру — без перебору книги.
+        # Транслітерація тут не діє: find веде add/delete/change, і «Olga» не має змінити «Ольгу»
+        if name in self.data:
+            return name
+        names = self._indexes['name'].lookup(name)
+        return min(names) if names else None
+
+    @reader
     def find(self, name: str) -> Optional[Contact]:
-        """Пошук контакту за ім'ям (case-insensitive)."""
-        # Спочатку пошук точного збігу
-        for key in self.data:
-            if key.lower() == name.lower():
-                return self.data[key]
-        return None
+        """Пошук контакту за ім'ям (case-insensitive) — за індексом, без перебору книги."""
+        key = self._key_for(name)
+        return self.data[key] if key is not None else None
+
+    @reader
+    def similar_names(self, name: str) -> List[str]:
+        """Імена, що збігаються з name у транслітерації («Olha» → «Ольга»), — лише для підказки."""
+        return sorted(self._indexes['translit'].lookup_exact(name))
     
+    @writer
     def delete(self, name: str) -> str:
         """Видаляє контакт за ім'ям (case-insensitive)."""
-        # Пошук контакту з врахуванням регістру
-        for key in list(self.data.keys()):
-            if key.lower() == name.lower():
-                del self.data[key]
-                return f"Контакт '{key}' видалено."
-        return f"Контакт '{name}' не знайдено." 
+        contact = self.find(name)
+        if contact is None:
+            return f"Контакт '{name}' не знайдено."
+        key = contact._key
+        del self[key]
+        return f"Контакт '{key}' видалено."
+
+    # -- Пакетні операції: одне блокування, одна перевірка, без рядків на кожен запис --
+    @staticmethod
+    def _build(records: Iterable) -> Tuple[List[Contact], List[Tuple[str, str]]]:
+        """Валідує записи (Contact або словники to_dict) за один прохід, збираючи помилки."""
+        contacts, errors = [], []
+        for record in records:
+            if isinstance(record, Contact):
+                contacts.append(record)
+                continue
+            try:
+                contacts.append(Contact.from_dict(record))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append((str(record.get('name', '')), str(e)))
+        return contacts, errors
+
+    def _detach_many(self, keys: List[str]):
+        for key in keys:
+            contact = self._resident(key)
+            del self.data[key]
+            if contact is not None:
+                contact._book = None
+                contact._key = None
+            self._changed.discard(key)
+            self._removed.add(key)
+        self._generation += 1
+        for index in self._indexes.values():
+            _remove_many(index, keys)
+
+    def _attach_many(self, contacts: List[Contact]):
+        for contact in contacts:
+            key = contact.name.value
+            if key in self.data:
+                self._detach(key)
+            self.data[key] = contact
+            self._adopt(key, contact)
+            self._changed.add(key)
+            self._removed.discard(key)
+        # Кожен індекс оновлюється одним проходом по всій пачці
+        pairs = [(contact._key, contact) for contact in contacts]
+        self._generation += 1
+        for index in self._indexes.values():
+            index.add_many(pairs)
+
+    @writer
+    def add_many(self, records: Iterable) -> BulkResult:
+        """Додає контакти пакетом; наявні імена пропускаються."""
+        contacts, errors = self._build(records)
+        added, skipped = {}, []
+        for contact in contacts:
+            key = contact.name.value
+            if key in self.data or key in added:
+                skipped.append(key)
+            else:
+                added[key] = contact
+        self._attach_many(list(added.values()))
+        return BulkResult(added=len(added), skipped=tuple(skipped), errors=tuple(errors))
+
+    @writer
+    def upsert_many(self, records: Iterable) -> BulkResult:
+        """Додає нові контакти й замінює наявні з тим самим ім'ям (незмінені пропускає)."""
+        contacts, errors = self._build(records)
+        latest = {contact.name.value: contact for contact in contacts}
+        changed, skipped = [], []
+        added = updated = 0
+        for key, contact in latest.items():
+            current = self.data.get(key)
+            if current is None:
+                added += 1
+            elif current.to_dict() == contact.to_dict():
+                skipped.append(key)
+                continue
+            else:
+                updated += 1
+            changed.append(contact)
+        self._attach_many(changed)
+        return BulkResult(added=added, updated=updated, skipped=tuple(skipped), errors=tuple(errors))
+
+    @writer
+    def delete_many(self, names: Iterable[str]) -> BulkResult:
+        """Видаляє контакти за іменами (без урахування регістру, як delete) одним проходом по індексах."""
+        keys, skipped = {}, []
+        for name in names:
+            key = self._key_for(name)
+            if key is None or key in keys:
+                skipped.append(name)
+            else:
+                keys[key] = None
+        self._detach_many(list(keys))
+        return BulkResult(deleted=len(keys), skipped=tuple(skipped))
+
+    @writer
+    def update_many(self, changes: Dict[str, dict]) -> BulkResult:
+        """Змінює поля наявних контактів: ім'я → {'phones', 'email', 'address', 'birthday'}.
+
+        Контакт з некоректним значенням не змінюється зовсім (помилка в errors).
+        Індекси оновлюються один раз для всієї пачки.
+        """
+        updated, skipped, errors = {}, [], []
+        for name, fields in changes.items():
+            key = self._key_for(name)
+            if key is None:
+                skipped.append(name)
+                continue
+            contact = self.data[key]
+            unknown = set(fields) - {'phones', 'email', 'address', 'birthday'}
+            if unknown:
+                errors.append((key, f"Поле '{sorted(unknown)[0]}' не підтримується для прямого редагування."))
+                continue
+            current = contact.to_dict()
+            try:
+                fresh = Contact.from_dict({**current, **fields})
+            except (TypeError, ValueError) as e:
+                errors.append((key, str(e)))
+                continue
+            if fresh.to_dict() == current:
+                skipped.append(key)
+                continue
+            contact.phones = [contact._own(phone) for phone in fresh.phones]
+            for field in ('email', 'address', 'birthday'):
+                value = getattr(fresh, field)
+                setattr(contact, field, contact._own(value) if value is not None else None)
+            # Без _mark_dirty: він переіндексував би кожен контакт окремо
+            contact._dirty = True
+            contact._rendered = None
+            updated[key] = contact
+        for key, contact in updated.items():
+            # З max_resident це ще й скидає застарілу копію у файлі скидання
+            self.data[key] = contact
+            self._changed.add(key)
+        if updated:
+            keys, pairs = list(updated), list(updated.items())
+            touched = {field for fields in changes.values() for field in fields}
+            self._generation += 1
+            for index in self._indexes.values():
+                # Індекси незмінених полів (ім'я, транслітерація) не перебудовуються
+                depends = getattr(index, 'fields', None)
+                if depends is not None and not touched.intersection(depends):
+                    continue
+                _remove_many(index, keys)
+                index.add_many(pairs)
+        return BulkResult(updated=len(updated), skipped=tuple(skipped), errors=tuple(errors))
 
+    @writer
+    def attach_index(self, name: str, index):
+        """Під'єднує зовнішню вторинну структуру (add_many/update/remove, за бажання remove_many і fields),
+        що оновлюється разом із книгою.
+
+        Так працює, наприклад, планувальник нагадувань (contacts/reminders.py).
+        """
+        index.add_many(list(self.data.items()))
+        self._indexes[name] = index
+
+    @reader
+    def find_duplicates(self) -> List[List[Contact]]:
+        """Групи контактів зі спільним ім'ям (без урахування регістру), телефоном чи email.
+
+        Кластери будуються з бакетів індексів, тож читаються лише контакти, що мають дублікати.
+        """
+        groups = chain.from_iterable(self._indexes[field].shared() for field in ('name', 'phone', 'email'))
+        return [[self._peek(key) for key in cluster] for cluster in cluster_keys(self.data, groups)]
+
+    @writer
+    def merge(self, names: List[str]) -> Contact:
+        """Зливає контакти в перший із names; решта видаляються з книги."""
+        contacts = []
+        for name in names:
+            contact = self.find(name)
+            if contact is None:
+                raise KeyError(name)
+            if contact in contacts:
+                raise ValueError(f"Контакт '{contact._key}' вказано кілька разів: контакт не можна злити з самим собою.")
+            contacts.append(contact)
+        primary, others = contacts[0], contacts[1:]
+        merge_into(primary, others)
+        for other in others:
+            del self[other._key]
+        return primary
+
+    @reader
+    def records(self) -> List[Contact]:
+        """Знімок усіх контактів (безпечний для ітерації з інших потоків)."""
+        return list(self.data.values())
+
+    @reader
+    def lookup(self, field: str, value: str) -> List[Contact]:
+        """Контакти з точним значенням поля за індексом
+        ('name', 'phone', 'email', 'domain', 'birthday', 'address', 'translit')."""
+        return [self.data[name] for name in self._indexes[field].lookup(value)]
+
+    @reader
     def search(self, query: str) -> List[Contact]:
-        """Пошук за ім'ям, email або номером телефону (case-insensitive)."""
-        query = query.lower()
-        results = []
-        for record in self.data.values():
-            match = False
-            
-            # 1. Пошук за ім'ям (case-insensitive)
-            if query in record.name.value.lower():
-                match = True
-            
-            # 2. Пошук за телефоном (шукаємо в очищеному від символів рядку)
-            for phone in record.phones:
-                cleaned_phone = re.sub(r'[^\d]', '', phone.value)
-                if query in cleaned_phone:
-                    match = True
-                    break
-            
-            # 3. Пошук за email (case-insensitive)
-            if record.email and query in record.email.value.lower():
-                match = True
-
-            if match:
-                results.append(record)
-        return list(set(results))
+        """Пошук контактів мовою запитів (див. contacts/query.py).
+
+        Слово без поля шукається як підрядок в імені, телефоні чи email;
+        фільтри name:, phone:, email:, domain:, birthday:ММ, address:,
+        оператори AND/OR/NOT і префікс* виконуються за індексами, де це можливо.
+        Повторний запит без змін у книзі береться з кешу результатів.
+        """
+        key = " ".join(query.split())
+        # Кеш тримає імена, а не самі контакти: інакше він не дав би витіснити їх з пам'яті
+        names = self._results.get(key, self._generation)
+        if names is not None:
+            return [self.data[name] for name in names]
+        found = execute(parse_query(query), self.data, self._indexes)
+        self._results.put(key, self._generation, [contact._key for contact in found])
+        return found
 
+    def cache_stats(self) -> CacheStats:
+        """Влучання й промахи кешу результатів search."""
+        return self._results.stats()
+
+    def contact_cache_stats(self) -> Optional[CacheStats]:
+        """Влучання й промахи контактів у пам'яті (лише з max_resident, інакше None)."""
+        return self.data.stats() if self._max_resident else None
+
+    @reader
+    def sorted_records(self, order: str = 'name', today: Optional[date] = None) -> List[Contact]:
+        """Контакти в порядку order: 'name' — за ім'ям, 'birthday' — від найближчого дня
+        народження (починаючи з today), контакти без дати — в кінці."""
+        if order not in ORDERS:
+            raise ValueError(f"Невідомий порядок сортування: {order}. Доступні: {', '.join(ORDERS)}.")
+        view = self._indexes[f'sort:{order}']
+        if order == 'birthday':
+            today = today or datetime.now().date()
+            start = (0, today.month, today.day)
+            names = chain(view.irange(start, (1,)), view.irange((0,), start), view.irange((1,)))
+        else:
+            names = iter(view)
+        return [self._peek(name) for name in names]
+
+    @reader
     def get_upcoming_birthdays(self, days: int = 7) -> str:
         #Виводить список контактів, у яких день народження настане через N днів.
         today = datetime.now().date()
         upcoming = []
-        
-        for record in self.data.values():
-            if record.birthday is None: continue
-
-            bday_date = record.birthday.value
-            bday_this_year = bday_date.replace(year=today.year)
-            
-            if bday_this_year < today:
-                bday_this_year = bday_date.replace(year=today.year + 1)
-            
+
+        # Кандидати — з індексу місяців народження, а не перебором книги
+        months, month = set(), today.replace(day=1)
+        while month <= today + timedelta(days=days) and len(months) < 12:
+            months.add(f"{month.month:02d}")
+            month = (month + timedelta(days=32)).replace(day=1)
+        names = sorted(set().union(*(self._indexes['birthday'].lookup(m) for m in months)))
+
+        for record in map(self._peek, names):
+            bday_this_year = next_birthday(record.birthday.value, today)
             days_left = (bday_this_year - today).days
 
             if 0 <= days_left <= days:
-                congrats_date = bday_this_year
-                day_of_week = congrats_date.weekday()
-                
                 # Перенесення з вихідних на наступний понеділок
-                if day_of_week >= 5: 
-                    days_to_monday = 7 - day_of_week
-                    congrats_date += timedelta(days=days_to_monday)
-
-                upcoming.append((congrats_date, record.name.value))
+                upcoming.append((congratulation_date(bday_this_year), record.name.value))
         
         if not upcoming:
             return f"Жодного дня народження протягом {days} днів."
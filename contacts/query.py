@@ -0,0 +1,247 @@
+"""Мова запитів для пошуку контактів.
+
+Синтаксис:
+    name:Іван  phone:050*  email:ivan@example.com  domain:example.com
+    birthday:03  address:Київ  address:"вул. Шевченка"  (адреса — за словами)
+    translit:Olha  (слова імені в транслітерації; name: і слова без поля
+    шукають і так, тож «Olha» знаходить «Ольга», а «Олена» — «Olena»);
+    (значення з пробілами чи дужками беруться в лапки: phone:"+38(050)123-45-67");
+    AND / OR / NOT, дужки; сусідні умови без оператора поєднуються через AND;
+    * у кінці значення — пошук за префіксом;
+    слово без поля — підрядок в імені, телефоні чи email (як раніше).
+
+Планувальник: для AND спершу виконуються умови з індексами — від
+найселективнішої (за оцінкою індексу) — і множини кандидатів
+перетинаються ще до звернення до записів; решта умов перевіряється лише
+на кандидатах. Повний перебір — тільки коли жоден індекс не підходить.
+"""
+import re
+from typing import Dict, List, Optional, Set
+
+from utils.translit import translit_tokens
+
+# Поле запиту → назва індексу AddressBook
+FIELDS = {
+    'name': 'name',
+    'phone': 'phone',
+    'email': 'email',
+    'domain': 'domain',
+    'birthday': 'birthday',
+    'address': 'address',
+    'translit': 'translit',
+}
+
+_TOKEN = re.compile(r'[^\s()"]+:"[^"]*"|"[^"]*"|\(|\)|[^\s()]+')
+_OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+class QueryError(ValueError):
+    pass
+
+
+class Node:
+    # Множина імен-кандидатів за індексами або None, якщо індекс не застосовний
+    def candidates(self, indexes) -> Optional[Set[str]]:
+        return None
+
+    def cost(self, indexes) -> Optional[int]:
+        return None
+
+    def exact(self, indexes) -> bool:
+        """True, якщо candidates() — точна відповідь і перевіряти записи не треба."""
+        return False
+
+    def matches(self, contact, indexes) -> bool:
+        raise NotImplementedError
+
+
+class Term(Node):
+    def __init__(self, field: Optional[str], value: str):
+        self.prefix = value.endswith('*')
+        self.field = field
+        self.value = value.rstrip('*')
+        # Транслітерація слова запиту — один раз на запит, а не на кожен контакт
+        self.translit = "".join(translit_tokens(self.value)) if field is None else None
+
+    def _index(self, indexes):
+        return indexes.get(FIELDS.get(self.field)) if self.field else None
+
+    def candidates(self, indexes):
+        index = self._index(indexes)
+        if index is None:
+            return None
+        return index.prefix(self.value) if self.prefix else set(index.lookup(self.value))
+
+    def cost(self, indexes):
+        index = self._index(indexes)
+        return None if index is None else index.estimate(self.value, self.prefix)
+
+    def exact(self, indexes):
+        return self._index(indexes) is not None
+
+    def matches(self, contact, indexes):
+        index = self._index(indexes)
+        if index is not None:
+            return index.matches(contact, self.value, self.prefix)
+        value = self.value.lower()
+        # Вільний текст: підрядок в імені, телефоні чи email
+        translit = indexes.get('translit')
+        return (value in contact.name.value.lower()
+                or any(value in phone.value for phone in contact.phones)
+                or (contact.email is not None and value in contact.email.value.lower())
+                or (translit is not None and bool(self.translit) and translit.contains(contact._key, self.translit)))
+
+
+class And(Node):
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+    def _indexed(self, indexes):
+        costs = [(child.cost(indexes), child) for child in self.children]
+        return sorted(((cost, child) for cost, child in costs if cost is not None), key=lambda pair: pair[0])
+
+    def candidates(self, indexes):
+        result = None
+        for _, child in self._indexed(indexes):
+            names = child.candidates(indexes)
+            if names is None:
+                continue
+            result = names if result is None else result & names
+            if not result:
+                break
+        return result
+
+    def cost(self, indexes):
+        indexed = self._indexed(indexes)
+        return indexed[0][0] if indexed else None
+
+    def exact(self, indexes):
+        return all(child.exact(indexes) for child in self.children)
+
+    def matches(self, contact, indexes):
+        return all(child.matches(contact, indexes) for child in self.children)
+
+
+class Or(Node):
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+    def candidates(self, indexes):
+        result = set()
+        for child in self.children:
+            names = child.candidates(indexes)
+            if names is None:
+                return None
+            result |= names
+        return result
+
+    def cost(self, indexes):
+        costs = [child.cost(indexes) for child in self.children]
+        return None if None in costs else sum(costs)
+
+    def exact(self, indexes):
+        return all(child.exact(indexes) for child in self.children)
+
+    def matches(self, contact, indexes):
+        return any(child.matches(contact, indexes) for child in self.children)
+
+
+class Not(Node):
+    def __init__(self, child: Node):
+        self.child = child
+
+    def matches(self, contact, indexes):
+        return not self.child.matches(contact, indexes)
+
+
+def _term(token: str) -> Node:
+    field, sep, value = token.partition(':')
+    if sep and field.lower() in FIELDS:
+        value = value.strip('"')
+        if not value.rstrip('*'):
+            raise QueryError(f"Помилка в запиті: порожнє значення для поля '{field}'.")
+        if field.lower() == 'name':
+            # Ім'я — і як є, і в транслітерації
+            return Or([Term('name', value), Term('translit', value)])
+        return Term(field.lower(), value)
+    token = token.strip('"')
+    if token.endswith('*') and token.rstrip('*'):
+        # Слово з * — префікс імені (також у транслітерації), телефону (якщо є цифри) або email
+        terms = [Term('name', token), Term('translit', token), Term('email', token)]
+        if any(char.isdigit() for char in token):
+            terms.insert(2, Term('phone', token))
+        return Or(terms)
+    return Term(None, token)
+
+
+class _Parser:
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse_or(self) -> Node:
+        children = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self) -> Node:
+        children = [self.parse_not()]
+        while self.peek() not in (None, 'OR', ')'):
+            if self.peek() == 'AND':
+                self.take()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not(self) -> Node:
+        if self.peek() == 'NOT':
+            self.take()
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> Node:
+        token = self.peek()
+        if token is None or token in _OPERATORS or token == ')':
+            raise QueryError("Помилка в запиті: очікувалась умова пошуку.")
+        self.take()
+        if token == '(':
+            node = self.parse_or()
+            if self.peek() != ')':
+                raise QueryError("Помилка в запиті: не закрита дужка.")
+            self.take()
+            return node
+        return _term(token)
+
+
+def parse_query(text: str) -> Optional[Node]:
+    """Розбирає рядок запиту; порожній запит — None (усі контакти)."""
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return None
+    parser = _Parser(tokens)
+    node = parser.parse_or()
+    if parser.peek() is not None:
+        raise QueryError("Помилка в запиті: зайва закриваюча дужка.")
+    return node
+
+
+def execute(node: Optional[Node], records: Dict, indexes) -> List:
+    """Виконує розібраний запит над словником ім'я → контакт."""
+    if node is None:
+        return list(records.values())
+    names = node.candidates(indexes)
+    if names is None:
+        return [record for record in records.values() if node.matches(record, indexes)]
+    found = [records[name] for name in names]
+    if node.exact(indexes):
+        return found
+    return [record for record in found if node.matches(record, indexes)]
@@ -0,0 +1,204 @@
+"""Нагадування про дні народження для довгих сесій.
+
+BirthdayScheduler тримає мін-купу з найближчою датою привітання кожного
+контакту (з тим самим перенесенням з вихідних на понеділок, що й у
+birthdays). Фоновий потік спить на Condition до найранішого запису, тож
+у простої нічого не виконується; кожна подія та кожна зміна дня
+народження коштує O(log n).
+
+Планувальник під'єднується до AddressBook як вторинна структура
+(AddressBook.attach_index): книга сама повідомляє його про додавання,
+видалення та зміну контактів. Застарілі записи купи не видаляються, а
+пропускаються при вийманні (лінива інвалідація).
+
+З state_path планувальник пам'ятає, за який день народження кожного
+контакту вже нагадав, тож повторний запуск того ж дня не нагадує вдруге.
+"""
+import heapq
+import itertools
+import json
+import os
+import shlex
+import subprocess
+import threading
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _in_year(birthday: date, year: int) -> date:
+    try:
+        return birthday.replace(year=year)
+    except ValueError:
+        return date(year, 2, 28)  # 29.02 у невисокосний рік
+
+
+def next_birthday(birthday: date, start: date) -> date:
+    """Перший день народження не раніше start."""
+    occurrence = _in_year(birthday, start.year)
+    return occurrence if occurrence >= start else _in_year(birthday, start.year + 1)
+
+
+def congratulation_date(day: date) -> date:
+    """Перенесення з вихідних на наступний понеділок."""
+    weekday = day.weekday()
+    if weekday >= 5:
+        day += timedelta(days=7 - weekday)
+    return day
+
+
+def print_reminder(name: str, when: date, birthday: date) -> None:
+    shifted = "" if when == birthday else f" (день народження {birthday.strftime('%d.%m')})"
+    print(f"\nНагадування: {when.strftime('%d.%m.%Y')} привітати {name} з днем народження{shifted}.")
+
+
+class BirthdayScheduler:
+    def __init__(self, notify: Optional[Callable[[str, date, date], None]] = None, hook: Optional[str] = None,
+                 state_path: Optional[Path] = None, at: time = time(9, 0),
+                 clock: Callable[[], datetime] = datetime.now):
+        # Зовнішня команда; отримує ім'я та дату привітання (ISO) аргументами і замінює друк
+        self.hook = hook
+        self.notify = notify or (self._run_hook if hook else print_reminder)
+        # Файл з останнім днем народження, про який нагадано, для кожного контакту
+        self.state_path = state_path
+        self._fired: Dict[str, str] = self._load_fired()
+        self.at = at
+        self.clock = clock
+        # Запис: [момент привітання, порядковий номер, ім'я, дата народження, найближчий день народження]
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    # -- інтерфейс вторинної структури AddressBook --
+    def add_many(self, items):
+        with self._cond:
+            for name, contact in items:
+                self._schedule(name, contact)
+            self._cond.notify()
+
+    def update(self, name: str, contact):
+        with self._cond:
+            self._schedule(name, contact)
+            self._cond.notify()
+
+    def remove(self, name: str):
+        with self._cond:
+            self._entries.pop(name, None)
+
+    def remove_many(self, names):
+        with self._cond:
+            for name in names:
+                self._entries.pop(name, None)
+
+    def _schedule(self, name: str, contact):
+        birthday = contact.birthday.value if contact.birthday else None
+        current = self._entries.get(name)
+        if current is not None and current[3] == birthday:
+            return  # змінено інше поле — розклад той самий
+        self._entries.pop(name, None)
+        if birthday is None:
+            return
+        today = self.clock().date()
+        # День народження у минулі вихідні вітаємо сьогодні (у понеділок)
+        occurrence = next_birthday(birthday, today - timedelta(days=2))
+        if congratulation_date(occurrence) < today:
+            occurrence = next_birthday(birthday, occurrence + timedelta(days=1))
+        self._push(name, birthday, occurrence)
+
+    def _push(self, name: str, birthday: date, occurrence: date):
+        when = datetime.combine(congratulation_date(occurrence), self.at)
+        entry = [when, next(self._counter), name, birthday, occurrence]
+        self._entries[name] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # Забагато застарілих записів після змін — перебудовуємо купу
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+
+    # -- події --
+    def next_due(self) -> Optional[datetime]:
+        with self._cond:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        while self._heap and self._entries.get(self._heap[0][2]) is not self._heap[0]:
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Tuple[str, date, date]]:
+        """Виймає події, час яких настав (крім уже нагаданих), і ставить у купу наступний рік."""
+        with self._cond:
+            now = now or self.clock()
+            fired = []
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                when, _, name, birthday, occurrence = heapq.heappop(self._heap)
+                if self._fired.get(name) != occurrence.isoformat():
+                    fired.append((name, when.date(), occurrence))
+                    self._fired[name] = occurrence.isoformat()
+                self._push(name, birthday, next_birthday(birthday, occurrence + timedelta(days=1)))
+                self._drop_stale()
+            if fired:
+                self._save_fired()
+            return fired
+
+    def _fire(self, name: str, when: date, birthday: date):
+        try:
+            self.notify(name, when, birthday)
+        except Exception as e:
+            print(f"Помилка нагадування: {e}")
+
+    def _run_hook(self, name: str, when: date, birthday: date):
+        subprocess.run(shlex.split(self.hook) + [name, when.isoformat()], check=False)
+
+    # -- стан між запусками --
+    def _load_fired(self) -> Dict[str, str]:
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Помилка завантаження нагадувань: {e}")
+            return {}
+
+    def _save_fired(self):
+        if self.state_path is None:
+            return
+        tmp = self.state_path.with_name(self.state_path.name + '.tmp')
+        try:
+            with open(tmp, 'w', encoding='utf-8') as file:
+                json.dump(self._fired, file, ensure_ascii=False)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            print(f"Помилка збереження нагадувань: {e}")
+
+    # -- фоновий потік --
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                events = self.pop_due()
+                if not events:
+                    due = self._heap[0][0] if self._heap else None
+                    # Без подій чекаємо без тайм-ауту: розбудить зміна книги або stop()
+                    self._cond.wait(None if due is None else max(0.0, (due - self.clock()).total_seconds()))
+                    continue
+            for event in events:
+                self._fire(*event)
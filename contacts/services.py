@@ -15,19 +15,27 @@ def input_error(func: Callable) -> Callable:
             # Обробка помилок валідації
             if "Номер телефону має містити" in str(e) or "Не дійсний формат дати" in str(e) or "Некоректний формат email" in str(e) or "Дата народження не може бути" in str(e):
                 return f"Помилка валідації: {e}"
-            if "Старий номер телефону" in str(e) or "Поле" in str(e) or "Телефон має бути рядком" in str(e) or "Ім'я має бути рядком" in str(e):
+            if "Старий номер телефону" in str(e) or "Поле" in str(e) or "Телефон має бути рядком" in str(e) or "Ім'я має бути рядком" in str(e) or "Помилка в запиті" in str(e):
                 return str(e)
             
             command = func.__name__.replace('_', '-')
             return f"Не вистачає аргументів для {command}. Перевірте синтаксис."
         except KeyError as e:
-            return f"{e.args[0]} не знайдено."
+            # Другий аргумент — необов'язкова підказка (див. _not_found)
+            return f"{e.args[0]} не знайдено." + (e.args[1] if len(e.args) > 1 else "")
         except IndexError:
             return f"Не вистачає аргументів. Перевірте синтаксис."
         except Exception as e:
             return f"Сталася неочікувана помилка: {e}"
     return inner
 
+def _not_found(book: AddressBook, name: str) -> KeyError:
+    """KeyError для відсутнього імені; схожі імена іншою абеткою лише пропонуються, а не підставляються."""
+    similar = book.similar_names(name)
+    if similar:
+        return KeyError(name, f" Можливо, ви мали на увазі: {', '.join(similar)}?")
+    return KeyError(name)
+
 # ФУНКЦІЇ-ОБРОБНИКИ КОМАНД 
 # (Тут розміщено функції, які викликатимуться з main.py)
 
@@ -56,6 +64,8 @@ def add_contact(args: list[str], book: AddressBook) -> str:
         if birthday: record.edit_field('birthday', birthday)
         message = f"Контакт {name} оновлено."
 
+    if record.has_phone(phone):
+        return f"{message} Телефон {phone} вже є у контакті."
     record.add_phone(phone)
     return message
 
@@ -69,7 +79,7 @@ def change_contact(args: list[str], book: AddressBook) -> str:
     field = args[1].lower()
     record = book.find(name)
     
-    if not record: raise KeyError(name)
+    if not record: raise _not_found(book, name)
 
     if field == "phone":
         if len(args) != 4: raise IndexError("Для телефону: change [ім'я] phone [старий_тел] [новий_тел]")
@@ -86,8 +96,10 @@ def change_contact(args: list[str], book: AddressBook) -> str:
 
 @input_error
 def search_contacts(args: list[str], book: AddressBook) -> str:
-    """Здійснює пошук контактів за ім'ям, email або номером телефону. search [запит]"""
-    query = args[0]
+    """Здійснює пошук контактів. search [запит], напр. name:Іван* AND (domain:ukr.net OR birthday:03) NOT phone:050*"""
+    if len(args) < 1: raise IndexError
+
+    query = " ".join(args)
     results = book.search(query)
     if results:
         output = [f"Результати пошуку за '{query}' ({len(results)} збігів):"]
@@ -120,20 +132,30 @@ def show_contact_info(args: list[str], book: AddressBook) -> str:
     record = book.find(name)
     
     if not record:
-        raise KeyError(name)
+        raise _not_found(book, name)
     
     return str(record)
 
 @input_error
 def show_all(args: list[str], book: AddressBook) -> str:
-    """Виводить всі контакти в адресній книзі. show-all"""
+    """Виводить всі контакти в адресній книзі. show-all [--sort name|birthday]"""
     if not book.data:
         return "Адресна книга порожня."
+
+    records = book.data.values()
+    if args:
+        if len(args) != 2 or args[0] != "--sort":
+            return "Використання: show-all [--sort name|birthday]"
+        try:
+            # Порядок підтримується книгою при змінах — тут лише обхід
+            records = book.sorted_records(args[1].lower())
+        except ValueError as e:
+            return str(e)
     
     output = [f"Всього контактів: {len(book.data)}"]
     output.append("=" * 80)
     
-    for idx, (name, record) in enumerate(book.data.items(), 1):
+    for idx, record in enumerate(records, 1):
         output.append(f"{idx}. {record}")
     
     output.append("=" * 80)
@@ -148,7 +170,7 @@ def delete_contact(args: list[str], book: AddressBook) -> str:
     
     # Перевіримо, чи існує контакт
     if not book.find(name):
-        raise KeyError(name)
+        raise _not_found(book, name)
     
     return book.delete(name)
 
@@ -162,7 +184,51 @@ def add_birthday(args: list[str], book: AddressBook) -> str:
     
     record = book.find(name)
     if not record:
-        raise KeyError(name)
+        raise _not_found(book, name)
     
     record.edit_field('birthday', birthday)
     return f"День народження контакту '{name}' встановлено: {birthday}."
+
+@input_error
+def show_duplicates(args: list[str], book: AddressBook) -> str:
+    """Виводить групи ймовірних дублікатів. dupes"""
+    return _format_groups(book.find_duplicates())
+
+def _format_groups(groups) -> str:
+    if not groups:
+        return "Дублікатів не знайдено."
+    output = [f"Знайдено груп дублікатів: {len(groups)}"]
+    for idx, group in enumerate(groups, 1):
+        output.append(f"{idx}. " + ", ".join(record.name.value for record in group))
+    return "\n".join(output)
+
+@input_error
+def merge_contacts(args: list[str], book: AddressBook) -> str:
+    """Зливає контакти в перший зі списку. merge [ім'я] [ім'я] ... або merge #N ... (номери груп з dupes)
+
+    Без аргументів нічого не зливає — лише показує групи: вони транзитивні
+    (спільний телефон чи email), тож можуть зачепити різних людей.
+    """
+    if not args:
+        clusters = book.find_duplicates()
+        if not clusters:
+            return _format_groups(clusters)
+        return _format_groups(clusters) + "\nЩоб злити групу, введіть merge #N (номер групи) або merge [ім'я] [ім'я] ..."
+    if len(args) == 1 and not args[0].startswith("#"): raise IndexError
+
+    if all(arg.startswith("#") for arg in args):
+        clusters = book.find_duplicates()
+        groups = []
+        for arg in dict.fromkeys(args):
+            number = arg[1:]
+            if not number.isdigit() or not 1 <= int(number) <= len(clusters):
+                return f"Групи {arg} немає. Номери груп показує команда dupes."
+            groups.append([record.name.value for record in clusters[int(number) - 1]])
+    else:
+        keys = [record._key for record in map(book.find, args) if record is not None]
+        repeated = next((key for index, key in enumerate(keys) if key in keys[:index]), None)
+        if repeated is not None:
+            return f"Контакт '{repeated}' вказано кілька разів: контакт не можна злити з самим собою."
+        groups = [args]
+    merged = [book.merge(names).name.value for names in groups]
+    return f"Об'єднано контакти: {', '.join(merged)}."
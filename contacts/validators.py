@@ -1,5 +1,75 @@
 import re
-from datetime import datetime
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+# Шаблони компілюємо один раз, а не на кожен виклик
+_NON_DIGITS = re.compile(r'[^\d]')
+_EMAIL = re.compile(r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+')
+
+# Розмір LRU-кешу для повторюваних значень (спільні email, дати тощо)
+CACHE_SIZE = 4096
+
+_DATE_FORMAT_ERROR = "Не дійсний формат дати. Повинен бути 'ДД.ММ.РРРР'."
+
+# Сьогоднішня дата і момент наступної півночі: datetime.now() не викликаємо щоразу
+_today_cache = [None, 0.0]
+
+
+def _today() -> date:
+    now = time.time()
+    if now >= _today_cache[1]:
+        today = date.today()
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _today_cache[:] = [today, midnight.timestamp()]
+    return _today_cache[0]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _clean_phone(phone: str) -> str:
+    cleaned_phone = _NON_DIGITS.sub('', phone)
+    if not (10 <= len(cleaned_phone) <= 13):
+        raise ValueError(f"Номер телефону має містити від 10 до 13 цифр. Отримано: {len(cleaned_phone)}.")
+    return cleaned_phone
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _check_email(email: str) -> str:
+    if not _EMAIL.fullmatch(email):
+        raise ValueError("Некоректний формат email. Використовуйте user@domain.com.")
+    if '..' in email:
+        raise ValueError("Email не повинен містити послідовні крапки (..).")
+    domain = email.split('@')[1]
+    if domain.startswith('.') or domain.endswith('.'):
+        raise ValueError("Доменна частина не може починатися або закінчуватися крапкою.")
+    return email
+
+
+def _is_number(part: str, min_len: int, max_len: int) -> bool:
+    return min_len <= len(part) <= max_len and part.isascii() and part.isdigit()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_date(date_str: str) -> date:
+    # Ручний розбір ДД.ММ.РРРР замість повільного datetime.strptime
+    parts = date_str.split('.')
+    if len(parts) != 3:
+        raise ValueError(_DATE_FORMAT_ERROR)
+    day, month, year = parts
+    if not (_is_number(day, 1, 2) and _is_number(month, 1, 2) and _is_number(year, 4, 4)):
+        raise ValueError(_DATE_FORMAT_ERROR)
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        raise ValueError(_DATE_FORMAT_ERROR)
+
+
+def clear_caches():
+    """Скидає LRU-кеші валідаторів (для тестів і вимірювань з холодним кешем)."""
+    for cached in (_clean_phone, _check_email, _parse_date):
+        cached.cache_clear()
+
 
 class ContactValidator:
     # Містить статичні методи для валідації полів контакту.
@@ -9,48 +79,51 @@ class ContactValidator:
         """Перевірка номера телефону: 10-13 цифр, без букв."""
         if not isinstance(phone, str):
             raise TypeError("Телефон має бути рядком.")
-        
-        # Видаляємо всі символи, крім цифр
-        cleaned_phone = re.sub(r'[^\d]', '', phone)
-
-        # Вимога: від 10 до 13 цифр (включно)
-        if not (10 <= len(cleaned_phone) <= 13):
-            raise ValueError(f"Номер телефону має містити від 10 до 13 цифр. Отримано: {len(cleaned_phone)}.")
-        return cleaned_phone
+        return _clean_phone(phone)
 
     @staticmethod
     def validate_email(email: str) -> str:
         # Перевірка формату email (використовуючи re).
         if not isinstance(email, str):
             raise TypeError("Email має бути рядком.")
-        # Базова валідація структури email
-        if not re.fullmatch(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$', email):
-            raise ValueError("Некоректний формат email. Використовуйте user@domain.com.")
-
-        # Додаткова перевірка: заборона послідовних крапок
-        if '..' in email:
-            raise ValueError("Email не повинен містити послідовні крапки (..).")
-
-        # Перевірка доменної частини: не повинна починатися або закінчуватися крапкою
-        domain = email.split('@')[1]
-        if domain.startswith('.') or domain.endswith('.'):
-            raise ValueError("Доменна частина не може починатися або закінчуватися крапкою.")
-
-        return email
+        return _check_email(email)
 
     @staticmethod
-    def validate_birthday(date_str: str) -> datetime.date:
-        # Перевірка формату дати народження: ДД.ММ.РРРР. 
+    def validate_birthday(date_str: str, today: Optional[date] = None) -> date:
+        # Перевірка формату дати народження: ДД.ММ.РРРР.
         if not isinstance(date_str, str):
             raise TypeError("Дата народження має бути рядком у форматі ДД.ММ.РРРР.")
-        try:
-            date_obj = datetime.strptime(date_str, "%d.%m.%Y").date()
-            if date_obj > datetime.now().date():
-                raise ValueError("Дата народження не може бути у майбутньому.")
-            return date_obj
-        except ValueError as e:
-            if "not in range" in str(e) or "unconverted data remains" in str(e):
-                raise ValueError("Не дійсний формат дати. Повинен бути 'ДД.ММ.РРРР'.")
-            raise e
-        
-        
\ No newline at end of file
+        date_obj = _parse_date(date_str)
+        if date_obj > (today or _today()):
+            raise ValueError("Дата народження не може бути у майбутньому.")
+        return date_obj
+
+    @staticmethod
+    def validate_many(field: str, values) -> list:
+        """Пакетна валідація значень одного поля ('phone', 'email', 'birthday').
+
+        Кожне різне значення перевіряється один раз на пакет (незалежно від
+        LRU-кешу), а сьогоднішня дата для днів народження береться один раз.
+        Повертає список нормалізованих значень; на першому некоректному
+        значенні кидає ту саму помилку, що й поодинокий валідатор.
+        """
+        validate = _VALIDATORS[field]
+        if field == 'birthday':
+            today = _today()
+            validate = lambda value: ContactValidator.validate_birthday(value, today)
+        checked = {}
+        result = []
+        for value in values:
+            # Нерядок (зокрема нехешоване значення) — та сама TypeError, що й поодинці
+            normalized = checked[value] if isinstance(value, str) and value in checked else None
+            if normalized is None:
+                normalized = checked[value] = validate(value)
+            result.append(normalized)
+        return result
+
+
+_VALIDATORS = {
+    'phone': ContactValidator.validate_phone,
+    'email': ContactValidator.validate_email,
+    'birthday': ContactValidator.validate_birthday,
+}
@@ -1,4 +1,5 @@
 from .models import Note
+from .search import NoteMatch
 from .services import NoteService
 
-__all__ = ['Note', 'NoteService']
\ No newline at end of file
+__all__ = ['Note', 'NoteMatch', 'NoteService']
\ No newline at end of file
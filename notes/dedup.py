@@ -0,0 +1,153 @@
+"""Пошук майже однакових нотаток: MinHash + LSH.
+
+Текст (без урахування регістру й зайвих пробілів) розбивається на
+символьні k-грами — шинґли. Підпис рахується однією хеш-функцією (one
+permutation hashing): хеш шинґла за старшими бітами потрапляє в один із
+SIGNATURE_SIZE кошиків, і кошик запам'ятовує мінімум; порожні кошики
+беруть значення найближчого непорожнього (densification). Тож підпис
+коштує O(кількості шинґлів), а не O(шинґли × перестановки).
+
+Підпис ділиться на BANDS смуг по ROWS значень. Нотатки з однаковою
+смугою потрапляють в один кошик LSH і стають кандидатами; лише їх
+порівнюємо за часткою однакових значень підпису (оцінка подібності
+Жаккара). Пошук кластерів майже лінійний за кількістю нотаток, а індекс
+оновлюється інкрементно при створенні, зміні та видаленні.
+"""
+import zlib
+from array import array
+from collections import deque
+from typing import Dict, List
+
+from utils.disjointset import DisjointSet
+
+SHINGLE = 5
+BANDS = 8
+ROWS = 4
+SIGNATURE_SIZE = BANDS * ROWS  # 32 кошики = старші 5 біт хешу
+DEFAULT_THRESHOLD = 0.7
+# Скільки груп кошика LSH перевіряємо для кожної нотатки: обмежує роботу в «гарячих» кошиках
+MAX_REPRESENTATIVES = 32
+
+_BIN_SHIFT = 27
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+_EMPTY = _VALUE_MASK + 1
+# Мультиплікативне перемішування: старші біти залежать від усіх бітів crc32
+_MIX = 0x9E3779B1
+
+# Підпис — SIGNATURE_SIZE чисел uint32, упакованих у bytes (компактно й хешовано)
+Signature = bytes
+
+
+def shingle_hashes(text: str) -> set:
+    # UTF-32: кожен символ — 4 байти, тож зрізи байтів є символьними k-грамами
+    data = " ".join(text.casefold().split()).encode("utf-32-le")
+    width = 4 * SHINGLE
+    if len(data) <= width:
+        return {(zlib.crc32(data) * _MIX) & 0xFFFFFFFF}
+    crc32 = zlib.crc32
+    return {(crc32(data[i:i + width]) * _MIX) & 0xFFFFFFFF for i in range(0, len(data) - width + 4, 4)}
+
+
+def signature(hashes) -> Signature:
+    values = [_EMPTY] * SIGNATURE_SIZE
+    for value in hashes:
+        slot = value >> _BIN_SHIFT
+        value &= _VALUE_MASK
+        if value < values[slot]:
+            values[slot] = value
+    if _EMPTY in values:
+        filled = list(values)
+        for slot in range(SIGNATURE_SIZE):
+            if filled[slot] != _EMPTY:
+                continue
+            # Беремо значення наступного непорожнього кошика зі зсувом за відстанню
+            for step in range(1, SIGNATURE_SIZE):
+                source = filled[(slot + step) % SIGNATURE_SIZE]
+                if source != _EMPTY:
+                    values[slot] = source + step * _EMPTY
+                    break
+    return array('I', values).tobytes()
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    return sum(x == y for x, y in zip(memoryview(a).cast('I'), memoryview(b).cast('I'))) / SIGNATURE_SIZE
+
+
+class NoteDuplicateIndex:
+    def __init__(self):
+        self._signatures: Dict[str, Signature] = {}
+        # Кошик смуги: один id (рядок) або множина id — одиночки не тримають множину
+        self._bands: List[Dict[int, object]] = [{} for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    @staticmethod
+    def _band_keys(sig: Signature):
+        for band in range(BANDS):
+            yield band, hash(sig[band * ROWS * 4:(band + 1) * ROWS * 4])
+
+    def add(self, note_id: str, text: str):
+        """Додає або оновлює нотатку; якщо підпис не змінився, нічого не робить."""
+        sig = signature(shingle_hashes(text))
+        old = self._signatures.get(note_id)
+        if old == sig:
+            return
+        if old is not None:
+            self.remove(note_id)
+        self._signatures[note_id] = sig
+        for band, key in self._band_keys(sig):
+            buckets = self._bands[band]
+            members = buckets.get(key)
+            if members is None:
+                buckets[key] = note_id
+            elif isinstance(members, set):
+                members.add(note_id)
+            else:
+                buckets[key] = {members, note_id}
+
+    def remove(self, note_id: str):
+        sig = self._signatures.pop(note_id, None)
+        if sig is None:
+            return
+        for band, key in self._band_keys(sig):
+            buckets = self._bands[band]
+            members = buckets[key]
+            if isinstance(members, set):
+                members.discard(note_id)
+                if len(members) == 1:
+                    buckets[key] = next(iter(members))
+            else:
+                del buckets[key]
+
+    def clusters(self, threshold: float = DEFAULT_THRESHOLD) -> List[List[str]]:
+        """Групи id з оцінкою подібності не менше threshold (у порядку додавання)."""
+        ids = list(self._signatures)
+        position = {note_id: index for index, note_id in enumerate(ids)}
+        sets = DisjointSet()
+        for _ in ids:
+            sets.add()
+        signatures = self._signatures
+        for buckets in self._bands:
+            for members in buckets.values():
+                if not isinstance(members, set):
+                    continue
+                # Порівнюємо з представниками останніх знайдених груп кошика, а не попарно;
+                # справжні дублікати майже напевно зустрінуться ще й в інших смугах
+                representatives = deque(maxlen=MAX_REPRESENTATIVES)
+                for note_id in sorted(members, key=position.get):
+                    sig = signatures[note_id]
+                    for other in representatives:
+                        if similarity(sig, signatures[other]) >= threshold:
+                            sets.union(position[note_id], position[other])
+                            break
+                    else:
+                        representatives.append(note_id)
+        groups: Dict[int, List[str]] = {}
+        for index, note_id in enumerate(ids):
+            if sets.size[sets.find(index)] > 1:
+                groups.setdefault(sets.find(index), []).append(note_id)
+        return list(groups.values())
+
+    def score(self, a: str, b: str) -> float:
+        return similarity(self._signatures[a], self._signatures[b])
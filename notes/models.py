@@ -1,10 +1,84 @@
+import sys
+import uuid
+
+from utils.normalize import canonical
+
+
 class Note:
-    def __init__(self, text, tags = None):
+    def __init__(self, text, tags = None, note_id = None):
         if not text.strip():
             raise ValueError("Нотатка не може бути порожньою!")
         
+        # Стабільний ідентифікатор — за ним зливаються зміни різних процесів
+        self.id = note_id or uuid.uuid4().hex
+        self._store = None
+        self._rendered = None
         self.text = text.strip()
         self.tags = tags if tags is not None else []
+        # Сервіс, що містить нотатку (для відстеження змін)
+        self._service = None
+        self._dirty = False
+
+    @classmethod
+    def mapped(cls, note_id, tags, store):
+        """Нотатка, текст якої читається ліниво з MappedNoteStore."""
+        note = cls.__new__(cls)
+        note.id = note_id
+        note._rendered = None
+        note.tags = tags
+        note._text = None
+        note._store = store
+        note._service = None
+        note._dirty = False
+        return note
+
+    @property
+    def text(self):
+        text = self._text  # читаємо один раз: фоновий запис може звільнити текст
+        if text is None:
+            return self._store.read_text(self.id)
+        return text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._rendered = None
+
+    @property
+    def tags(self):
+        return self._tags
+
+    @tags.setter
+    def tags(self, value):
+        # Теги інтернуються: однаковий тег у різних нотатках — один рядок у пам'яті
+        self._tags = [sys.intern(tag) for tag in value]
+        self._tag_keys = tuple(canonical(tag) for tag in self._tags)
+        self._rendered = None
+
+    @property
+    def tag_keys(self):
+        """Канонічні (casefold) форми тегів — для порівнянь без повторного lower()."""
+        return self._tag_keys
+
+    def release_text(self):
+        """Після збереження в MappedNoteStore текст більше не тримаємо в пам'яті."""
+        if self._store is not None:
+            self._text = None
+            self._rendered = None
+
+    def __str__(self):
+        """Рядок для списку нотаток; кешується до зміни тексту чи тегів.
+
+        Текст, який лежить лише в MappedNoteStore, не кешується: інакше один
+        note-list тримав би в пам'яті всі тексти до наступного збереження.
+        """
+        if self._rendered is not None:
+            return self._rendered
+        tags_part = f" [теги: {', '.join(self.tags)}]" if self.tags else ""
+        rendered = f"{self.text}{tags_part}"
+        if self._text is not None:
+            self._rendered = rendered
+        return rendered
 
     def edit(self, new_text=None, new_tags=None):
         if new_text is not None:
@@ -15,12 +89,17 @@ class Note:
         if new_tags is not None:
             self.tags = new_tags
 
+        self._dirty = True
+        if self._service is not None:
+            self._service._note_changed(self)
+
     def to_dict(self):
         return {
+            "id": self.id,
             "text": self.text,
             "tags": self.tags
         }
     
     @staticmethod
     def from_dict(data: dict):
-        return Note(text = data["text"], tags = data.get("tags", []))
\ No newline at end of file
+        return Note(text = data["text"], tags = data.get("tags", []), note_id = data.get("id"))
\ No newline at end of file
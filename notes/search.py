@@ -0,0 +1,88 @@
+"""Пошук у нотатках з позиціями збігів і короткими фрагментами для виводу.
+
+find_spans() повертає позиції ключових слів у тексті (ті самі проходи,
+що й перевірка збігу), а snippet() вирізає обмежені фрагменти навколо
+них із підсвіткою. Тож вивід результатів пропорційний кількості збігів,
+а не довжині нотаток.
+"""
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+Span = Tuple[int, int]
+
+
+class NoteMatch(NamedTuple):
+    note: object
+    spans: List[Span]  # відсортовані позиції збігів без перекриттів
+
+
+def compile_keywords(keywords: Iterable[str]) -> List[re.Pattern]:
+    return [re.compile(re.escape(word), re.IGNORECASE) for word in keywords]
+
+
+def _merge(spans: List[Span]) -> List[Span]:
+    merged: List[Span] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def find_spans(text: str, patterns: List[re.Pattern]) -> Optional[List[Span]]:
+    """Позиції всіх ключових слів або None, якщо хоч одного слова в тексті немає."""
+    spans: List[Span] = []
+    for pattern in patterns:
+        found = [match.span() for match in pattern.finditer(text)]
+        if not found:
+            return None
+        spans.extend(found)
+    return _merge(spans)
+
+
+def _flat(text: str) -> str:
+    return " ".join(text.split())
+
+
+def snippet(text: str, spans: List[Span], width: int = 40, limit: int = 3,
+            mark: Tuple[str, str] = ("«", "»")) -> str:
+    """До limit фрагментів навколо збігів (до width символів з кожного боку),
+    збіги обрамлені mark. Сусідні збіги зливаються у фрагмент до 4 * width.
+
+    Без збігів (пошук лише за тегами) — початок нотатки.
+    """
+    if not spans:
+        end = min(len(text), 2 * width)
+        return _flat(text[:end]) + ("…" if end < len(text) else "")
+    windows = []
+    shown = 0
+    for start, end in spans:
+        low, high = max(0, start - width), min(len(text), end + width)
+        if windows and low <= windows[-1][1] and high - windows[-1][0] <= 4 * width:
+            windows[-1][1] = max(windows[-1][1], high)
+            windows[-1][2].append((start, end))
+        elif len(windows) < limit:
+            if windows and low < windows[-1][1]:
+                # Фрагменти не перекриваються: попередній закінчується там, де почнеться новий
+                low = windows[-1][1] = max(windows[-1][2][-1][1], min(start, windows[-1][1]))
+            windows.append([low, high, [(start, end)]])
+        else:
+            break
+        shown += 1
+    pieces = []
+    previous = 0
+    for low, high, hits in windows:
+        if low > previous:
+            pieces.append("… " if pieces else "…")
+        position = low
+        for start, end in hits:
+            pieces += [text[position:start], mark[0], text[start:end], mark[1]]
+            position = end
+        pieces.append(text[position:high])
+        previous = high
+    if previous < len(text):
+        pieces.append("…")
+    if shown < len(spans):
+        pieces.append(f" (ще збігів: {len(spans) - shown})")
+    return _flat("".join(pieces))
@@ -1,44 +1,406 @@
-import json
-import os
+from collections import deque
+from pathlib import Path
+
+from .dedup import DEFAULT_THRESHOLD, NoteDuplicateIndex
 from .models import Note
+from .search import NoteMatch, compile_keywords, find_spans
+from storage.binary import NoteCodec
+from storage.notestore import MappedNoteStore
+from storage.pipeline import Job
+from storage.repo import Repository
+from utils.bulk import BulkResult
+from utils.cache import ResultCache
+from utils.locks import RWLock, reader, writer
+from utils.normalize import canonical
+from utils.sortedlist import SortedView
+from utils.trie import COMPLETION_LIMIT, Trie
+
+# Скільки символів тексту входить у ключ сортування (повний текст у ключі не тримаємо)
+TEXT_ORDER_LENGTH = 64
+
+
+def text_order(note):
+    return (note.text[:TEXT_ORDER_LENGTH].casefold(),)
+
+
+def tag_order(note):
+    # За відсортованими тегами; нотатки без тегів — в кінці
+    keys = tuple(sorted(note.tag_keys))
+    return (0, keys) if keys else (1,)
+
+
+NOTE_ORDERS = {"text": text_order, "tag": tag_order}
 
 
 class NoteService:
-    def __init__(self, filename="notes.json"):
+    def __init__(self, filename="notes.json", thread_safe=False, binary=False, mapped=False, search_cache=256):
+        # thread_safe=True: пошук і читання паралельні, зміни серіалізуються
+        self._lock = RWLock() if thread_safe else None
         self.filename = filename
+        path = Path(filename)
+        # binary=True: знімок у компактному бінарному форматі (storage.binary)
+        codec = NoteCodec if binary else None
+        self.repo = Repository(path.name, storage_dir=path.parent, key="id", codec=codec)
+        # mapped=True: тексти у файлі даних через mmap, у пам'яті лише метадані
+        self.store = MappedNoteStore(path.with_suffix("")) if mapped else None
+        # pipeline (storage.pipeline.BackgroundPipeline): save() лише ставить запис у чергу
+        self.pipeline = None
+        self._completed = deque()
+        # history (storage.history.HistoryStore): збережені зміни потрапляють в історію версій
+        self.history = None
+        # Кеш результатів пошуку; покоління зростає при кожній зміні нотаток
+        self._generation = 0
+        self._results = ResultCache(search_cache)
         self.notes = self.load()
 
     # -- FILE OPERATIONS --
     def load(self):
-        if not os.path.exists(self.filename):
-            return []
-
-        try:
-            with open(self.filename, "r", encoding="utf-8") as file:
-                data = json.load(file)
-                return [Note.from_dict(note) for note in data]
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+        self._generation += 1
+        self._changed = {}  # id -> нотатка, змінена після останнього збереження
+        self._removed = set()
+        self._inflight = {}  # id -> нотатка (None — видалення) у фоновому записі
+        # Індекс майже однакових нотаток будується при першому find_duplicates(),
+        # далі оновлюється інкрементно; після чужих змін — перебудовується
+        self._dedup = None
+        # Префіксне дерево тегів для автодоповнення — так само ліниве й інкрементне
+        self._tags = None
+        self._note_tags = {}  # id -> канонічні теги нотатки, уже внесені в дерево
+        # Впорядковані види (note-list --sort) — створюються при першому запиті
+        self._orders = {}
+        if self.store is None:
+            return [self._adopt(note) for note in self.repo.load(Note.from_dict)]
+        if not self.store.exists() and self.repo.has_data():
+            # Перший запуск у режимі mmap: переносимо нотатки зі звичайного файлу
+            records = self.repo.load()
+            self.store.commit([(data["id"], data["text"], data["tags"]) for data in records], [])
+        entries = self.store.load()
+        return [self._adopt(Note.mapped(note_id, entry.tags, self.store)) for note_id, entry in entries.items()]
 
+    @writer
     def save(self):
-        with open(self.filename, "w", encoding="utf-8") as file:
-            json.dump(
-                [note.to_dict() for note in self.notes],
-                file,
-                ensure_ascii=False,
-                indent=4
-            )
+        """Записує лише змінені, додані та видалені нотатки і підтягує чужі зміни.
+
+        Якщо задано pipeline, зміни лише ставляться в чергу фонового запису.
+        """
+        if self.pipeline is not None:
+            self.pipeline.submit("notes", self._save_job())
+            return True
+        upserts, deletes = self.changes()
+        saved = True
+        if upserts or deletes:
+            records = [note.to_dict() for note in upserts]
+            if self.store is not None:
+                saved = self.store.commit([(data["id"], data["text"], data["tags"]) for data in records], deletes)
+            else:
+                saved = self.repo.append(records, deletes)
+            if saved and self.history is not None:
+                self.history.stage("notes", records, deletes, key="id")
+        if saved:
+            for note in upserts:
+                note.release_text()
+        self.refresh()
+        if saved:
+            self.clear_changes()
+        return saved
+
+    def compact(self) -> bool:
+        """При виході вносить журнал змін у файл нотаток (у режимі mmap сховище стискається само)."""
+        return self.repo.compact() if self.store is None else True
+
+    @reader
+    def export_json(self, path):
+        return self.repo.export_json([note.to_dict() for note in self.notes], path)
+
+    def _save_job(self):
+        upserts, deletes = self.changes()
+        if not upserts and not deletes:
+            return None
+        self._inflight.update({note.id: note for note in upserts})
+        self._inflight.update(dict.fromkeys(deletes))
+        self._changed.clear()
+        self._removed.clear()
+        records = [note.to_dict() for note in upserts]
+        if self.history is not None:
+            self.history.stage("notes", records, deletes, key="id")
+        if self.store is not None:
+            payload = [(data["id"], data["text"], data["tags"]) for data in records]
+            run = lambda: self.store.commit(payload, deletes)
+        else:
+            run = lambda: self.repo.append(records, deletes)
+        return Job('delta', run, lambda ok: self._completed.append((upserts, deletes, ok)))
+
+    def _end_saves(self):
+        # Результати фонових записів (викликається під блокуванням запису)
+        while self._completed:
+            upserts, deletes, ok = self._completed.popleft()
+            for note in upserts:
+                self._inflight.pop(note.id, None)
+                if note.id in self._changed or note.id in self._removed:
+                    continue
+                if ok:
+                    note._dirty = False
+                    note.release_text()
+                elif note._service is self:
+                    self._changed[note.id] = note
+            for note_id in deletes:
+                self._inflight.pop(note_id, None)
+                if not ok and note_id not in self._changed:
+                    self._removed.add(note_id)
+
+    @writer
+    def refresh(self):
+        """Підтягує зміни інших процесів; без змін на диску коштує один stat."""
+        self._end_saves()
+        if self.store is not None:
+            if not self.store.poll():
+                return False
+            self._reload_mapped()
+            self._drop_indexes()
+            return True
+        changes = self.repo.poll()
+        if changes is None:
+            return False
+        self._merge_external(changes.upserts, changes.deletes, changes.reset)
+        self._drop_indexes()
+        return True
+
+    def _merge_external(self, records, deleted, reset):
+        # Нотатки з незбереженими локальними змінами мають пріоритет
+        pending = self._changed.keys() | self._removed | self._inflight.keys()
+        remote = {data["id"]: data for data in records}
+        if reset:
+            deleted = [note.id for note in self.notes if note.id not in remote]
+        deleted = set(deleted) - pending
+        notes = []
+        for note in self.notes:
+            if note.id in deleted:
+                continue
+            data = remote.pop(note.id, None)
+            if data is not None and note.id not in pending and note.to_dict() != data:
+                note = self._adopt(Note.from_dict(data))
+            notes.append(note)
+        for note_id, data in remote.items():
+            if note_id not in pending:
+                notes.append(self._adopt(Note.from_dict(data)))
+        self.notes = notes
+
+    def _reload_mapped(self):
+        # Індекс уже перечитано; нотатки лишаються лінивими, тексти не читаємо
+        current = {note.id: note for note in self.notes}
+        notes = []
+        local = {note_id: note for note_id, note in self._inflight.items() if note is not None}
+        local.update(self._changed)
+        removed = self._removed | {note_id for note_id, note in self._inflight.items() if note is None}
+        for note_id, entry in self.store.entries.items():
+            if note_id in removed:
+                continue
+            note = current.get(note_id)
+            if note is None:
+                note = self._adopt(Note.mapped(note_id, entry.tags, self.store))
+            elif note_id not in local:
+                # Присвоєння тегів також скидає кешований рядок (текст міг змінитися)
+                note.tags = entry.tags
+            notes.append(note)
+        notes.extend(note for note_id, note in local.items() if note_id not in self.store.entries)
+        self.notes = notes
+
+    def _adopt(self, note):
+        note._service = self
+        note._store = self.store
+        return note
+
+    # -- CHANGE TRACKING --
+    @writer
+    def _note_changed(self, note):
+        self._changed[note.id] = note
+        self._index(note)
+
+    def _index(self, note):
+        self._generation += 1
+        if self._dedup is not None:
+            self._dedup.add(note.id, note.text)
+        if self._tags is not None:
+            self._retag(note.id, note.tag_keys)
+        for view in self._orders.values():
+            view.update(note.id, note)
+
+    def _unindex(self, note_id):
+        self._generation += 1
+        if self._dedup is not None:
+            self._dedup.remove(note_id)
+        if self._tags is not None:
+            self._retag(note_id, ())
+        for view in self._orders.values():
+            view.remove(note_id)
+
+    def _retag(self, note_id, keys):
+        old = self._note_tags.get(note_id, ())
+        if old == keys:
+            return
+        if keys:
+            self._note_tags[note_id] = keys
+        else:
+            del self._note_tags[note_id]
+        for key in old:
+            self._tags.discard(key)
+        for key in keys:
+            self._tags.add(key)
+
+    def _drop_indexes(self):
+        # Після чужих змін або відновлення індекси будуються заново при потребі
+        self._generation += 1
+        self._dedup = None
+        self._tags = None
+        self._note_tags = {}
+        self._orders = {}
+
+    @reader
+    def changes(self):
+        """Нотатки, змінені або додані після збереження, та id видалених."""
+        return list(self._changed.values()), list(self._removed)
+
+    @writer
+    def clear_changes(self):
+        for note in self._changed.values():
+            note._dirty = False
+        self._changed.clear()
+        self._removed.clear()
 
     # -- CRUD --
+    @writer
     def create(self, text, tags=None):
-        note = Note(text, tags)
+        note = self._adopt(Note(text, tags))
         self.notes.append(note)
+        self._changed[note.id] = note
+        self._index(note)
         self.save()
         return note
 
+    # -- BULK --
+    # Одне блокування і одне save() на всю пачку; підсумок — BulkResult замість рядків
+    @staticmethod
+    def _build(records):
+        notes, errors = [], []
+        for record in records:
+            try:
+                notes.append(Note.from_dict(record))
+            except KeyError:
+                errors.append((str(record.get("id") or ""), "Нотатка не може бути порожньою!"))
+            except (AttributeError, TypeError, ValueError) as e:
+                errors.append((str(record.get("id") or ""), str(e)))
+        return notes, errors
+
+    def _add(self, notes):
+        for note in notes:
+            self._adopt(note)
+            self._changed[note.id] = note
+            self._index(note)
+        self.notes.extend(notes)
+
+    @writer
+    def add_many(self, records):
+        """Додає нотатки зі словників {"text", "tags"[, "id"]}; наявні id пропускаються."""
+        notes, errors = self._build(records)
+        existing = {note.id for note in self.notes}
+        added, skipped = [], []
+        for note in notes:
+            if note.id in existing:
+                skipped.append(note.id)
+            else:
+                existing.add(note.id)
+                added.append(note)
+        self._add(added)
+        if added:
+            self.save()
+        return BulkResult(added=len(added), skipped=tuple(skipped), errors=tuple(errors))
+
+    @writer
+    def upsert_many(self, records):
+        """Додає нові нотатки й замінює текст і теги наявних з тим самим id."""
+        notes, errors = self._build(records)
+        current = {note.id: note for note in self.notes}
+        added, skipped = [], []
+        updated = 0
+        for note in notes:
+            existing = current.get(note.id)
+            if existing is None:
+                current[note.id] = note
+                added.append(note)
+            elif existing.text == note.text and existing.tags == note.tags:
+                skipped.append(note.id)
+            else:
+                existing.edit(new_text=note.text, new_tags=note.tags)
+                updated += 1
+        self._add(added)
+        if added or updated:
+            self.save()
+        return BulkResult(added=len(added), updated=updated, skipped=tuple(skipped), errors=tuple(errors))
+
+    @writer
+    def delete_many(self, note_ids):
+        """Видаляє нотатки за id одним проходом по списку."""
+        wanted = set(note_ids)
+        kept, deleted = [], 0
+        for note in self.notes:
+            if note.id in wanted:
+                wanted.discard(note.id)
+                note._service = None
+                self._changed.pop(note.id, None)
+                self._removed.add(note.id)
+                self._unindex(note.id)
+                deleted += 1
+            else:
+                kept.append(note)
+        self.notes = kept
+        if deleted:
+            self.save()
+        return BulkResult(deleted=deleted, skipped=tuple(wanted))
+
+    @writer
+    def update_many(self, changes):
+        """Змінює нотатки: id → {"text": ..., "tags": [...]} (будь-яке з полів)."""
+        current = {note.id: note for note in self.notes}
+        updated, skipped, errors = 0, [], []
+        for note_id, fields in changes.items():
+            note = current.get(note_id)
+            if note is None:
+                skipped.append(note_id)
+                continue
+            try:
+                note.edit(new_text=fields.get("text"), new_tags=fields.get("tags"))
+            except ValueError as e:
+                errors.append((note_id, str(e)))
+                continue
+            updated += 1
+        if updated:
+            self.save()
+        return BulkResult(updated=updated, skipped=tuple(skipped), errors=tuple(errors))
+
+    @writer
+    def restore_records(self, records):
+        """Замінює нотатки станом з історії (id → словник) як звичайні зміни і зберігає."""
+        current = {note.id: note for note in self.notes}
+        notes = []
+        for note_id, data in records.items():
+            note = current.pop(note_id, None)
+            if note is None or note.to_dict() != data:
+                note = self._adopt(Note.from_dict(data))
+                self._changed[note_id] = note
+                self._removed.discard(note_id)
+            notes.append(note)
+        for note_id, note in current.items():
+            note._service = None
+            self._changed.pop(note_id, None)
+            self._removed.add(note_id)
+        self.notes = notes
+        self._drop_indexes()
+        self.save()
+
+    @reader
     def read(self):
-        return self.notes
+        return list(self.notes)
 
+    @writer
     def update(self, index, new_text=None, new_tags=None):
         if not (0 <= index < len(self.notes)):
             raise IndexError("Нотатки з таким індексом не існує!")
@@ -46,42 +408,91 @@ class NoteService:
         self.notes[index].edit(new_text=new_text, new_tags=new_tags)
         self.save()
 
+    @writer
     def delete(self, index):
         if not (0 <= index < len(self.notes)):
             raise IndexError("Нотатки з таким індексом не існує!")
 
-        del self.notes[index]
+        note = self.notes.pop(index)
+        note._service = None
+        self._changed.pop(note.id, None)
+        self._removed.add(note.id)
+        self._unindex(note.id)
         self.save()
 
     # -- SEARCH --
+    @reader
     def search(self, keywords=None, tags=None):
-        results = []
+        return [match.note for match in self.search_matches(keywords, tags)]
 
-        for note in self.notes:
-            text_match = True
-            tags_match = True
+    @reader
+    def search_matches(self, keywords=None, tags=None):
+        """Як search(), але з позиціями ключових слів у тексті (NoteMatch).
 
-            if keywords:
-                text_match = all(word.lower() in note.text.lower() for word in keywords)
+        Повторний запит без змін у нотатках береться з кешу результатів.
+        """
+        wanted = {canonical(tag) for tag in tags} if tags else None
+        key = (tuple(sorted({word.lower() for word in keywords or []})),
+               tuple(sorted(wanted)) if wanted is not None else None)
+        cached = self._results.get(key, self._generation)
+        if cached is not None:
+            return list(cached)
+        patterns = compile_keywords(keywords or [])
+        results = []
+        for note in self.notes:
+            # Теги перевіряємо першими: текст (можливо, з mmap) читаємо лише за потреби
+            if wanted is not None and wanted.isdisjoint(note.tag_keys):
+                continue
+            spans = find_spans(note.text, patterns) if patterns else []
+            if spans is not None:
+                results.append(NoteMatch(note, spans))
+        self._results.put(key, self._generation, results)
+        return list(results)
 
-            if tags:
-                tags_match = any(tag.lower() in [t.lower() for t in note.tags] for tag in tags)
+    def cache_stats(self):
+        """Влучання й промахи кешу результатів пошуку (utils.cache.CacheStats)."""
+        return self._results.stats()
 
-            if text_match and tags_match:
-                results.append(note)
+    @writer
+    def find_duplicates(self, threshold=DEFAULT_THRESHOLD):
+        """Групи майже однакових нотаток (оцінка подібності не менше threshold)."""
+        if self._dedup is None:
+            self._dedup = NoteDuplicateIndex()
+            for note in self.notes:
+                self._dedup.add(note.id, note.text)
+        by_id = {note.id: note for note in self.notes}
+        return [[by_id[note_id] for note_id in cluster] for cluster in self._dedup.clusters(threshold)]
 
-        return results
+    @writer
+    def sorted_notes(self, order):
+        """Нотатки в порядку order ("text" або "tag"); порядок підтримується при змінах."""
+        if order not in NOTE_ORDERS:
+            raise ValueError(f"Невідомий порядок сортування: {order}. Доступні: {', '.join(NOTE_ORDERS)}.")
+        view = self._orders.get(order)
+        if view is None:
+            view = self._orders[order] = SortedView(NOTE_ORDERS[order])
+            view.add_many((note.id, note) for note in self.notes)
+        by_id = {note.id: note for note in self.notes}
+        return [by_id[note_id] for note_id in view]
 
     # -- TAG OPERATIONS --
+    @reader
     def get_all_tags(self):
         tags = set()
         for note in self.notes:
-            for tag in note.tags:
-                tags.add(tag.lower())
+            tags.update(note.tag_keys)
         return sorted(tags)
 
+    @writer
+    def complete_tags(self, prefix, limit=COMPLETION_LIMIT):
+        """Теги з префіксом (без урахування регістру) для автодоповнення."""
+        if self._tags is None:
+            self._tags = Trie()
+            for note in self.notes:
+                self._retag(note.id, note.tag_keys)
+        return self._tags.complete(prefix, limit)
+
+    @reader
     def sort_by_tag(self, tag):
-        return [
-            note for note in self.notes
-            if tag.lower() in [t.lower() for t in note.tags]
-        ]
\ No newline at end of file
+        key = canonical(tag)
+        return [note for note in self.notes if key in note.tag_keys]
\ No newline at end of file
@@ -1,3 +1,6 @@
+from .binary import ContactCodec, NoteCodec, SnapshotReader
 from .repo import Repository, ContactRepository, NoteRepository
+from .streaming import iter_json_array
 
-__all__ = ['Repository', 'ContactRepository', 'NoteRepository']
\ No newline at end of file
+__all__ = ['Repository', 'ContactRepository', 'NoteRepository', 'ContactCodec', 'NoteCodec', 'SnapshotReader',
+           'iter_json_array']
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""Компактний бінарний формат знімка для контактів і нотаток.
+
+Структура файлу:
+    заголовок  — магія PAB1, версія, тип записів, кількість записів,
+                 зміщення таблиці рядків;
+    записи     — кожен з префіксом довжини (u32);
+    таблиця рядків — інтерновані теги та домени email, на які записи
+                 посилаються за індексом.
+
+Телефони зберігаються як упаковані цілі (кількість цифр + u64), дні
+народження — як порядковий номер дня. Файл читається через mmap, тож
+окремий запис можна декодувати без читання всього файлу.
+"""
+import io
+import mmap
+import os
+import struct
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, List
+
+MAGIC = b"PAB1"
+VERSION = 1
+KIND_CONTACTS = 1
+KIND_NOTES = 2
+
+_HEADER = struct.Struct("<4sHBxIQ")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_PHONE = struct.Struct("<BQ")
+
+_HAS_EMAIL = 1
+_HAS_ADDRESS = 2
+_HAS_BIRTHDAY = 4
+
+
+class _StringTable:
+    def __init__(self):
+        self.items: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.items)
+            self.items.append(value)
+        return index
+
+
+def _pack_str(out: bytearray, value: str, size: struct.Struct = _U32):
+    data = value.encode("utf-8")
+    out += size.pack(len(data))
+    out += data
+
+
+def _unpack_str(buffer, pos: int, size: struct.Struct = _U32):
+    (length,) = size.unpack_from(buffer, pos)
+    pos += size.size
+    return buffer[pos:pos + length].decode("utf-8"), pos + length
+
+
+class ContactCodec:
+    kind = KIND_CONTACTS
+
+    @staticmethod
+    def encode(record: Dict, strings: _StringTable) -> bytes:
+        out = bytearray()
+        email, address, birthday = record.get("email"), record.get("address"), record.get("birthday")
+        flags = (_HAS_EMAIL if email else 0) | (_HAS_ADDRESS if address else 0) | (_HAS_BIRTHDAY if birthday else 0)
+        out += _U8.pack(flags)
+        _pack_str(out, record["name"], _U16)
+        phones = record.get("phones") or []
+        out += _U8.pack(len(phones))
+        for phone in phones:
+            if not phone.isdigit():
+                raise ValueError(f"Телефон '{phone}' не можна упакувати: дозволені лише цифри.")
+            out += _PHONE.pack(len(phone), int(phone))
+        if email:
+            local, domain = email.rsplit("@", 1)
+            _pack_str(out, local, _U16)
+            out += _U32.pack(strings.add(domain))
+        if address:
+            _pack_str(out, address)
+        if birthday:
+            day, month, year = (int(part) for part in birthday.split("."))
+            out += _U32.pack(date(year, month, day).toordinal())
+        return bytes(out)
+
+    @staticmethod
+    def decode(buffer, pos: int, strings: List[str]) -> Dict:
+        (flags,) = _U8.unpack_from(buffer, pos)
+        name, pos = _unpack_str(buffer, pos + 1, _U16)
+        (count,) = _U8.unpack_from(buffer, pos)
+        pos += 1
+        phones = []
+        for _ in range(count):
+            digits, value = _PHONE.unpack_from(buffer, pos)
+            pos += _PHONE.size
+            phones.append(str(value).zfill(digits))
+        email = address = birthday = None
+        if flags & _HAS_EMAIL:
+            local, pos = _unpack_str(buffer, pos, _U16)
+            (domain,) = _U32.unpack_from(buffer, pos)
+            pos += 4
+            email = f"{local}@{strings[domain]}"
+        if flags & _HAS_ADDRESS:
+            address, pos = _unpack_str(buffer, pos)
+        if flags & _HAS_BIRTHDAY:
+            (ordinal,) = _U32.unpack_from(buffer, pos)
+            day = date.fromordinal(ordinal)
+            birthday = f"{day.day:02d}.{day.month:02d}.{day.year:04d}"
+        return {"name": name, "phones": phones, "email": email, "address": address, "birthday": birthday}
+
+
+class NoteCodec:
+    kind = KIND_NOTES
+
+    @staticmethod
+    def encode(record: Dict, strings: _StringTable) -> bytes:
+        out = bytearray()
+        _pack_str(out, record["id"], _U16)
+        _pack_str(out, record["text"])
+        tags = record.get("tags") or []
+        out += _U16.pack(len(tags))
+        for tag in tags:
+            out += _U32.pack(strings.add(tag))
+        return bytes(out)
+
+    @staticmethod
+    def decode(buffer, pos: int, strings: List[str]) -> Dict:
+        note_id, pos = _unpack_str(buffer, pos, _U16)
+        text, pos = _unpack_str(buffer, pos)
+        (count,) = _U16.unpack_from(buffer, pos)
+        pos += 2
+        tags = [strings[index] for index in struct.unpack_from(f"<{count}I", buffer, pos)]
+        return {"id": note_id, "text": text, "tags": tags}
+
+
+def write_snapshot(file: io.BufferedIOBase, records: Iterable[Dict], codec) -> int:
+    """Записує знімок у відкритий бінарний файл. Повертає кількість записів."""
+    strings = _StringTable()
+    start = file.tell()
+    file.write(_HEADER.pack(MAGIC, VERSION, codec.kind, 0, 0))
+    count = 0
+    for record in records:
+        payload = codec.encode(record, strings)
+        file.write(_U32.pack(len(payload)))
+        file.write(payload)
+        count += 1
+    strings_offset = file.tell() - start
+    file.write(_U32.pack(len(strings.items)))
+    for value in strings.items:
+        data = value.encode("utf-8")
+        file.write(_U32.pack(len(data)))
+        file.write(data)
+    end = file.tell()
+    file.seek(start)
+    file.write(_HEADER.pack(MAGIC, VERSION, codec.kind, count, strings_offset))
+    file.seek(end)
+    return count
+
+
+class SnapshotReader:
+    """Читання знімка через mmap: послідовно (iter) або за номером запису."""
+
+    def __init__(self, path, codec):
+        self.codec = codec
+        self._file = open(path, "rb")
+        self._map = None
+        self._offsets = None
+        self._count = 0
+        self.strings: List[str] = []
+        if os.fstat(self._file.fileno()).st_size == 0:
+            return
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, kind, count, strings_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or kind != codec.kind:
+            self.close()
+            raise ValueError("Невідомий формат бінарного знімка.")
+        self._count = count
+        (total,) = _U32.unpack_from(self._map, strings_offset)
+        pos = strings_offset + 4
+        for _ in range(total):
+            value, pos = _unpack_str(self._map, pos)
+            self.strings.append(value)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record_offsets(self) -> array:
+        # Індекс зміщень будуємо ліниво: лише перескакуємо префікси довжини
+        if self._offsets is None:
+            self._offsets = array("Q")
+            pos = _HEADER.size
+            for _ in range(self._count):
+                self._offsets.append(pos)
+                pos += 4 + _U32.unpack_from(self._map, pos)[0]
+        return self._offsets
+
+    def __getitem__(self, index: int) -> Dict:
+        if not -self._count <= index < self._count:
+            raise IndexError("Запису з таким номером немає у знімку.")
+        return self.codec.decode(self._map, self._record_offsets()[index] + 4, self.strings)
+
+    def __iter__(self) -> Iterator[Dict]:
+        pos = _HEADER.size
+        for _ in range(self._count):
+            (length,) = _U32.unpack_from(self._map, pos)
+            yield self.codec.decode(self._map, pos + 4, self.strings)
+            pos += 4 + length
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
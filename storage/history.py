@@ -0,0 +1,285 @@
+"""Історія змін: версії даних із дедуплікованим сховищем записів.
+
+Кожен запис (контакт, нотатка) зберігається один раз у файлі objects.pack
+під хешем свого вмісту (content-addressed); незмінені записи спільні для
+всіх версій. Версія — рядок у versions.jsonl: які ключі отримали новий
+хеш і які видалено відносно попередньої версії. Повна карта ключ → хеш
+(контрольна точка, checkpoints/<версія>.json) пишеться лише тоді, коли
+ланцюжок різниць після попередньої точки переріс саму карту, — тож і
+вона амортизовано коштує O(1) на змінений запис. Відновлення й запуск
+читають лише найближчу контрольну точку та різниці після неї.
+
+Ключі мають простір імен: 'contacts/Іван', 'notes/<id>'. Старі версії
+понад keep видаляються разом із записами, на які вже ніщо не посилається.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .repo import file_lock, write_atomic
+
+
+class Version(NamedTuple):
+    number: int
+    timestamp: str
+    label: str
+    changed: int
+    deleted: int
+    restored: Optional[int] = None  # версія, до якої повертали (undo/restore)
+
+
+def record_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _canonical(record: Dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+class HistoryStore:
+    # Контрольна точка — коли різниці після попередньої зачепили більше ключів, ніж
+    # є в карті (але не менше checkpoint_min)
+    checkpoint_min = 64
+
+    def __init__(self, directory: Path, keep: int = 50):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pack_path = self.directory / 'objects.pack'
+        self.index_path = self.directory / 'objects.idx'
+        self.manifest_path = self.directory / 'versions.jsonl'
+        self.checkpoints_dir = self.directory / 'checkpoints'
+        self.keep = keep
+        self._objects: Dict[str, Tuple[int, int]] = {}
+        self._state: Dict[str, str] = {}
+        self._versions: List[Version] = []
+        # Скільки ключів зачепили різниці після останньої контрольної точки
+        self._chain = 0
+        self._staged: Dict[str, Optional[Dict]] = {}
+        self._stamp = None
+        self._guard = threading.Lock()
+        with file_lock(self.manifest_path, exclusive=False):
+            self._load()
+
+    # -- читання з диска --
+    def _manifest_stamp(self):
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _entries(self) -> Iterable[Dict]:
+        if not self.manifest_path.exists():
+            return
+        with open(self.manifest_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _load(self):
+        self._objects = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    digest, offset, length = line.split()
+                    self._objects[digest] = (int(offset), int(length))
+        entries = list(self._entries())
+        self._versions = [self._version(entry) for entry in entries]
+        self._state, self._chain = self._replay(entries)
+        self._stamp = self._manifest_stamp()
+
+    @staticmethod
+    def _is_base(entry: Dict) -> bool:
+        # Повна карта: контрольна точка або (у старих історіях) поле 'full' у рядку версії
+        return 'full' in entry or entry.get('checkpoint', False)
+
+    def _replay(self, entries: List[Dict]) -> Tuple[Dict[str, str], int]:
+        """Стан після останнього з entries: найближча контрольна точка + різниці після неї."""
+        start = next((i for i in range(len(entries) - 1, -1, -1) if self._is_base(entries[i])), None)
+        state: Dict[str, str] = {}
+        if start is not None:
+            state = self._read_base(entries[start])
+            entries = entries[start + 1:]
+        chain = 0
+        for entry in entries:
+            self._apply(state, entry)
+            chain += len(entry['put']) + len(entry['del'])
+        return state, chain
+
+    def _checkpoint_path(self, number: int) -> Path:
+        return self.checkpoints_dir / f"{number}.json"
+
+    def _read_base(self, entry: Dict) -> Dict[str, str]:
+        if 'full' in entry:
+            return dict(entry['full'])
+        with open(self._checkpoint_path(entry['v']), 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def _write_checkpoint(self, number: int, state: Dict[str, str]):
+        self.checkpoints_dir.mkdir(exist_ok=True)
+        write_atomic(self._checkpoint_path(number), state, indent=None)
+
+    @staticmethod
+    def _apply(state: Dict[str, str], entry: Dict):
+        state.update(entry['put'])
+        for key in entry['del']:
+            state.pop(key, None)
+
+    @staticmethod
+    def _version(entry: Dict) -> Version:
+        # Рядок бази після обрізання історії зберігає лише лічильники, без різниці
+        changed = entry['changed'] if 'changed' in entry else len(entry.get('put', ()))
+        deleted = entry['deleted'] if 'deleted' in entry else len(entry.get('del', ()))
+        return Version(entry['v'], entry['ts'], entry['label'], changed, deleted, entry.get('restored'))
+
+    def _read_object(self, digest: str) -> Dict:
+        offset, length = self._objects[digest]
+        with open(self.pack_path, 'rb') as file:
+            file.seek(offset)
+            return json.loads(file.read(length))
+
+    # -- запис нових версій --
+    def stage(self, namespace: str, records: Iterable[Dict], deletes: Iterable[str], key: str):
+        """Запам'ятовує змінені й видалені записи для наступної версії."""
+        with self._guard:
+            for record in records:
+                self._staged[f"{namespace}/{record[key]}"] = record
+            for name in deletes:
+                self._staged[f"{namespace}/{name}"] = None
+
+    def is_empty(self) -> bool:
+        return not self._versions
+
+    def versions(self) -> List[Version]:
+        return list(self._versions)
+
+    def commit(self, label: str, restored: Optional[int] = None) -> Optional[int]:
+        """Створює версію зі staged-змін. Повертає її номер або None, якщо змін немає.
+
+        Перша версія пишеться завжди, навіть порожня: до неї повертає undo першої зміни.
+        """
+        with self._guard:
+            staged, self._staged = self._staged, {}
+            if not staged and self._versions:
+                return None
+            with file_lock(self.manifest_path):
+                if self._manifest_stamp() != self._stamp:
+                    self._load()  # інший процес додав версії
+                puts, deletes = {}, []
+                new_objects = []
+                with open(self.pack_path, 'ab') as pack:
+                    offset = pack.tell()
+                    for name, record in staged.items():
+                        if record is None:
+                            if name in self._state:
+                                deletes.append(name)
+                            continue
+                        data = _canonical(record)
+                        digest = record_hash(data)
+                        if self._state.get(name) == digest:
+                            continue
+                        puts[name] = digest
+                        if digest not in self._objects:
+                            pack.write(data)
+                            self._objects[digest] = (offset, len(data))
+                            new_objects.append(f"{digest} {offset} {len(data)}\n")
+                            offset += len(data)
+                if not puts and not deletes and self._versions:
+                    return None
+                if new_objects:
+                    with open(self.index_path, 'a', encoding='utf-8') as index:
+                        index.writelines(new_objects)
+                number = self._versions[-1].number + 1 if self._versions else 1
+                entry = {'v': number, 'ts': datetime.now().isoformat(timespec='seconds'), 'label': label}
+                if restored is not None:
+                    entry['restored'] = restored
+                self._apply(self._state, {'put': puts, 'del': deletes})
+                entry.update({'put': puts, 'del': deletes})
+                self._chain += len(puts) + len(deletes)
+                if not self._versions or self._chain > max(self.checkpoint_min, len(self._state)):
+                    # Файл точки пишеться до рядка версії: рядок ніколи не посилається на відсутній файл
+                    self._write_checkpoint(number, self._state)
+                    entry['checkpoint'] = True
+                    self._chain = 0
+                with open(self.manifest_path, 'a', encoding='utf-8') as manifest:
+                    manifest.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                self._versions.append(self._version(entry))
+                if self.keep and len(self._versions) > self.keep + max(10, self.keep // 2):
+                    self._prune()
+                self._stamp = self._manifest_stamp()
+                return number
+
+    # -- відновлення --
+    def _state_at(self, number: int) -> Dict[str, str]:
+        entries = []
+        for entry in self._entries():
+            if entry['v'] > number:
+                break
+            entries.append(entry)
+        if not entries or entries[-1]['v'] != number:
+            raise KeyError(f"Версія {number}")
+        return self._replay(entries)[0]
+
+    def records_at(self, number: int) -> Dict[str, Dict[str, Dict]]:
+        """Стан версії: простір імен → {ключ: запис}."""
+        with self._guard, file_lock(self.manifest_path, exclusive=False):
+            if self._manifest_stamp() != self._stamp:
+                self._load()
+            result: Dict[str, Dict[str, Dict]] = {}
+            for name, digest in self._state_at(number).items():
+                namespace, key = name.split('/', 1)
+                result.setdefault(namespace, {})[key] = self._read_object(digest)
+            return result
+
+    def undo_target(self) -> Optional[int]:
+        """Версія, до якої повертає undo: повторні undo йдуть далі в минуле."""
+        if not self._versions:
+            return None
+        last = self._versions[-1]
+        base = last.restored if last.restored is not None else last.number
+        earlier = [version.number for version in self._versions if version.number < base]
+        return earlier[-1] if earlier else None
+
+    # -- утримання --
+    def _prune(self):
+        """Лишає останні keep версій і записи, на які вони посилаються (під блокуванням)."""
+        kept = self._versions[-self.keep:]
+        first = kept[0].number
+        entries = [entry for entry in self._entries() if entry['v'] >= first]
+        # Перша лишена версія стає контрольною точкою: старіші різниці більше не потрібні
+        base = self._state_at(first)
+        self._write_checkpoint(first, base)
+        entries[0] = {key: value for key, value in entries[0].items() if key not in ('full', 'put', 'del')}
+        entries[0].update(checkpoint=True, changed=kept[0].changed, deleted=kept[0].deleted)
+
+        referenced = set(base.values())
+        for entry in entries[1:]:
+            referenced.update(self._read_base(entry).values() if self._is_base(entry) else entry['put'].values())
+
+        objects: Dict[str, Tuple[int, int]] = {}
+        tmp_pack = self.pack_path.with_name(self.pack_path.name + '.tmp')
+        with open(self.pack_path, 'rb') as source, open(tmp_pack, 'wb') as target:
+            for digest in referenced:
+                offset, length = self._objects[digest]
+                source.seek(offset)
+                objects[digest] = (target.tell(), length)
+                target.write(source.read(length))
+        tmp_index = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(tmp_index, 'w', encoding='utf-8') as index:
+            index.writelines(f"{digest} {offset} {length}\n" for digest, (offset, length) in objects.items())
+        tmp_manifest = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_manifest, 'w', encoding='utf-8') as manifest:
+            manifest.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        os.replace(tmp_pack, self.pack_path)
+        os.replace(tmp_index, self.index_path)
+        os.replace(tmp_manifest, self.manifest_path)
+        for path in self.checkpoints_dir.glob('*.json'):
+            if path.stem.isdigit() and int(path.stem) < first:
+                path.unlink()
+        self._objects = objects
+        self._versions = kept
+        self._chain = self._replay(entries)[1]
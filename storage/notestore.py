@@ -0,0 +1,163 @@
+"""Сховище нотаток з текстами у файлі, відображеному в пам'ять (mmap).
+
+Тексти дописуються у файл даних <base>.dat, а в пам'яті лишається тільки
+індекс: id → (зміщення, довжина, хеш, теги), який зберігається окремим
+файлом <base>.idx. Старі версії текстів стають «сміттям» і прибираються
+ущільненням, коли їх стає більше, ніж живих даних.
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from .repo import file_lock, write_atomic
+
+
+class NoteEntry(NamedTuple):
+    offset: int
+    length: int
+    hash: str
+    tags: List[str]
+
+
+def text_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+class MappedNoteStore:
+    # Ущільнюємо файл даних, коли сміття більше за живі дані (але не менше порогу)
+    compact_threshold = 1024 * 1024
+
+    def __init__(self, base_path: Path):
+        base_path = Path(base_path)
+        self.data_path = base_path.with_name(base_path.name + ".dat")
+        self.index_path = base_path.with_name(base_path.name + ".idx")
+        self.entries: Dict[str, NoteEntry] = {}
+        self._garbage = 0
+        self._stamp = None
+        self._foreign = False
+        self._file = None
+        self._map = None
+        # commit() може виконуватися у фоновому потоці (storage.pipeline)
+        self._guard = threading.RLock()
+
+    def _index_stamp(self):
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def changed_on_disk(self) -> bool:
+        return self._index_stamp() != self._stamp
+
+    def exists(self) -> bool:
+        return self.index_path.exists()
+
+    def load(self) -> Dict[str, NoteEntry]:
+        with self._guard, file_lock(self.index_path, exclusive=False):
+            self._load_index()
+            self._foreign = False
+            return self.entries
+
+    def _load_index(self):
+        self._stamp = self._index_stamp()
+        rows = []
+        if self._stamp is not None:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                rows = json.load(file)
+        self.entries = {row[0]: NoteEntry(*row[1:]) for row in rows}
+        size = self.data_path.stat().st_size if self.data_path.exists() else 0
+        self._garbage = size - sum(entry.length for entry in self.entries.values())
+        self._remap()
+
+    def _remap(self):
+        self.close()
+        if self.data_path.exists() and self.data_path.stat().st_size > 0:
+            self._file = open(self.data_path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_text(self, note_id: str) -> str:
+        with self._guard:
+            entry = self.entries[note_id]
+            end = entry.offset + entry.length
+            if self._map is None or end > len(self._map):
+                self._remap()
+            return self._map[entry.offset:end].decode("utf-8")
+
+    def poll(self) -> bool:
+        """Перечитує індекс, якщо його змінив інший процес. True — були чужі зміни."""
+        with self._guard:
+            if self.changed_on_disk():
+                with file_lock(self.index_path, exclusive=False):
+                    self._load_index()
+                self._foreign = True
+            foreign, self._foreign = self._foreign, False
+            return foreign
+
+    def commit(self, upserts: Iterable[Tuple[str, str, List[str]]], deletes: Iterable[str]) -> bool:
+        """Дописує нові тексти у файл даних і переписує індекс (лише метадані)."""
+        try:
+            with self._guard, file_lock(self.index_path):
+                if self.changed_on_disk():
+                    # Інший процес зберіг свої зміни — накладаємо наші поверх
+                    self._load_index()
+                    self._foreign = True
+                with open(self.data_path, "ab") as file:
+                    offset = file.tell()
+                    for note_id, text, tags in upserts:
+                        data = text.encode("utf-8")
+                        digest = text_hash(data)
+                        old = self.entries.get(note_id)
+                        if old is not None and old.hash == digest:
+                            self.entries[note_id] = old._replace(tags=list(tags))
+                            continue
+                        if old is not None:
+                            self._garbage += old.length
+                        file.write(data)
+                        self.entries[note_id] = NoteEntry(offset, len(data), digest, list(tags))
+                        offset += len(data)
+                for note_id in deletes:
+                    old = self.entries.pop(note_id, None)
+                    if old is not None:
+                        self._garbage += old.length
+                if self._garbage > max(self.compact_threshold, offset - self._garbage):
+                    self._compact()
+                else:
+                    self._write_index()
+                    self._remap()
+            return True
+        except Exception as e:
+            print(f"Помилка збереження: {e}")
+            return False
+
+    def _write_index(self):
+        rows = [[note_id, *entry] for note_id, entry in self.entries.items()]
+        write_atomic(self.index_path, rows, indent=None)
+        self._stamp = self._index_stamp()
+
+    def _compact(self):
+        """Переписує файл даних лише з живими текстами (під блокуванням)."""
+        self._remap()
+        tmp_path = self.data_path.with_name(self.data_path.name + ".tmp")
+        entries = {}
+        with open(tmp_path, "wb") as file:
+            for note_id, entry in self.entries.items():
+                entries[note_id] = entry._replace(offset=file.tell())
+                file.write(self._map[entry.offset:entry.offset + entry.length])
+        os.replace(tmp_path, self.data_path)
+        self.entries = entries
+        self._garbage = 0
+        self._write_index()
+        self._remap()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,126 @@
+"""Асинхронний конвеєр збереження на asyncio.
+
+Кожне сховище (контакти, нотатки) має власне завдання-писаря й обмежену
+чергу. submit() лише ставить завдання в чергу — чекати доводиться тільки
+тоді, коли черга заповнена (зворотний тиск). Сам запис виконується в
+пулі потоків, тож цикл подій не блокується, а різні сховища пишуться
+паралельно. flush() чекає, поки всі поставлені завдання буде записано.
+
+Завдання бувають двох видів:
+    'delta'    — дописати зміни в журнал;
+    'snapshot' — переписати сховище повністю. Знімок містить і всі
+                 попередні зміни, тож дельти, що стоять у черзі перед
+                 ним, не записуються окремо.
+
+Дані завдання знімаються в момент submit(), тож подальші зміни в пам'яті
+не впливають на вже поставлений запис.
+
+BackgroundPipeline запускає конвеєр у власному потоці з циклом подій і
+дає синхронні методи для звичайного (не asyncio) коду, як-от run_cli.
+"""
+import asyncio
+import threading
+from typing import Callable, Dict, NamedTuple, Optional
+
+
+class Job(NamedTuple):
+    kind: str  # 'delta' або 'snapshot'
+    run: Callable[[], bool]
+    # Викликається в потоці конвеєра з результатом запису; має бути швидким
+    done: Optional[Callable[[bool], None]] = None
+
+
+class PersistencePipeline:
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._writers: Dict[str, asyncio.Task] = {}
+        self._failed = False
+
+    def _queue(self, store: str) -> asyncio.Queue:
+        queue = self._queues.get(store)
+        if queue is None:
+            queue = self._queues[store] = asyncio.Queue(self.maxsize)
+            self._writers[store] = asyncio.create_task(self._writer(queue))
+        return queue
+
+    async def submit(self, store: str, job: Job) -> None:
+        """Ставить завдання в чергу сховища; чекає лише при заповненій черзі."""
+        await self._queue(store).put(job)
+
+    async def _writer(self, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            # Останній знімок у пакеті робить попередні завдання зайвими
+            start = max((i for i, job in enumerate(batch) if job.kind == 'snapshot'), default=0)
+            superseded, batch = batch[:start], batch[start:]
+            results = [await self._run(job) for job in batch]
+            for job in superseded:
+                # Їхні зміни вже записано у знімку batch[0]
+                self._finish(job, results[0])
+            for _ in range(len(superseded) + len(batch)):
+                queue.task_done()
+
+    async def _run(self, job: Job) -> bool:
+        try:
+            ok = await asyncio.to_thread(job.run)
+        except Exception as e:
+            print(f"Помилка збереження: {e}")
+            ok = False
+        self._finish(job, ok)
+        return ok
+
+    def _finish(self, job: Job, ok: bool):
+        if not ok:
+            self._failed = True
+        if job.done is not None:
+            job.done(ok)
+
+    async def flush(self) -> bool:
+        """Чекає запису всіх поставлених завдань. False — якщо якесь не вдалося."""
+        await asyncio.gather(*(queue.join() for queue in list(self._queues.values())))
+        ok, self._failed = not self._failed, False
+        return ok
+
+    async def close(self) -> bool:
+        ok = await self.flush()
+        for task in self._writers.values():
+            task.cancel()
+        await asyncio.gather(*self._writers.values(), return_exceptions=True)
+        self._queues.clear()
+        self._writers.clear()
+        return ok
+
+
+class BackgroundPipeline:
+    """PersistencePipeline у фоновому потоці з синхронними submit/flush/close."""
+
+    def __init__(self, maxsize: int = 16):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="persistence", daemon=True)
+        self._thread.start()
+        self.pipeline = PersistencePipeline(maxsize)
+        self._closed = False
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def submit(self, store: str, job: Optional[Job]) -> None:
+        if job is not None:
+            self._call(self.pipeline.submit(store, job))
+
+    def flush(self) -> bool:
+        return self._call(self.pipeline.flush())
+
+    def close(self) -> bool:
+        """Дописує все з черги та зупиняє потік; повторний виклик нічого не робить."""
+        if self._closed:
+            return True
+        self._closed = True
+        ok = self._call(self.pipeline.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        return ok
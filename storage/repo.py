@@ -1,39 +1,346 @@
+import io
 import json
 import os
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from .binary import ContactCodec, NoteCodec, SnapshotReader, write_snapshot
+from .pipeline import Job
+from .streaming import CHUNK_SIZE, iter_json_array
+
+try:
+    import fcntl
+except ImportError:  # Windows: без advisory-блокувань
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: Path, exclusive: bool = True):
+    """Advisory-блокування між процесами через сусідній файл <path>.lock."""
+    if fcntl is None:
+        yield
+        return
+    lock_path = path.with_name(path.name + '.lock')
+    with open(lock_path, 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+# Позначка запису, який hydrate відхилив (див. hydrate_each)
+_SKIPPED = object()
+
+
+def _hydrate_one(record: Dict, hydrate: Callable[[Dict], Any], position: int, source: str, key: Optional[str]):
+    try:
+        return hydrate(record)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        name = record.get(key) if key is not None and isinstance(record, dict) else None
+        label = f"{position} ({name})" if name is not None else f"{position}"
+        print(f"Пропущено некоректний запис {label} у {source}: {e}")
+        return _SKIPPED
+
+
+def hydrate_each(records, hydrate: Callable[[Dict], Any], source: str, key: Optional[str] = None):
+    """Пари (запис, hydrate(запис)); запис, який hydrate відхилив, пропускається з попередженням.
+
+    Один некоректний запис не повинен спорожнити всю книгу: інакше наступне
+    збереження переписало б дані користувача нічим.
+    """
+    for position, record in enumerate(records, 1):
+        value = _hydrate_one(record, hydrate, position, source, key)
+        if value is not _SKIPPED:
+            yield record, value
+
+
+def write_atomic(path: Path, data, codec=None, indent: Optional[int] = 4):
+    """Пише у тимчасовий файл і атомарно підміняє: читачі не бачать напівзаписаний файл."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        # mkstemp створює файл з правами 0600 — зберігаємо звичні права
+        os.chmod(tmp_path, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        with os.fdopen(fd, 'wb') as file:
+            if codec is not None:
+                write_snapshot(file, data, codec)
+            else:
+                text = io.TextIOWrapper(file, encoding='utf-8')
+                json.dump(data, text, ensure_ascii=False, indent=indent)
+                text.flush()
+                text.detach()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class Changes(NamedTuple):
+    """Зміни у сховищі, зроблені іншими процесами.
+
+    reset=True означає, що upserts — повний поточний стан сховища
+    (файл переписали цілком), інакше це лише нові записи журналу.
+    """
+    upserts: List[Dict]
+    deletes: List[str]
+    reset: bool = False
 
 
 class Repository:
+    # Журнал стискається у знімок, коли переростає journal_ratio від знімка (але не менше
+    # journal_limit), а також при виході (compact) — тож файл даних не відстає надовго
+    journal_limit = 16 * 1024
+    journal_ratio = 0.25
+    # Розмір шматка потокового читання JSON-знімка (символів)
+    chunk_size = CHUNK_SIZE
     
-    def __init__(self, filename: str, storage_dir: Optional[Path] = None):
+    def __init__(self, filename: str, storage_dir: Optional[Path] = None, key: Optional[str] = None, codec=None):
         if storage_dir is None:
             storage_dir = Path.home() / '.personal_assistant'
         
         self.storage_dir = storage_dir
         self.filepath = storage_dir / filename
+        # key — поле-ідентифікатор запису; з ним доступний журнал змін (append/poll)
+        self.key = key
+        # codec — бінарний формат знімка (storage.binary); None — JSON
+        self.codec = codec
+        self._stamp = None
+        self._journal_stamp = None
+        self._unapplied: Dict[str, Optional[Dict]] = {}
+        self._unapplied_reset = False
+        # Блокування між потоками: запис може йти з фонового конвеєра (storage.pipeline)
+        self._guard = threading.RLock()
         self._ensure_storage_directory()
     
     def _ensure_storage_directory(self):
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def journal_path(self) -> Path:
+        return self.filepath.with_name(self.filepath.name + '.journal')
+
+    @contextmanager
+    def locked(self, exclusive: bool = True):
+        """Блокування між потоками та advisory-блокування між процесами (через .lock)."""
+        with self._guard, file_lock(self.filepath, exclusive):
+            yield
+
+    @staticmethod
+    def _stat(path: Path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _journal_state(self):
+        stat = self._stat(self.journal_path)
+        return None if stat is None else (stat[2], stat[1])
+
+    def changed_on_disk(self) -> bool:
+        """Чи змінилися знімок або журнал після нашого останнього читання (лише stat)."""
+        if self._stat(self.filepath) != self._stamp:
+            return True
+        return self.key is not None and self._journal_state() != self._journal_stamp
+
+    def _read(self) -> Iterator[Dict]:
+        """Записи знімка по одному (JSON читається потоково, storage.streaming)."""
+        if not self.filepath.exists():
+            return
+        if self.codec is not None:
+            with SnapshotReader(self.filepath, self.codec) as reader:
+                yield from reader
+            return
+        index = 0
+        with open(self.filepath, 'r', encoding='utf-8') as file:
+            try:
+                for index, record in enumerate(iter_json_array(file, self.chunk_size), 1):
+                    if self.key is not None:
+                        # Старі файли без ключа: позиційний ключ, однаковий для всіх процесів
+                        record.setdefault(self.key, f"legacy-{index - 1}")
+                    yield record
+            except json.JSONDecodeError as e:
+                # Пошкоджений (зазвичай обірваний) запис: попередні вже завантажені
+                print(f"Помилка завантаження: {e} (прочитано записів: {index})")
+
+    def _read_journal(self, offset: int = 0):
+        """Читає записи журналу від offset. Повертає (записи, новий offset, inode)."""
+        try:
+            with open(self.journal_path, 'rb') as file:
+                inode = os.fstat(file.fileno()).st_ino
+                file.seek(offset)
+                chunk = file.read()
+        except FileNotFoundError:
+            return [], 0, None
+        # Незавершений останній рядок (обірваний запис) не споживаємо
+        end = chunk.rfind(b'\n') + 1
+        entries = []
+        for line in chunk[:end].splitlines():
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return entries, offset + end, inode
+
+    def _replay(self, state: Dict[str, Optional[Dict]], entries: List[Dict], hydrate=None):
+        for position, entry in enumerate(entries, 1):
+            if 'put' in entry:
+                record = entry['put']
+                if hydrate is not None:
+                    record = _hydrate_one(record, hydrate, position, self.journal_path.name, self.key)
+                    if record is _SKIPPED:
+                        continue
+                state[entry['put'][self.key]] = record
+            elif 'del' in entry:
+                state[entry['del']] = None
+
+    def _load_state(self, hydrate: Optional[Callable[[Dict], Any]] = None) -> List:
+        """Знімок + журнал. Викликати під блокуванням.
+
+        hydrate перетворює кожен запис одразу після читання, тож словники
+        всього файлу не тримаються в пам'яті разом з готовими об'єктами.
+        """
+        records = self._read()
+        if hydrate is not None:
+            records = hydrate_each(records, hydrate, self.filepath.name, self.key)
+        if self.key is None:
+            data = list(records if hydrate is None else (value for _, value in records))
+            self._stamp = self._stat(self.filepath)
+            return data
+        if hydrate is None:
+            state = {record[self.key]: record for record in records}
+        else:
+            state = {record[self.key]: value for record, value in records}
+        self._stamp = self._stat(self.filepath)
+        entries, offset, inode = self._read_journal()
+        self._replay(state, entries, hydrate)
+        self._journal_stamp = None if inode is None else (inode, offset)
+        return [record for record in state.values() if record is not None]
+
+    def _write(self, data: List[Dict]):
+        write_atomic(self.filepath, data, self.codec)
+        self._stamp = self._stat(self.filepath)
+        if self.key is not None and self.journal_path.exists():
+            os.truncate(self.journal_path, 0)
+            self._journal_stamp = self._journal_state()
     
     def save(self, data: List[Dict]) -> bool:
+        """Повністю переписує сховище (знімок) і очищає журнал."""
         try:
-            with open(self.filepath, 'w', encoding='utf-8') as file:
-                json.dump(data, file, ensure_ascii=False, indent=4)
+            with self.locked():
+                self._write(data)
             return True
         except Exception as e:
             print(f"Помилка збереження: {e}")
             return False
+
+    def _collect(self):
+        """Під блокуванням дочитує чужі зміни у буфер, який потім віддає poll()."""
+        if self._stat(self.filepath) != self._stamp:
+            state = self._load_state()
+            self._unapplied = {record[self.key]: record for record in state}
+            self._unapplied_reset = True
+            return
+        journal = self._journal_state()
+        if journal == self._journal_stamp or journal is None:
+            return
+        offset = 0
+        if self._journal_stamp is not None and self._journal_stamp[0] == journal[0]:
+            offset = self._journal_stamp[1]
+        entries, offset, inode = self._read_journal(offset)
+        self._replay(self._unapplied, entries)
+        self._journal_stamp = (inode, offset)
+
+    def append(self, upserts: List[Dict], deletes: List[str]) -> bool:
+        """Дописує у журнал лише змінені/додані записи та видалені ключі.
+
+        Вартість пропорційна розміру змін. Коли журнал переростає знімок,
+        його стискають у новий знімок (амортизовано O(1) на зміну).
+        """
+        try:
+            with self.locked():
+                self._collect()
+                lines = [json.dumps({'put': record}, ensure_ascii=False) for record in upserts]
+                lines += [json.dumps({'del': key}, ensure_ascii=False) for key in deletes]
+                payload = ('\n'.join(lines) + '\n').encode('utf-8')
+                with open(self.journal_path, 'ab') as file:
+                    size = file.tell()
+                    if self._journal_stamp is not None and size > self._journal_stamp[1]:
+                        payload = b'\n' + payload  # закриваємо обірваний рядок
+                    file.write(payload)
+                    size = file.tell()
+                    inode = os.fstat(file.fileno()).st_ino
+                self._journal_stamp = (inode, size)
+                if self._unapplied or self._unapplied_reset:
+                    # Ще не віддані poll() чужі версії цих записів наш запис уже перекрив
+                    for record in upserts:
+                        self._unapplied[record[self.key]] = record
+                    for key in deletes:
+                        self._unapplied[key] = None
+                snapshot = self._stamp[1] if self._stamp else 0
+                if size > max(self.journal_limit, snapshot * self.journal_ratio):
+                    self._write(self._load_state())
+            return True
+        except Exception as e:
+            print(f"Помилка збереження: {e}")
+            return False
+
+    def compact(self) -> bool:
+        """Вносить журнал у знімок (викликається при виході), щоб сам файл даних був актуальним."""
+        if self.key is None or not self.journal_path.exists():
+            return True
+        try:
+            with self.locked():
+                self._collect()
+                if self.journal_path.stat().st_size:
+                    self._write(self._load_state())
+            return True
+        except Exception as e:
+            print(f"Помилка збереження: {e}")
+            return False
+
+    def poll(self) -> Optional[Changes]:
+        """Зміни інших процесів після нашого останнього читання або None.
+
+        Якщо нічого не змінилося, коштує лише stat; інакше дочитується
+        тільки хвіст журналу (або весь стан, якщо знімок переписали).
+        """
+        if self.key is None:
+            return None
+        with self._guard:
+            if not self._unapplied and not self._unapplied_reset:
+                if not self.changed_on_disk():
+                    return None
+                try:
+                    with self.locked(exclusive=False):
+                        self._collect()
+                except Exception as e:
+                    print(f"Помилка завантаження: {e}")
+                    return None
+            if not self._unapplied and not self._unapplied_reset:
+                return None
+            upserts = [record for record in self._unapplied.values() if record is not None]
+            deletes = [key for key, record in self._unapplied.items() if record is None]
+            changes = Changes(upserts, deletes, self._unapplied_reset)
+            self._unapplied = {}
+            self._unapplied_reset = False
+            return changes
     
-    def load(self) -> List[Dict]:
-        if not self.filepath.exists():
+    def load(self, hydrate: Optional[Callable[[Dict], Any]] = None) -> List:
+        """Усі записи (знімок + журнал); з hydrate — одразу перетворені ним."""
+        if not self.has_data():
             return []
         
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                return data if isinstance(data, list) else []
+            with self.locked(exclusive=False):
+                self._unapplied = {}
+                self._unapplied_reset = False
+                return self._load_state(hydrate)
         except (json.JSONDecodeError, FileNotFoundError) as e:
             print(f"Помилка завантаження: {e}")
             return []
@@ -41,13 +348,49 @@ class Repository:
             print(f"Неочікувана помилка: {e}")
             return []
     
+    def export_json(self, data: List[Dict], path: Path) -> bool:
+        """Експорт записів у звичайний JSON (незалежно від формату сховища)."""
+        try:
+            write_atomic(Path(path), data)
+            return True
+        except Exception as e:
+            print(f"Помилка експорту: {e}")
+            return False
+
+    def import_json(self, path: Path) -> bool:
+        """Переносить дані з JSON-файлу (разом з його журналом) у це сховище."""
+        path = Path(path)
+        source = Repository(path.name, storage_dir=path.parent, key=self.key)
+        return self.save(source.load())
+
     def exists(self) -> bool:
         return self.filepath.exists()
+
+    def retire(self, suffix: str = ".migrated") -> bool:
+        """Після перенесення даних відкладає знімок і журнал (<файл><suffix>), щоб їх не імпортувати вдруге."""
+        try:
+            with self.locked():
+                for path in (self.filepath, self.journal_path):
+                    if path.exists():
+                        os.replace(path, path.with_name(path.name + suffix))
+                self._stamp = self._journal_stamp = None
+            return True
+        except OSError as e:
+            print(f"Помилка перейменування: {e}")
+            return False
+
+    def has_data(self) -> bool:
+        """Чи є на диску знімок або журнал змін."""
+        return self.exists() or (self.key is not None and self.journal_path.exists())
     
     def clear(self) -> bool:
         try:
             if self.exists():
-                self.filepath.unlink()
+                with self.locked():
+                    self.filepath.unlink()
+                    if self.key is not None and self.journal_path.exists():
+                        self.journal_path.unlink()
+                    self._stamp = self._journal_stamp = None
                 return True
             return False
         except Exception as e:
@@ -57,17 +400,86 @@ class Repository:
 
 class ContactRepository:
     
-    def __init__(self, filename: str = "contacts.json"):
-        self.repo = Repository(filename)
+    def __init__(self, filename: str = "contacts.json", storage_dir: Optional[Path] = None, binary: bool = False,
+                 shards: int = 0):
+        codec = ContactCodec if binary else None
+        if shards > 0:
+            # Шардоване сховище (storage.sharding): <назва>.shards/ з маніфестом
+            from .sharding import ShardedRepository
+            self.repo = ShardedRepository(Path(filename).stem, storage_dir=storage_dir, key='name',
+                                          codec=codec, shards=shards)
+        else:
+            self.repo = Repository(filename, storage_dir=storage_dir, key='name', codec=codec)
+        # Результати фонових записів; застосовуються до книги в refresh_book
+        self._completed = deque()
+        # history (storage.history.HistoryStore): збережені зміни потрапляють в історію версій
+        self.history = None
     
     def save_contacts(self, contacts: List) -> bool:
         data = [self._contact_to_dict(contact) for contact in contacts]
         return self.repo.save(data)
+
+    def load_book(self, book) -> None:
+        """Завантажує контакти в книгу; завантажене не вважається зміною."""
+        for contact in self.load_contacts():
+            book.add_record(contact)
+        book.clear_changes()
+
+    def sync_book(self, book) -> bool:
+        """Записує лише змінені, додані й видалені контакти і підтягує чужі зміни."""
+        upserts, deletes = book.changes()
+        saved = True
+        if upserts or deletes:
+            records = [self._contact_to_dict(contact) for contact in upserts]
+            saved = self.repo.append(records, deletes)
+            if saved:
+                self._stage_history(records, deletes)
+        # Поки наші зміни позначені незбереженими, вони мають пріоритет над чужими
+        self.refresh_book(book)
+        if saved:
+            book.clear_changes()
+        return saved
+
+    def delta_job(self, book) -> Optional[Job]:
+        """Завдання для конвеєра: дописати в журнал зміни книги (None — змін немає)."""
+        upserts, deletes = book.begin_save()
+        if not upserts and not deletes:
+            return None
+        records = [self._contact_to_dict(contact) for contact in upserts]
+        keys = [record['name'] for record in records] + deletes
+        self._stage_history(records, deletes)
+        return Job('delta', lambda: self.repo.append(records, deletes),
+                   lambda ok: self._completed.append((keys, ok)))
+
+    def snapshot_job(self, book) -> Job:
+        """Завдання для конвеєра: переписати сховище поточним станом книги."""
+        upserts, deletes = book.begin_save()
+        keys = [contact.name.value for contact in upserts] + deletes
+        records = [self._contact_to_dict(contact) for contact in book.records()]
+        self._stage_history(records, deletes)
+        return Job('snapshot', lambda: self.repo.save(records),
+                   lambda ok: self._completed.append((keys, ok)))
+
+    def _stage_history(self, records: List[Dict], deletes: List[str]):
+        if self.history is not None:
+            self.history.stage('contacts', records, deletes, key='name')
+
+    def refresh_book(self, book) -> bool:
+        """Підвантажує чужі зміни у книгу. Якщо файл не змінювався — лише stat."""
+        while self._completed:
+            book.end_save(*self._completed.popleft())
+        changes = self.repo.poll()
+        if changes is None:
+            return False
+        book.merge_external(changes.upserts, changes.deletes, changes.reset)
+        return True
     
+    def compact(self) -> bool:
+        return self.repo.compact()
+
     def load_contacts(self) -> List:
-        data = self.repo.load()
         from contacts.models import Contact
-        return [Contact.from_dict(contact_dict) for contact_dict in data]
+        return self.repo.load(Contact.from_dict)
     
     def _contact_to_dict(self, contact) -> Dict:
         if hasattr(contact, 'to_dict'):
@@ -81,29 +493,36 @@ class ContactRepository:
             'birthday': getattr(contact, 'birthday', None)
         }
     
+    def export_json(self, contacts: List, path: Path) -> bool:
+        return self.repo.export_json([self._contact_to_dict(contact) for contact in contacts], path)
+
     def clear(self) -> bool:
         return self.repo.clear()
 
 
 class NoteRepository:
     
-    def __init__(self, filename: str = "notes.json"):
-        self.repo = Repository(filename)
+    def __init__(self, filename: str = "notes.json", storage_dir: Optional[Path] = None, binary: bool = False):
+        codec = NoteCodec if binary else None
+        self.repo = Repository(filename, storage_dir=storage_dir, key='id', codec=codec)
     
     def save_notes(self, notes: List) -> bool:
         data = [self._note_to_dict(note) for note in notes]
         return self.repo.save(data)
     
+    def compact(self) -> bool:
+        return self.repo.compact()
+
     def load_notes(self) -> List:
-        data = self.repo.load()
         from notes.models import Note
-        return [Note.from_dict(note_dict) for note_dict in data]
+        return self.repo.load(Note.from_dict)
     
     def _note_to_dict(self, note) -> Dict:
         if hasattr(note, 'to_dict'):
             return note.to_dict()
         
         return {
+            'id': getattr(note, 'id', None),
             'text': getattr(note, 'text', ''),
             'tags': getattr(note, 'tags', [])
         }
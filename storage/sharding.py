@@ -0,0 +1,216 @@
+"""Шардоване сховище контактів для дуже великих книг.
+
+Записи розкладаються на N файлів за crc32 від імені без урахування
+регістру; кількість шардів і їхнє покоління зберігаються у manifest.json.
+Кожен шард — звичайний Repository зі своїм журналом, тож збереження
+торкається лише шардів зі зміненими контактами, а завантаження читає
+шарди паралельно в пулі потоків.
+
+Перерозподіл на іншу кількість шардів — офлайн (застосунок закритий):
+    python -m storage.sharding 32 [тека] [--binary]
+"""
+import argparse
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .binary import ContactCodec
+from .repo import Changes, Repository, file_lock, hydrate_each, write_atomic
+
+MANIFEST = "manifest.json"
+MAX_WORKERS = 8
+
+
+def shard_of(name: str, count: int) -> int:
+    return zlib.crc32(" ".join(name.split()).casefold().encode("utf-8")) % count
+
+
+class ShardedRepository:
+    """Той самий інтерфейс, що й у Repository (load/save/append/poll/...), поверх N шардів."""
+
+    def __init__(self, name: str, storage_dir: Optional[Path] = None, key: str = 'name', codec=None,
+                 shards: int = 16):
+        if storage_dir is None:
+            storage_dir = Path.home() / '.personal_assistant'
+        self.storage_dir = storage_dir
+        self.directory = storage_dir / f"{name}.shards"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.filepath = self.directory / MANIFEST
+        self.key = key
+        self.codec = codec
+        with file_lock(self.filepath):
+            manifest = self._read_manifest()
+            if manifest is None:
+                manifest = {"shards": shards, "generation": 0, "format": self._format(codec)}
+                write_atomic(self.filepath, manifest)
+        if manifest["format"] != self._format(codec):
+            raise ValueError(f"Шарди в {self.directory} збережено у форматі {manifest['format']}.")
+        self.count = manifest["shards"]
+        self.generation = manifest["generation"]
+        self.shards = self._open_shards(self.generation, self.count)
+        # Ключі кожного шарда — щоб перетворити повне перечитування шарда на видалення
+        self._keys: List[set] = [set() for _ in range(self.count)]
+
+    @staticmethod
+    def _format(codec) -> str:
+        return "json" if codec is None else "binary"
+
+    def _read_manifest(self) -> Optional[Dict]:
+        if not self.filepath.exists():
+            return None
+        with open(self.filepath, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def _open_shards(self, generation: int, count: int) -> List[Repository]:
+        suffix = "bin" if self.codec is not None else "json"
+        return [Repository(f"shard-{generation}-{index:03d}.{suffix}", storage_dir=self.directory,
+                           key=self.key, codec=self.codec)
+                for index in range(count)]
+
+    def _group(self, records: List[Dict]) -> Dict[int, List[Dict]]:
+        groups: Dict[int, List[Dict]] = {}
+        for record in records:
+            groups.setdefault(shard_of(record[self.key], self.count), []).append(record)
+        return groups
+
+    def _parallel(self, func, items):
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(items) or 1)) as pool:
+            return list(pool.map(func, items))
+
+    def load(self, hydrate: Optional[Callable[[Dict], Any]] = None) -> List:
+        def load_shard(shard):
+            # Словники тримаються лише для одного шарда, поки він перетворюється
+            records = shard.load()
+            keys = {record[self.key] for record in records}
+            if hydrate is not None:
+                records = [value for _, value in hydrate_each(records, hydrate, shard.filepath.name, self.key)]
+            return keys, records
+
+        result = []
+        for index, (keys, records) in enumerate(self._parallel(load_shard, self.shards)):
+            self._keys[index] = keys
+            result.extend(records)
+        return result
+
+    def save(self, data: List[Dict]) -> bool:
+        """Повністю переписує всі шарди."""
+        groups = self._group(data)
+        results = self._parallel(lambda index: self.shards[index].save(groups.get(index, [])), range(self.count))
+        for index in range(self.count):
+            self._keys[index] = {record[self.key] for record in groups.get(index, [])}
+        return all(results)
+
+    def append(self, upserts: List[Dict], deletes: List[str]) -> bool:
+        """Дописує зміни лише в журнали шардів, яких вони стосуються."""
+        groups = {index: (records, []) for index, records in self._group(upserts).items()}
+        for key in deletes:
+            groups.setdefault(shard_of(key, self.count), ([], []))[1].append(key)
+        saved = True
+        for index, (records, keys) in groups.items():
+            if self.shards[index].append(records, keys):
+                self._keys[index].update(record[self.key] for record in records)
+                self._keys[index].difference_update(keys)
+            else:
+                saved = False
+        return saved
+
+    def compact(self) -> bool:
+        return all(self._parallel(lambda shard: shard.compact(), self.shards))
+
+    def poll(self) -> Optional[Changes]:
+        """Зміни інших процесів у всіх шардах (повне перечитування шарда — як видалення зниклих)."""
+        upserts, deletes = [], []
+        for index, shard in enumerate(self.shards):
+            changes = shard.poll()
+            if changes is None:
+                continue
+            upserts.extend(changes.upserts)
+            deletes.extend(changes.deletes)
+            keys = self._keys[index]
+            if changes.reset:
+                present = {record[self.key] for record in changes.upserts}
+                deletes.extend(keys - present)
+                keys.intersection_update(present)
+            keys.update(record[self.key] for record in changes.upserts)
+            keys.difference_update(changes.deletes)
+        if not upserts and not deletes:
+            return None
+        return Changes(upserts, deletes)
+
+    def changed_on_disk(self) -> bool:
+        return any(shard.changed_on_disk() for shard in self.shards)
+
+    def export_json(self, data: List[Dict], path: Path) -> bool:
+        return self.shards[0].export_json(data, path)
+
+    def import_json(self, path: Path) -> bool:
+        path = Path(path)
+        return self.save(Repository(path.name, storage_dir=path.parent, key=self.key).load())
+
+    def exists(self) -> bool:
+        return any(shard.exists() for shard in self.shards)
+
+    def has_data(self) -> bool:
+        return any(shard.has_data() for shard in self.shards)
+
+    def clear(self) -> bool:
+        results = [shard.clear() for shard in self.shards]
+        self._keys = [set() for _ in range(self.count)]
+        return any(results)
+
+
+def _remove_shard_files(repo: Repository):
+    for path in (repo.filepath, repo.journal_path,
+                 repo.filepath.with_name(repo.filepath.name + '.lock')):
+        if path.exists():
+            os.unlink(path)
+
+
+def rebalance(name: str, count: int, storage_dir: Optional[Path] = None, codec=None) -> int:
+    """Перерозподіляє записи на count шардів (офлайн). Повертає кількість записів.
+
+    Якщо шардів ще немає, переносить дані зі звичайного файлу <name>.json/.bin
+    і перейменовує його на <name>.json.migrated.
+    """
+    if count < 1:
+        raise ValueError("Кількість шардів має бути додатною.")
+    source = ShardedRepository(name, storage_dir, codec=codec, shards=count)
+    with file_lock(source.filepath):
+        records = source.load()
+        if not records and not source.has_data():
+            single = Repository(f"{name}.{'bin' if codec else 'json'}", storage_dir=source.storage_dir,
+                                key=source.key, codec=codec)
+            records = single.load()
+        else:
+            single = None
+        old_shards = source.shards
+        source.generation += 1
+        source.count = count
+        source.shards = source._open_shards(source.generation, count)
+        source._keys = [set() for _ in range(count)]
+        if not source.save(records):
+            raise OSError("Не вдалося записати нові шарди.")
+        write_atomic(source.filepath, {"shards": count, "generation": source.generation,
+                                       "format": source._format(codec)})
+        for shard in old_shards:
+            _remove_shard_files(shard)
+        if single is not None:
+            single.retire()
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перерозподіл контактів на іншу кількість шардів.")
+    parser.add_argument("shards", type=int, help="нова кількість шардів")
+    parser.add_argument("directory", nargs="?", type=Path, default=Path.home() / ".personal_assistant")
+    parser.add_argument("--binary", action="store_true", help="шарди у бінарному форматі")
+    args = parser.parse_args(argv)
+    count = rebalance("contacts", args.shards, args.directory, ContactCodec if args.binary else None)
+    print(f"Перерозподілено контактів: {count} на {args.shards} шардів.")
+
+
+if __name__ == "__main__":
+    main()
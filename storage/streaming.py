@@ -0,0 +1,77 @@
+"""Потокове читання JSON-масиву записів (формат звичайного файлу сховища).
+
+json.load тримає в пам'яті весь текст файлу й усі словники одночасно, а
+вже потім з них будуються контакти чи нотатки — пік пам'яті кілька разів
+перевищує розмір завантажених даних. iter_json_array читає файл шматками
+по chunk_size символів і розбирає по одному елементу через
+JSONDecoder.raw_decode: у пам'яті лише буфер (шматок + поточний запис)
+і вже оброблені елементи.
+
+Пошкоджений запис зупиняє читання з JSONDecodeError, але всі попередні
+елементи на той момент уже віддані.
+"""
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(file: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Елементи JSON-масиву з file по одному; не масив — порожньо."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size)
+    eof = not buffer
+    pos = 0
+
+    def fill() -> bool:
+        # Дочитує шматок, відкидаючи вже розібраний початок буфера
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip() -> str:
+        # Перший символ після пробілів ("" — кінець файлу)
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or not fill():
+                return buffer[pos:pos + 1]
+
+    # BOM, який лишають деякі редактори
+    if buffer.startswith("\ufeff"):
+        pos = 1
+    if skip() != "[":
+        return
+    pos += 1
+    if skip() == "]":
+        return
+    while True:
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Запис не вмістився в буфер — дочитуємо; інакше він справді пошкоджений
+            if fill():
+                continue
+            raise
+        if end == len(buffer) and fill():
+            # Число могло обірватися на межі шматка — розбираємо ще раз з продовженням
+            continue
+        pos = end
+        yield value
+        separator = skip()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise json.JSONDecodeError("Очікувалася кома між записами", buffer, pos)
+        pos += 1
+        skip()
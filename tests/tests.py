@@ -6,18 +6,39 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import tempfile
 import shutil
+import threading
+import unittest.mock
+import asyncio
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from cli.completion import Completer
+from contacts.cache import ContactCache
 from contacts.validators import ContactValidator
+from contacts.query import QueryError, parse_query
+from contacts.reminders import BirthdayScheduler, congratulation_date, next_birthday
 from contacts.models import Field, Name, Phone, Email, Address, Birthday, Contact, AddressBook
 from contacts.services import (
     add_contact, change_contact, search_contacts, show_birthdays,
-    show_contact_info, show_all, delete_contact, add_birthday
+    show_contact_info, show_all, delete_contact, add_birthday,
+    show_duplicates, merge_contacts
 )
 from notes.models import Note
+from notes.dedup import NoteDuplicateIndex
+from notes.search import snippet
 from notes.services import NoteService
 from storage.repo import Repository, ContactRepository, NoteRepository
+from storage.binary import ContactCodec, NoteCodec, SnapshotReader, write_snapshot
+from storage.history import HistoryStore
+from storage.pipeline import BackgroundPipeline, Job, PersistencePipeline
+from storage.sharding import ShardedRepository, rebalance, shard_of
+from storage.streaming import iter_json_array
+from utils.locks import RWLock
+from utils.normalize import canonical, fold_text, word_tokens
+from utils.cache import ResultCache
+from utils.sortedlist import SortedList
+from utils.translit import translit_tokens, transliterate
+from utils.trie import Trie
 
 
 class TestContactValidators(unittest.TestCase):
@@ -76,6 +97,43 @@ class TestContactValidators(unittest.TestCase):
         with self.assertRaises(TypeError):
             ContactValidator.validate_birthday(19900101)
 
+    def test_validate_birthday_unpadded(self):
+        self.assertEqual(ContactValidator.validate_birthday("1.2.1990"), datetime(1990, 2, 1).date())
+        with self.assertRaises(ValueError) as ctx:
+            ContactValidator.validate_birthday("01.01.90")
+        self.assertIn("ДД.ММ.РРРР", str(ctx.exception))
+
+    def test_cached_values_stay_correct(self):
+        for _ in range(3):
+            self.assertEqual(ContactValidator.validate_phone("+38(050)123-45-67"), "380501234567")
+            with self.assertRaises(ValueError):
+                ContactValidator.validate_email("user..name@example.com")
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime("%d.%m.%Y")
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                ContactValidator.validate_birthday(tomorrow)
+
+    def test_validate_many(self):
+        self.assertEqual(ContactValidator.validate_many('phone', ["123-456-7890", "0501234567"]),
+                         ["1234567890", "0501234567"])
+        self.assertEqual(ContactValidator.validate_many('email', []), [])
+        with self.assertRaises(ValueError):
+            ContactValidator.validate_many('email', ["a@b.com", "bad"])
+        with self.assertRaises(KeyError):
+            ContactValidator.validate_many('address', ["Київ"])
+
+    def test_validate_many_checks_each_distinct_value_once(self):
+        from contacts import validators
+        validators.clear_caches()
+        dates = ["01.02.1990", "01.02.1990", "03.04.1985"]
+        self.assertEqual(ContactValidator.validate_many('birthday', dates)[1].year, 1990)
+        self.assertEqual(validators._parse_date.cache_info().misses, 2)
+        with self.assertRaises(TypeError):
+            ContactValidator.validate_many('phone', ["0501234567", None])
+        future = (datetime.now() + timedelta(days=400)).strftime("%d.%m.%Y")
+        with self.assertRaises(ValueError):
+            ContactValidator.validate_many('birthday', ["01.02.1990", future])
+
 
 class TestContactModels(unittest.TestCase):
     
@@ -603,5 +661,1616 @@ class TestNoteRepository(unittest.TestCase):
         self.assertTrue(result)
 
 
+class TestConcurrency(unittest.TestCase):
+
+    def _run_threads(self, target, count=8):
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_rwlock_readers_run_in_parallel(self):
+        lock = RWLock()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def read(_):
+            with lock.read_locked():
+                barrier.wait()  # обидва читачі мають бути всередині одночасно
+
+        self._run_threads(read, count=2)
+        self.assertFalse(barrier.broken)
+
+    def test_rwlock_writer_excludes_readers(self):
+        lock = RWLock()
+        inside = []
+
+        def write(i):
+            for _ in range(200):
+                with lock.write_locked():
+                    inside.append(i)
+                    self.assertEqual(len(inside), 1)
+                    inside.pop()
+
+        self._run_threads(write)
+
+    def test_rwlock_reentrant(self):
+        lock = RWLock()
+        with lock.write_locked():
+            with lock.read_locked():
+                with lock.write_locked():
+                    pass
+        with lock.read_locked():
+            with lock.read_locked():
+                with self.assertRaises(RuntimeError):
+                    lock.acquire_write()
+
+    def test_address_book_no_lost_updates(self):
+        book = AddressBook(thread_safe=True)
+
+        def work(i):
+            for j in range(200):
+                book.add_record(Contact(f"User{i}_{j}"))
+                book.search("user")
+                book.find(f"User{i}_{j}")
+
+        self._run_threads(work)
+        self.assertEqual(len(book.data), 8 * 200)
+
+    def test_address_book_concurrent_delete(self):
+        book = AddressBook(thread_safe=True)
+        for i in range(400):
+            book.add_record(Contact(f"User{i}"))
+
+        def work(i):
+            for j in range(i, 400, 8):
+                self.assertIn("видалено", book.delete(f"user{j}"))
+                book.get_upcoming_birthdays(7)
+
+        self._run_threads(work)
+        self.assertEqual(len(book.data), 0)
+
+    def test_note_service_no_lost_updates(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            service = NoteService(os.path.join(temp_dir, "notes.json"), thread_safe=True)
+
+            def work(i):
+                for j in range(25):
+                    service.create(f"Note {i}-{j}", [f"t{i}"])
+                    service.search(keywords=["note"])
+
+            self._run_threads(work)
+            self.assertEqual(len(service.read()), 8 * 25)
+            self.assertEqual(len(NoteService(service.filename).notes), 8 * 25)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestMultiProcessStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _open_book(self):
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        book = AddressBook()
+        repo.load_book(book)
+        return book, repo
+
+    def test_changed_on_disk_detects_foreign_write(self):
+        repo_a = Repository("data.json", storage_dir=self.temp_dir)
+        repo_b = Repository("data.json", storage_dir=self.temp_dir)
+        repo_a.save([{"a": 1}])
+        self.assertFalse(repo_a.changed_on_disk())
+        repo_b.save([{"a": 2}])
+        self.assertTrue(repo_a.changed_on_disk())
+        repo_a.load()
+        self.assertFalse(repo_a.changed_on_disk())
+
+    def test_concurrent_adds_are_merged(self):
+        book_a, repo_a = self._open_book()
+        book_b, repo_b = self._open_book()
+        book_a.add_record(Contact("Anna"))
+        repo_a.sync_book(book_a)
+        book_b.add_record(Contact("Bohdan"))
+        repo_b.sync_book(book_b)
+
+        self.assertIn("Anna", book_b.data)
+        names = [contact.name.value for contact in repo_a.load_contacts()]
+        self.assertEqual(sorted(names), ["Anna", "Bohdan"])
+
+    def test_foreign_delete_and_edit_are_kept(self):
+        book_a, repo_a = self._open_book()
+        book_a.add_record(Contact("Anna"))
+        book_a.add_record(Contact("Bohdan"))
+        repo_a.sync_book(book_a)
+        book_b, repo_b = self._open_book()
+
+        book_a.delete("Anna")
+        book_a.find("Bohdan").edit_field("email", "b@example.com")
+        repo_a.sync_book(book_a)
+
+        self.assertTrue(repo_b.refresh_book(book_b))
+        self.assertNotIn("Anna", book_b.data)
+        self.assertEqual(book_b.find("Bohdan").email.value, "b@example.com")
+
+    def test_refresh_without_changes_does_not_read(self):
+        book, repo = self._open_book()
+        book.add_record(Contact("Anna"))
+        repo.sync_book(book)
+        with unittest.mock.patch.object(repo.repo, "_read") as read:
+            self.assertFalse(repo.refresh_book(book))
+            read.assert_not_called()
+
+    def test_note_services_merge_by_id(self):
+        filename = str(self.temp_dir / "notes.json")
+        service_a = NoteService(filename)
+        service_b = NoteService(filename)
+        service_a.create("From A")
+        service_b.create("From B")
+        self.assertEqual([note.text for note in service_b.notes], ["From B", "From A"])
+        self.assertTrue(service_a.refresh())
+        self.assertEqual(len(service_a.notes), 2)
+
+    def test_legacy_notes_without_id(self):
+        filename = self.temp_dir / "notes.json"
+        filename.write_text(json.dumps([{"text": "Old", "tags": []}]), encoding="utf-8")
+        service = NoteService(str(filename))
+        self.assertEqual(service.notes[0].id, "legacy-0")
+
+
+class TestDirtyTracking(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.book = AddressBook()
+        self.contact = Contact("John")
+        self.contact.add_phone("1234567890")
+        self.book.add_record(self.contact)
+        self.book.clear_changes()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_contact_mutations_mark_dirty(self):
+        mutations = [
+            lambda c: c.add_phone("0987654321"),
+            lambda c: c.edit_phone("1234567890", "1112223334"),
+            lambda c: c.edit_field("email", "john@example.com"),
+            lambda c: setattr(c.phones[0], "value", "5556667778"),
+        ]
+        for mutate in mutations:
+            mutate(self.contact)
+            self.assertTrue(self.contact._dirty)
+            upserts, deletes = self.book.changes()
+            self.assertEqual(upserts, [self.contact])
+            self.assertEqual(deletes, [])
+            self.book.clear_changes()
+            self.assertFalse(self.contact._dirty)
+
+    def test_add_and_delete_are_tracked(self):
+        self.book.add_record(Contact("Jane"))
+        self.book.delete("john")
+        upserts, deletes = self.book.changes()
+        self.assertEqual([c.name.value for c in upserts], ["Jane"])
+        self.assertEqual(deletes, ["John"])
+
+    def test_rename_through_field_setter_rekeys(self):
+        self.contact.name.value = "Johnny"
+        self.assertIn("Johnny", self.book.data)
+        self.assertNotIn("John", self.book.data)
+        upserts, deletes = self.book.changes()
+        self.assertEqual(upserts, [self.contact])
+        self.assertEqual(deletes, ["John"])
+
+    def test_note_edit_registers_with_service(self):
+        service = NoteService(str(self.temp_dir / "notes.json"))
+        note = service.create("Text")
+        self.assertEqual(service.changes(), ([], []))
+        note.edit(new_text="Changed")
+        self.assertTrue(note._dirty)
+        self.assertEqual(service.changes(), ([note], []))
+
+    def test_save_writes_only_change_set(self):
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        book = AddressBook()
+        for i in range(50):
+            book.add_record(Contact(f"User{i}"))
+        repo.save_contacts(book.records())
+        book.clear_changes()
+        snapshot = repo.repo.filepath.stat().st_mtime_ns
+
+        book.find("User7").edit_field("email", "u7@example.com")
+        book.delete("User8")
+        self.assertTrue(repo.sync_book(book))
+
+        lines = repo.repo.journal_path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(repo.repo.filepath.stat().st_mtime_ns, snapshot)
+        self.assertEqual(book.changes(), ([], []))
+
+        loaded = {c.name.value: c for c in repo.load_contacts()}
+        self.assertEqual(len(loaded), 49)
+        self.assertEqual(loaded["User7"].email.value, "u7@example.com")
+
+    def test_journal_compaction(self):
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        repo.repo.journal_limit = 200
+        book = AddressBook()
+        for i in range(20):
+            book.add_record(Contact(f"User{i}"))
+            repo.sync_book(book)
+        self.assertLess(repo.repo.journal_path.stat().st_size, 200)
+        self.assertEqual(len(repo.load_contacts()), 20)
+
+    def test_compact_folds_journal_into_snapshot(self):
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        self.book.add_record(Contact("Jane", email="jane@example.com"))
+        repo.sync_book(self.book)
+        self.assertTrue(repo.repo.journal_path.stat().st_size)
+        self.assertTrue(repo.compact())
+        self.assertEqual(repo.repo.journal_path.stat().st_size, 0)
+        with open(repo.repo.filepath, encoding="utf-8") as file:
+            self.assertIn("jane@example.com", file.read())
+        self.assertEqual([c.name.value for c in repo.load_contacts()], ["Jane"])
+
+    def test_journal_compacts_at_fraction_of_snapshot(self):
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        repo.repo.journal_limit = 0
+        book = AddressBook()
+        book.add_many([{"name": f"User{i}", "phones": []} for i in range(40)])
+        repo.sync_book(book)
+        repo.compact()
+        snapshot = repo.repo.filepath.stat().st_size
+        for i in range(40):
+            book.find(f"User{i}").edit_field("email", f"u{i}@example.com")
+            repo.sync_book(book)
+        self.assertLessEqual(repo.repo.journal_path.stat().st_size, snapshot * repo.repo.journal_ratio + 200)
+        self.assertGreater(repo.repo.filepath.stat().st_size, snapshot)
+
+    def test_torn_journal_line_is_ignored(self):
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        self.book.add_record(Contact("Jane"))
+        repo.sync_book(self.book)
+        with open(repo.repo.journal_path, "a", encoding="utf-8") as file:
+            file.write('{"put": {"name": "Bro')
+        self.assertEqual([c.name.value for c in repo.load_contacts()], ["Jane"])
+        self.book.add_record(Contact("Kate"))
+        repo.sync_book(self.book)
+        self.assertEqual(len(repo.load_contacts()), 2)
+
+
+class TestBinarySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.contacts = [
+            {"name": "Ольга", "phones": ["0501234567", "380671112233"], "email": "olha@example.com",
+             "address": "Київ, Хрещатик 1", "birthday": "29.02.1992"},
+            {"name": "John", "phones": [], "email": "john@example.com", "address": None, "birthday": None},
+            {"name": "Jane", "phones": ["1234567890"], "email": None, "address": None, "birthday": "01.01.1990"},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, records, codec, name="data.bin"):
+        path = self.temp_dir / name
+        with open(path, "wb") as file:
+            write_snapshot(file, records, codec)
+        return path
+
+    def test_contacts_round_trip(self):
+        path = self._write(self.contacts, ContactCodec)
+        with SnapshotReader(path, ContactCodec) as reader:
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(list(reader), self.contacts)
+            self.assertEqual(reader[2], self.contacts[2])
+            self.assertEqual(reader.strings, ["example.com"])
+
+    def test_notes_round_trip(self):
+        notes = [{"id": "a1", "text": "Купити хліб", "tags": ["дім", "покупки"]},
+                 {"id": "b2", "text": "Call mom", "tags": ["дім"]}]
+        path = self._write(notes, NoteCodec)
+        with SnapshotReader(path, NoteCodec) as reader:
+            self.assertEqual(list(reader), notes)
+            self.assertEqual(reader[-1], notes[1])
+
+    def test_binary_is_smaller_than_json(self):
+        records = self.contacts * 100
+        binary_path = self._write(records, ContactCodec)
+        json_path = self.temp_dir / "data.json"
+        Repository("data.json", storage_dir=self.temp_dir).save(records)
+        self.assertLess(binary_path.stat().st_size, json_path.stat().st_size / 2)
+
+    def test_wrong_kind_is_rejected(self):
+        path = self._write(self.contacts, ContactCodec)
+        with self.assertRaises(ValueError):
+            SnapshotReader(path, NoteCodec)
+
+    def test_binary_repository_with_journal_and_export(self):
+        repo = ContactRepository("contacts.bin", storage_dir=self.temp_dir, binary=True)
+        repo.repo.save(self.contacts)
+        book = AddressBook()
+        repo.load_book(book)
+        book.find("John").add_phone("0987654321")
+        repo.sync_book(book)
+
+        reloaded = ContactRepository("contacts.bin", storage_dir=self.temp_dir, binary=True)
+        contacts = {c.name.value: c for c in reloaded.load_contacts()}
+        self.assertEqual([p.value for p in contacts["John"].phones], ["0987654321"])
+
+        target = self.temp_dir / "export.json"
+        self.assertTrue(repo.export_json(book.records(), target))
+        exported = json.loads(target.read_text(encoding="utf-8"))
+        self.assertEqual(len(exported), 3)
+
+    def test_cli_flushes_queued_saves_after_an_error(self):
+        from cli import commands
+        home = self.temp_dir / "home"
+        inputs = iter(["add Olena 0501234567"])
+
+        def prompt(text, mode=None):
+            for line in inputs:
+                return line
+            raise RuntimeError("збій")
+
+        with unittest.mock.patch.dict(os.environ, {"HOME": str(home)}), \
+                unittest.mock.patch.object(commands, "ASYNC_SAVES", True), \
+                unittest.mock.patch.object(commands, "REMINDERS", False), \
+                unittest.mock.patch.object(commands.completion, "prompt", prompt), \
+                unittest.mock.patch("builtins.print"):
+            with self.assertRaises(RuntimeError):
+                commands.run_cli()
+        saved = ContactRepository("contacts.json", storage_dir=home / ".personal_assistant").load_contacts()
+        self.assertEqual([c.name.value for c in saved], ["Olena"])
+
+    def test_export_command_reports_bad_target(self):
+        from cli.commands import export_data
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        notes = NoteService(filename=str(self.temp_dir / "notes.json"))
+        blocker = self.temp_dir / "file.txt"
+        blocker.write_text("", encoding="utf-8")
+        result = export_data([str(blocker / "sub")], AddressBook(), repo, notes)
+        self.assertTrue(result.startswith("Помилка експорту"))
+
+
+class TestMappedNoteStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.filename = str(self.temp_dir / "notes.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _service(self):
+        service = NoteService(self.filename, mapped=True)
+        self.addCleanup(service.store.close)
+        return service
+
+    def test_texts_are_read_lazily_after_save(self):
+        service = self._service()
+        service.create("Перша нотатка", ["a"])
+        service.create("Second note", ["b"])
+        self.assertTrue(all(note._text is None for note in service.notes))
+        self.assertEqual(service.notes[0].text, "Перша нотатка")
+
+        reloaded = self._service()
+        self.assertEqual([note.text for note in reloaded.notes], ["Перша нотатка", "Second note"])
+        self.assertEqual(reloaded.sort_by_tag("b")[0].text, "Second note")
+        self.assertEqual(len(reloaded.search(keywords=["нотатка"])), 1)
+
+    def test_listing_does_not_pin_mapped_texts(self):
+        service = self._service()
+        service.create("Перша нотатка", ["a"])
+        reloaded = self._service()
+        self.assertEqual([str(note) for note in reloaded.notes], ["Перша нотатка [теги: a]"])
+        self.assertTrue(all(note._text is None and note._rendered is None for note in reloaded.notes))
+        note = Note("У пам'яті", ["b"])
+        self.assertIs(str(note), str(note))
+
+    def test_edit_and_delete(self):
+        service = self._service()
+        service.create("One", ["x"])
+        service.create("Two")
+        service.update(0, new_text="One edited")
+        service.update(1, new_tags=["y"])
+        service.delete(0)
+
+        reloaded = self._service()
+        self.assertEqual(len(reloaded.notes), 1)
+        self.assertEqual(reloaded.notes[0].text, "Two")
+        self.assertEqual(reloaded.notes[0].tags, ["y"])
+
+    def test_compaction_drops_old_versions(self):
+        service = self._service()
+        service.store.compact_threshold = 0
+        service.create("x" * 100)
+        for i in range(5):
+            service.update(0, new_text=f"version {i}")
+        self.assertEqual(service.store.data_path.stat().st_size, len("version 4"))
+        self.assertEqual(self._service().notes[0].text, "version 4")
+
+    def test_two_processes_merge(self):
+        service_a = self._service()
+        service_b = self._service()
+        service_a.create("From A")
+        service_b.create("From B")
+        self.assertEqual(sorted(note.text for note in service_b.notes), ["From A", "From B"])
+        self.assertTrue(service_a.refresh())
+        self.assertEqual(len(service_a.notes), 2)
+
+    def test_import_from_json(self):
+        NoteService(self.filename).create("Legacy", ["old"])
+        service = self._service()
+        self.assertEqual(service.notes[0].text, "Legacy")
+        self.assertTrue(service.store.exists())
+
+
+class TestRenderCache(unittest.TestCase):
+
+    def test_contact_str_cached_until_change(self):
+        contact = Contact("Іван", email="ivan@example.com")
+        contact.add_phone("0501234567")
+        first = str(contact)
+        self.assertIs(str(contact), first)
+        contact.edit_phone("0501234567", "0671234567")
+        self.assertIn("0671234567", str(contact))
+        contact.edit_field('address', "Київ")
+        self.assertIn("Адреса: Київ", str(contact))
+        contact.name.value = "Петро"
+        self.assertIn("Ім'я: Петро", str(contact))
+
+    def test_note_str_cached_until_edit(self):
+        note = Note("Купити хліб", ["дім"])
+        first = str(note)
+        self.assertEqual(first, "Купити хліб [теги: дім]")
+        self.assertIs(str(note), first)
+        note.edit(new_tags=["дім", "магазин"])
+        self.assertEqual(str(note), "Купити хліб [теги: дім, магазин]")
+        note.edit(new_text="Купити молоко", new_tags=[])
+        self.assertEqual(str(note), "Купити молоко")
+
+
+class TestDeduplication(unittest.TestCase):
+
+    def setUp(self):
+        self.book = AddressBook()
+        first = Contact("Іван", email="ivan@example.com")
+        first.add_phone("0501234567")
+        second = Contact("іван ", address="Київ")
+        third = Contact("Петро", birthday="01.01.1990")
+        third.add_phone("+38(050)123-45-67")
+        other = Contact("Марія", email="maria@example.com")
+        for contact in (first, second, third, other):
+            self.book[contact.name.value] = contact
+
+    def test_find_duplicates_clusters(self):
+        groups = self.book.find_duplicates()
+        self.assertEqual([[c.name.value for c in group] for group in groups],
+                         [["Іван", "іван ", "Петро"]])
+
+    def test_find_duplicates_by_email(self):
+        copy = Contact("Марійка", email="MARIA@example.com")
+        self.book[copy.name.value] = copy
+        names = [[c.name.value for c in group] for group in self.book.find_duplicates()]
+        self.assertIn(["Марія", "Марійка"], names)
+
+    def test_merge_combines_fields(self):
+        primary = self.book.merge(["Іван", "іван ", "Петро"])
+        self.assertEqual(list(self.book.data), ["Іван", "Марія"])
+        self.assertEqual([p.value for p in primary.phones], ["0501234567"])
+        self.assertEqual(primary.email.value, "ivan@example.com")
+        self.assertEqual(primary.address.value, "Київ")
+        self.assertEqual(str(primary.birthday), "01.01.1990")
+        upserts, deleted = self.book.changes()
+        self.assertEqual(sorted(deleted), ["Петро", "іван "])
+        self.assertIn(primary, upserts)
+
+    def test_merge_command(self):
+        listing = merge_contacts([], self.book)
+        self.assertIn("1. Іван, іван , Петро", listing)
+        self.assertEqual(len(self.book), 4)
+        self.assertIn("Групи #2 немає", merge_contacts(["#2"], self.book))
+        for names in (["Марія", "Марія"], ["Марія", "марія"]):
+            self.assertEqual(merge_contacts(names, self.book),
+                             "Контакт 'Марія' вказано кілька разів: контакт не можна злити з самим собою.")
+        with self.assertRaises(ValueError):
+            self.book.merge(["Марія", "Марія"])
+        self.assertEqual(len(self.book), 4)
+        self.assertEqual(merge_contacts(["#1"], self.book), "Об'єднано контакти: Іван.")
+        self.assertEqual(show_duplicates([], self.book), "Дублікатів не знайдено.")
+        self.assertEqual(merge_contacts(["Марія", "Нема"], self.book), "Нема не знайдено.")
+
+    def test_add_contact_skips_existing_phone(self):
+        result = add_contact(["Іван", "+380501234567"], self.book)
+        self.assertIn("вже є", result)
+        self.assertEqual(len(self.book.find("Іван").phones), 1)
+
+
+class TestEmailIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.book = AddressBook()
+        for name, email in (("Іван", "ivan@example.com"), ("Петро", "petro@Example.com"), ("Марія", "maria@ukr.net")):
+            contact = Contact(name, email=email)
+            self.book.add_record(contact)
+
+    def names(self, records):
+        return sorted(record.name.value for record in records)
+
+    def test_lookup_by_email_and_domain(self):
+        self.assertEqual(self.names(self.book.lookup('email', "IVAN@example.com")), ["Іван"])
+        self.assertEqual(self.names(self.book.lookup('domain', "example.com")), ["Іван", "Петро"])
+        self.assertEqual(self.book.lookup('domain', "gmail.com"), [])
+
+    def test_indexes_follow_edits_and_deletes(self):
+        self.book.find("Іван").edit_field('email', "ivan@ukr.net")
+        self.assertEqual(self.names(self.book.lookup('domain', "ukr.net")), ["Іван", "Марія"])
+        self.assertEqual(self.book.lookup('email', "ivan@example.com"), [])
+        self.book.delete("Марія")
+        self.assertEqual(self.names(self.book.lookup('domain', "@ukr.net")), ["Іван"])
+        self.book.find("Іван").name.value = "Іванко"
+        self.assertEqual(self.names(self.book.lookup('email', "ivan@ukr.net")), ["Іванко"])
+
+    def test_search_filters_combine_with_text(self):
+        self.assertEqual(self.names(self.book.search("domain:example.com")), ["Іван", "Петро"])
+        self.assertEqual(self.names(self.book.search("domain:example.com пет")), ["Петро"])
+        self.assertEqual(self.book.search("email:maria@ukr.net domain:example.com"), [])
+        result = search_contacts(["domain:ukr.net"], self.book)
+        self.assertIn("Марія", result)
+
+
+class TestQueryLanguage(unittest.TestCase):
+
+    def setUp(self):
+        self.book = AddressBook()
+        rows = (
+            ("Іван", "0501234567", "ivan@example.com", "Київ, вул. Шевченка 1", "15.03.1990"),
+            ("Іванна", "0671234567", "ivanna@ukr.net", None, "02.03.1985"),
+            ("Петро", "380501112233", "petro@example.com", "Львів", None),
+        )
+        for name, phone, email, address, birthday in rows:
+            contact = Contact(name, address=address, email=email, birthday=birthday)
+            contact.add_phone(phone)
+            self.book.add_record(contact)
+
+    def names(self, query):
+        return sorted(record.name.value for record in self.book.search(query))
+
+    def test_prefix_without_digits_does_not_match_every_phone(self):
+        anna = Contact("Anna")
+        anna.add_phone("0931234567")
+        self.book.add_record(anna)
+        self.assertEqual(self.names("an*"), ["Anna"])
+        self.assertEqual(self.names("Іва*"), ["Іван", "Іванна"])
+        self.assertEqual(self.names("phone:abc*"), [])
+        self.assertEqual(self.names("050*"), ["Іван", "Петро"])
+
+    def test_field_filters(self):
+        self.assertEqual(self.names("name:іван"), ["Іван"])
+        self.assertEqual(self.names("name:Іва*"), ["Іван", "Іванна"])
+        self.assertEqual(self.names("phone:050*"), ["Іван", "Петро"])
+        self.assertEqual(self.names('phone:"+38(050)111-22-33"'), ["Петро"])
+        self.assertEqual(self.names("birthday:3"), ["Іван", "Іванна"])
+        self.assertEqual(self.names('address:"вул. шевченка"'), ["Іван"])
+
+    def test_boolean_operators(self):
+        self.assertEqual(self.names("birthday:03 AND domain:example.com"), ["Іван"])
+        self.assertEqual(self.names("domain:ukr.net OR address:Львів"), ["Іванна", "Петро"])
+        self.assertEqual(self.names("name:Іва* NOT (phone:067* OR address:Львів)"), ["Іван"])
+        self.assertEqual(self.names("NOT domain:example.com"), ["Іванна"])
+        self.assertEqual(self.names("іва"), ["Іван", "Іванна"])
+
+    def test_planner_uses_most_selective_index(self):
+        query = parse_query("domain:example.com name:Петро пет")
+        indexes = self.book._indexes
+        self.assertEqual(query.candidates(indexes), {"Петро"})
+        self.assertFalse(query.exact(indexes))
+        self.assertIsNone(parse_query("NOT name:Іван").candidates(indexes))
+
+    def test_indexes_stay_in_sync(self):
+        self.book.find("Іванна").add_phone("0509998877")
+        self.assertEqual(self.names("phone:0509998877"), ["Іванна"])
+        self.book.delete("Петро")
+        self.assertEqual(self.names("phone:050*"), ["Іван", "Іванна"])
+
+    def test_syntax_errors(self):
+        with self.assertRaises(QueryError):
+            parse_query("(name:Іван")
+        with self.assertRaises(QueryError):
+            parse_query("name:Іван OR")
+        self.assertIn("Помилка в запиті", search_contacts(["name:"], self.book))
+
+
+class TestAddressIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.book = AddressBook()
+        for name, address in (("Іван", "м. Київ, вул. Шевченка 12, 01001"),
+                              ("Олена", "Ки́їв, просп. Перемоги 5"),
+                              ("Анна", "Kraków, ul. Łódzka 3"),
+                              ("Петро", None)):
+            self.book.add_record(Contact(name, address=address))
+
+    def names(self, records):
+        return sorted(record.name.value for record in records)
+
+    def test_fold_text_and_tokens(self):
+        self.assertEqual(word_tokens("Ки́їв, вул. Шевченка 12"), ["київ", "вул", "шевченка", "12"])
+        self.assertEqual(word_tokens("KRAKÓW Łódź"), ["krakow", "lodz"])
+        self.assertEqual(fold_text("Пʼятихатки"), fold_text("П'ятихатки"))
+
+    def test_locality_lookup(self):
+        self.assertEqual(self.names(self.book.lookup('address', "київ")), ["Іван", "Олена"])
+        self.assertEqual(self.names(self.book.lookup('address', "Krakow")), ["Анна"])
+        self.assertEqual(self.names(self.book.lookup('address', "01001")), ["Іван"])
+        self.assertEqual(self.names(self.book.search("address:Шевч*")), ["Іван"])
+        self.assertEqual(self.names(self.book.search('address:"київ перемоги"')), ["Олена"])
+
+    def test_index_follows_edit_field(self):
+        self.book.find("Петро").edit_field('address', "Львів, пл. Ринок 1")
+        self.book.find("Іван").edit_field('address', "Львів")
+        self.assertEqual(self.names(self.book.lookup('address', "львів")), ["Іван", "Петро"])
+        self.assertEqual(self.names(self.book.lookup('address', "київ")), ["Олена"])
+
+
+class TestPersistencePipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _open_book(self):
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        book = AddressBook()
+        repo.load_book(book)
+        return book, repo
+
+    def test_jobs_run_in_order_and_snapshot_supersedes_deltas(self):
+        log = []
+
+        def job(kind, name):
+            return Job(kind, lambda: log.append(name) or True, lambda ok: log.append((name, ok)))
+
+        async def scenario():
+            pipeline = PersistencePipeline(maxsize=8)
+            await pipeline.submit("a", job('delta', "d1"))
+            await pipeline.flush()
+            for item in (job('delta', "d2"), job('delta', "d3"), job('snapshot', "s1"), job('delta', "d4")):
+                await pipeline.submit("a", item)
+            await pipeline.submit("b", Job('delta', lambda: False))
+            ok = await pipeline.close()
+            return ok
+
+        self.assertFalse(asyncio.run(scenario()))
+        self.assertEqual(log[:2], ["d1", ("d1", True)])
+        self.assertEqual(log[2:], ["s1", ("s1", True), "d4", ("d4", True), ("d2", True), ("d3", True)])
+
+    def test_background_contact_saves(self):
+        book, repo = self._open_book()
+        pipeline = BackgroundPipeline(maxsize=2)
+        try:
+            for name in ("Anna", "Bohdan", "Vira"):
+                book.add_record(Contact(name))
+                pipeline.submit("contacts", repo.delta_job(book))
+            self.assertIsNone(repo.delta_job(book))
+            self.assertTrue(pipeline.flush())
+        finally:
+            pipeline.close()
+        self.assertEqual(book.pending_keys(), {"Anna", "Bohdan", "Vira"})
+        repo.refresh_book(book)
+        self.assertEqual(book.pending_keys(), set())
+        other, _ = self._open_book()
+        self.assertEqual(sorted(other.data), ["Anna", "Bohdan", "Vira"])
+
+    def test_failed_background_save_is_retried(self):
+        book, repo = self._open_book()
+        book.add_record(Contact("Anna"))
+        job = repo.delta_job(book)
+        job.done(False)
+        repo.refresh_book(book)
+        upserts, _ = book.changes()
+        self.assertEqual([contact.name.value for contact in upserts], ["Anna"])
+
+    def test_inflight_changes_win_over_foreign_ones(self):
+        book_a, repo_a = self._open_book()
+        book_b, repo_b = self._open_book()
+        book_a.add_record(Contact("Anna", address="Київ"))
+        job = repo_a.delta_job(book_a)
+        book_b.add_record(Contact("Anna", address="Львів"))
+        repo_b.sync_book(book_b)
+        repo_a.refresh_book(book_a)
+        self.assertEqual(book_a["Anna"].address.value, "Київ")
+        job.done(job.run())
+        repo_a.refresh_book(book_a)
+        self.assertEqual(book_a["Anna"].address.value, "Київ")
+        reloaded, _ = self._open_book()
+        self.assertEqual(reloaded["Anna"].address.value, "Київ")
+
+    def test_note_service_with_pipeline(self):
+        path = self.temp_dir / "notes.json"
+        service = NoteService(filename=str(path))
+        service.pipeline = BackgroundPipeline()
+        try:
+            service.create("Перша")
+            service.create("Друга")
+            service.update(0, new_text="Оновлена")
+            service.pipeline.flush()
+        finally:
+            service.pipeline.close()
+        service.refresh()
+        self.assertEqual(service.changes(), ([], []))
+        reloaded = NoteService(filename=str(path))
+        self.assertEqual(sorted(note.text for note in reloaded.notes), ["Друга", "Оновлена"])
+
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def contacts(self, count, suffix=""):
+        return [{"name": f"C{i}", "phones": [f"050000{i:04d}"], "address": suffix} for i in range(count)]
+
+    def test_unchanged_records_are_shared(self):
+        history = HistoryStore(self.temp_dir / "history")
+        history.stage("contacts", self.contacts(100), [], key="name")
+        self.assertEqual(history.commit("початковий стан"), 1)
+        size = history.pack_path.stat().st_size
+        changed = self.contacts(100)[5]
+        changed["address"] = "Київ"
+        history.stage("contacts", [changed, self.contacts(100)[6]], ["C7"], key="name")
+        self.assertEqual(history.commit("зміна"), 2)
+        self.assertLess(history.pack_path.stat().st_size - size, 100)
+        self.assertEqual(history.versions()[-1][3:5], (1, 1))
+        history.stage("contacts", [changed], [], key="name")
+        self.assertIsNone(history.commit("без змін"))
+
+        state = history.records_at(2)["contacts"]
+        self.assertEqual(len(state), 99)
+        self.assertEqual(state["C5"]["address"], "Київ")
+        self.assertEqual(history.records_at(1)["contacts"]["C5"]["address"], "")
+
+    def test_checkpoints_follow_chain_length(self):
+        history = HistoryStore(self.temp_dir / "history")
+        history.checkpoint_min = 10
+        history.stage("contacts", self.contacts(50), [], key="name")
+        history.commit("початковий стан")
+        # 50 записів у карті: точка лише коли різниці після неї зачепили понад 50 ключів
+        for number in range(60):
+            history.stage("contacts", [{"name": "C1", "n": number}], [], key="name")
+            history.commit(f"v{number}")
+        checkpoints = sorted(int(path.stem) for path in history.checkpoints_dir.glob("*.json"))
+        self.assertEqual(checkpoints, [1, 52])
+        reopened = HistoryStore(self.temp_dir / "history")
+        self.assertEqual(reopened._chain, 9)
+        self.assertEqual(reopened.records_at(61)["contacts"]["C1"]["n"], 59)
+        self.assertEqual(reopened.records_at(30)["contacts"]["C1"]["n"], 28)
+        self.assertEqual(len(reopened.records_at(1)["contacts"]), 50)
+
+    def test_empty_initial_version_allows_undo_of_first_change(self):
+        history = HistoryStore(self.temp_dir / "history")
+        self.assertEqual(history.commit("початковий стан"), 1)
+        self.assertIsNone(history.commit("без змін"))
+        history.stage("contacts", [{"name": "Anna"}], [], key="name")
+        self.assertEqual(history.commit("add"), 2)
+        self.assertEqual(history.undo_target(), 1)
+        self.assertEqual(history.records_at(1), {})
+
+    def test_full_manifests_and_retention(self):
+        history = HistoryStore(self.temp_dir / "history", keep=3)
+        history.checkpoint_min = 4
+        for number in range(1, 16):
+            history.stage("contacts", [{"name": "C", "n": number}, {"name": f"K{number}"}], [], key="name")
+            history.commit(f"v{number}")
+        versions = [version.number for version in history.versions()]
+        self.assertLessEqual(len(versions), 13)
+        self.assertEqual(versions[-1], 15)
+        with self.assertRaises(KeyError):
+            history.records_at(1)
+        checkpoints = [int(path.stem) for path in history.checkpoints_dir.glob("*.json")]
+        self.assertIn(versions[0], checkpoints)
+        self.assertGreaterEqual(min(checkpoints), versions[0])
+        reopened = HistoryStore(self.temp_dir / "history", keep=3)
+        self.assertEqual(reopened.records_at(15)["contacts"]["C"]["n"], 15)
+        self.assertEqual(reopened.records_at(versions[0])["contacts"]["C"]["n"], versions[0])
+
+    def test_undo_target_walks_back(self):
+        history = HistoryStore(self.temp_dir / "history")
+        for number in range(1, 4):
+            history.stage("notes", [{"id": "n", "text": str(number)}], [], key="id")
+            history.commit(f"v{number}")
+        self.assertEqual(history.undo_target(), 2)
+        history.stage("notes", [{"id": "n", "text": "2"}], [], key="id")
+        history.commit("undo", restored=2)
+        self.assertEqual(history.undo_target(), 1)
+
+    def test_book_and_notes_restore_through_change_tracking(self):
+        history = HistoryStore(self.temp_dir / "history")
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        repo.history = history
+        book = AddressBook()
+        book.add_record(Contact("Anna"))
+        repo.sync_book(book)
+        first = history.commit("add Anna")
+        book.find("Anna").edit_field('address', "Київ")
+        book.add_record(Contact("Bohdan"))
+        repo.sync_book(book)
+        history.commit("change")
+
+        book.restore_records(history.records_at(first)["contacts"])
+        self.assertEqual(list(book.data), ["Anna"])
+        self.assertIsNone(book["Anna"].address)
+        self.assertEqual(sorted(book.pending_keys()), ["Anna", "Bohdan"])
+
+        notes = NoteService(filename=str(self.temp_dir / "notes.json"))
+        kept = notes.create("Лишиться")
+        notes.create("Зникне")
+        notes.restore_records({kept.id: {"id": kept.id, "text": "Змінена", "tags": []}})
+        reloaded = NoteService(filename=str(self.temp_dir / "notes.json"))
+        self.assertEqual([note.text for note in reloaded.notes], ["Змінена"])
+
+
+class TestShardedStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_touches_only_changed_shards(self):
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir, shards=4)
+        book = AddressBook()
+        for i in range(40):
+            book.add_record(Contact(f"Contact {i}"))
+        repo.sync_book(book)
+        sharded = repo.repo
+        self.assertEqual(len(list(sharded.directory.glob("shard-*.journal"))), 4)
+        stamps = [shard._journal_state() for shard in sharded.shards]
+
+        book.find("Contact 7").add_phone("0501234567")
+        repo.sync_book(book)
+        changed = [i for i, shard in enumerate(sharded.shards) if shard._journal_state() != stamps[i]]
+        self.assertEqual(changed, [shard_of("Contact 7", 4)])
+
+        loaded = AddressBook()
+        ContactRepository("contacts.json", storage_dir=self.temp_dir, shards=4).load_book(loaded)
+        self.assertEqual(len(loaded.data), 40)
+        self.assertTrue(loaded.find("Contact 7").has_phone("0501234567"))
+
+    def test_poll_reports_deletes_from_rewritten_shard(self):
+        first = ShardedRepository("contacts", self.temp_dir, shards=3)
+        first.save([{"name": f"C{i}"} for i in range(10)])
+        second = ShardedRepository("contacts", self.temp_dir, shards=8)
+        self.assertEqual(second.count, 3)  # кількість береться з маніфесту
+        self.assertEqual(len(second.load()), 10)
+        first.save([{"name": f"C{i}"} for i in range(1, 10)])
+        changes = second.poll()
+        self.assertIn("C0", changes.deletes)
+        self.assertFalse(changes.reset)
+        self.assertIsNone(second.poll())
+
+    def test_rebalance_and_migration_from_single_file(self):
+        Repository("contacts.json", storage_dir=self.temp_dir, key="name").save(
+            [{"name": f"C{i}"} for i in range(25)])
+        self.assertEqual(rebalance("contacts", 2, self.temp_dir), 25)
+        self.assertEqual(rebalance("contacts", 5, self.temp_dir), 25)
+        repo = ShardedRepository("contacts", self.temp_dir)
+        self.assertEqual((repo.count, repo.generation), (5, 2))
+        self.assertEqual(sorted(record["name"] for record in repo.load()), sorted(f"C{i}" for i in range(25)))
+        self.assertEqual(len(list(repo.directory.glob("shard-*.json"))), 5)
+        # Однакові імена з різним регістром потрапляють в один шард
+        self.assertEqual(shard_of("Іван  Петренко", 5), shard_of("іван петренко", 5))
+
+    def test_migration_retires_single_file_and_warns_about_count(self):
+        from cli import commands
+        single = Repository("contacts.json", storage_dir=self.temp_dir)
+        single.save([{"name": "Anna"}])
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir, shards=4).repo
+        commands._import_single_file(repo, "contacts.json")
+        self.assertEqual([record["name"] for record in repo.load()], ["Anna"])
+        self.assertFalse(single.has_data())
+        self.assertTrue((self.temp_dir / "contacts.json.migrated").exists())
+
+        reopened = ContactRepository("contacts.json", storage_dir=self.temp_dir, shards=8).repo
+        self.assertEqual(reopened.count, 4)
+        with unittest.mock.patch.object(commands, "CONTACT_SHARDS", 8), \
+                unittest.mock.patch("builtins.print") as printed:
+            commands._check_shard_count(reopened)
+        self.assertIn("4 шардах", printed.call_args[0][0])
+        with unittest.mock.patch.object(commands, "CONTACT_SHARDS", 4), \
+                unittest.mock.patch("builtins.print") as printed:
+            commands._check_shard_count(reopened)
+        printed.assert_not_called()
+
+
+class TestNoteSearchSnippets(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.service = NoteService(filename=str(self.temp_dir / "notes.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_report_positions(self):
+        text = "Python " + "x" * 500 + " later python and PYTHON again"
+        self.service.create(text, ["work"])
+        self.service.create("Тільки java", ["work"])
+        matches = self.service.search_matches(keywords=["python", "later"])
+        self.assertEqual(len(matches), 1)
+        self.assertEqual([text[start:end] for start, end in matches[0].spans],
+                         ["Python", "later", "python", "PYTHON"])
+        self.assertEqual(len(self.service.search_matches(tags=["WORK"])), 2)
+        self.assertEqual(self.service.search_matches(keywords=["java"], tags=["home"]), [])
+
+    def test_snippet_is_bounded(self):
+        text = "початок " + "слово " * 2000 + "ціль " + "слово " * 2000 + "ціль кінець"
+        self.service.create(text)
+        match = self.service.search_matches(keywords=["ціль"])[0]
+        output = snippet(match.note.text, match.spans, width=20)
+        self.assertLess(len(output), 150)
+        self.assertEqual(output.count("«ціль»"), 2)
+        self.assertTrue(output.startswith("…"))
+        self.assertEqual(snippet("a b c d", [], width=2), "a b…")
+        many = snippet("ab " * 100, [(i * 3, i * 3 + 2) for i in range(100)], width=1, limit=2)
+        self.assertIn("(ще збігів:", many)
+        self.assertLess(len(many), 30)
+
+
+class TestBulkOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_address_book_bulk(self):
+        book = AddressBook()
+        book.add_record(Contact("Anna"))
+        result = book.add_many([
+            {"name": "Bohdan", "phones": ["0501234567"], "email": "b@example.com"},
+            {"name": "Anna", "phones": []},
+            {"name": "Bad", "phones": ["123"]},
+        ])
+        self.assertEqual((result.added, result.skipped), (1, ("Anna",)))
+        self.assertEqual(result.errors[0][0], "Bad")
+        self.assertEqual([c.name.value for c in book.lookup("phone", "0501234567")], ["Bohdan"])
+
+        result = book.upsert_many([{"name": "Anna", "phones": ["0671112233"]},
+                                   {"name": "Bohdan", "phones": ["0501234567"], "email": "b@example.com"},
+                                   {"name": "Cyril"}])
+        self.assertEqual((result.added, result.updated, result.skipped), (1, 1, ("Bohdan",)))
+        self.assertTrue(book["Anna"].has_phone("0671112233"))
+
+        result = book.update_many({"anna": {"email": "anna@example.org"}, "Cyril": {"birthday": "99.99.2000"},
+                                   "Nobody": {"email": "x@y.z"}})
+        self.assertEqual((result.updated, result.skipped), (1, ("Nobody",)))
+        self.assertEqual(result.errors[0][0], "Cyril")
+        self.assertEqual([c.name.value for c in book.lookup("domain", "example.org")], ["Anna"])
+        self.assertIsNone(book["Cyril"].birthday)
+
+        result = book.delete_many(["CYRIL", "Bohdan", "Nobody"])
+        self.assertEqual((result.deleted, result.skipped), (2, ("Nobody",)))
+        upserts, deletes = book.changes()
+        self.assertEqual([c.name.value for c in upserts], ["Anna"])
+        self.assertEqual(sorted(deletes), ["Bohdan", "Cyril"])
+        self.assertEqual(book.lookup("phone", "0501234567"), [])
+
+    def test_bulk_delete_and_update_reindex_in_one_pass(self):
+        book = AddressBook()
+        book.add_many({"name": f"C{i}", "phones": [f"050000{i:04d}"], "birthday": "01.02.1990"} for i in range(10))
+        calls = []
+
+        class Recorder:
+            def add_many(self, items):
+                calls.append(("add_many", [name for name, _ in items]))
+
+            def update(self, name, contact):
+                calls.append(("update", name))
+
+            def remove(self, name):
+                calls.append(("remove", name))
+
+            def remove_many(self, names):
+                calls.append(("remove_many", list(names)))
+
+        book.attach_index("recorder", Recorder())
+        calls.clear()
+        generation = book._generation
+        book.update_many({"C1": {"birthday": "05.06.1991"}, "C2": {"birthday": "07.08.1992"}})
+        self.assertEqual(book._generation, generation + 1)
+        self.assertEqual(calls, [("remove_many", ["C1", "C2"]), ("add_many", ["C1", "C2"])])
+        self.assertEqual([c.name.value for c in book.sorted_records("birthday")][-2:], ["C1", "C2"])
+        self.assertEqual([c.name.value for c in book.lookup("birthday", "06")], ["C1"])
+        self.assertEqual(len(book.lookup("birthday", "02")), 8)
+
+        calls.clear()
+        book.delete_many(["c3", "C4", "C3"])
+        self.assertEqual(book._generation, generation + 2)
+        self.assertEqual(calls, [("remove_many", ["C3", "C4"])])
+        self.assertEqual(book.lookup("phone", "0500000003"), [])
+        self.assertNotIn("C3", [c.name.value for c in book.sorted_records()])
+
+    def test_note_bulk_saves_once(self):
+        service = NoteService(filename=str(self.temp_dir / "notes.json"))
+        with unittest.mock.patch.object(service, "save", wraps=service.save) as save:
+            result = service.add_many([{"text": "Перша", "tags": ["a"]}, {"text": "Друга"}, {"text": "  "}])
+            self.assertEqual((result.added, len(result.errors)), (2, 1))
+            self.assertEqual(save.call_count, 1)
+        first, second = service.notes
+        result = service.upsert_many([{"id": first.id, "text": "Перша змінена", "tags": ["a"]},
+                                      {"id": second.id, "text": "Друга", "tags": []},
+                                      {"text": "Третя"}])
+        self.assertEqual((result.added, result.updated, result.skipped), (1, 1, (second.id,)))
+        result = service.update_many({second.id: {"tags": ["b"]}, "missing": {"text": "x"}})
+        self.assertEqual((result.updated, result.skipped), (1, ("missing",)))
+        result = service.delete_many([first.id, "missing"])
+        self.assertEqual((result.deleted, result.skipped), (1, ("missing",)))
+
+        reloaded = NoteService(filename=str(self.temp_dir / "notes.json"))
+        self.assertEqual(sorted((n.text, tuple(n.tags)) for n in reloaded.notes),
+                         [("Друга", ("b",)), ("Третя", ())])
+
+
+class TestBirthdayReminders(unittest.TestCase):
+
+    def setUp(self):
+        # Середа, 10.06.2026
+        self.now = datetime(2026, 6, 10, 8, 0)
+        self.scheduler = BirthdayScheduler(notify=lambda *event: None, clock=lambda: self.now)
+        self.book = AddressBook()
+        self.book.attach_index("reminders", self.scheduler)
+
+    def add(self, name, birthday):
+        contact = Contact(name, birthday=birthday)
+        self.book.add_record(contact)
+        return contact
+
+    def test_helpers(self):
+        self.assertEqual(congratulation_date(datetime(2026, 6, 13).date()), datetime(2026, 6, 15).date())
+        self.assertEqual(next_birthday(datetime(2000, 2, 29).date(), datetime(2027, 1, 1).date()),
+                         datetime(2027, 2, 28).date())
+
+    def test_heap_order_weekend_shift_and_next_year(self):
+        self.add("Weekend", "13.06.1990")   # субота → понеділок 15.06
+        self.add("Today", "10.06.1985")
+        self.add("Passed", "08.06.1980")     # уже минув — наступного року
+        self.add("Nobody", None)
+        self.assertEqual(self.scheduler.next_due(), datetime(2026, 6, 10, 9, 0))
+        self.assertEqual(self.scheduler.pop_due(), [])
+        self.now = datetime(2026, 6, 15, 9, 30)
+        fired = self.scheduler.pop_due()
+        self.assertEqual([(name, when.isoformat()) for name, when, _ in fired],
+                         [("Today", "2026-06-10"), ("Weekend", "2026-06-15")])
+        self.assertEqual(self.scheduler.next_due(), datetime(2027, 6, 8, 9, 0))
+
+    def test_edits_reschedule_incrementally(self):
+        contact = self.add("Anna", "20.06.1990")
+        contact.edit_field("birthday", "11.06.1990")
+        contact.add_phone("0501234567")  # інше поле — розклад не змінюється
+        self.now = datetime(2026, 6, 21, 10, 0)
+        self.assertEqual([event[0] for event in self.scheduler.pop_due()], ["Anna"])
+        self.book.delete("Anna")
+        self.assertIsNone(self.scheduler.next_due())
+
+    def test_fired_reminders_persist_across_restarts(self):
+        state = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, state)
+        self.now = datetime(2026, 6, 10, 10, 0)
+
+        def start():
+            scheduler = BirthdayScheduler(notify=lambda *event: None, state_path=state / "reminders.json",
+                                          clock=lambda: self.now)
+            scheduler.add_many([("Today", Contact("Today", birthday="10.06.1985"))])
+            return scheduler
+
+        self.assertEqual([event[0] for event in start().pop_due()], ["Today"])
+        self.assertEqual(start().pop_due(), [])
+        self.now = datetime(2027, 6, 10, 10, 0)
+        self.assertEqual([event[0] for event in start().pop_due()], ["Today"])
+
+    def test_hook_replaces_print(self):
+        scheduler = BirthdayScheduler(hook="notify-send -u low", clock=lambda: self.now)
+        with unittest.mock.patch("contacts.reminders.subprocess.run") as run, \
+                unittest.mock.patch("builtins.print") as printed:
+            scheduler._fire("Anna", datetime(2026, 6, 10).date(), datetime(2026, 6, 10).date())
+        run.assert_called_once_with(["notify-send", "-u", "low", "Anna", "2026-06-10"], check=False)
+        printed.assert_not_called()
+
+    def test_background_thread_fires(self):
+        fired = threading.Event()
+        scheduler = BirthdayScheduler(notify=lambda *event: fired.set(), clock=lambda: self.now)
+        scheduler.start()
+        try:
+            self.book.attach_index("late", scheduler)
+            self.add("Soon", "10.06.1999")
+            self.now = datetime(2026, 6, 10, 9, 1)
+            scheduler.update("Soon", self.book["Soon"])
+            self.assertTrue(fired.wait(5))
+        finally:
+            scheduler.stop()
+
+
+class TestNoteDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.service = NoteService(filename=str(self.temp_dir / "notes.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_index_clusters_near_duplicates(self):
+        index = NoteDuplicateIndex()
+        base = "Купити молоко, хліб і яйця в магазині біля дому після роботи у п'ятницю"
+        index.add("a", base)
+        index.add("b", base.upper() + "!")
+        index.add("c", "Зустріч з командою о 15:00 щодо планування нового релізу")
+        index.add("d", "Зовсім інша нотатка про відпустку в горах")
+        self.assertEqual(index.clusters(), [["a", "b"]])
+        self.assertGreaterEqual(index.score("a", "b"), 0.9)
+        index.add("b", "Текст змінено повністю, тепер це про книги")
+        self.assertEqual(index.clusters(), [])
+        index.remove("b")
+        self.assertEqual(len(index), 3)
+
+    def test_service_keeps_index_incrementally(self):
+        text = "Підготувати квартальний звіт для бухгалтерії до кінця місяця"
+        first = self.service.create(text)
+        self.service.create("Записатися до лікаря на наступний тиждень")
+        self.assertEqual(self.service.find_duplicates(), [])
+        second = self.service.create(text + " обов'язково")
+        self.assertEqual([[note.id for note in group] for group in self.service.find_duplicates()],
+                         [[first.id, second.id]])
+        self.service.update(2, new_text="Полити квіти на балконі")
+        self.assertEqual(self.service.find_duplicates(), [])
+        self.service.create(text)
+        self.service.delete(0)
+        self.assertEqual(self.service.find_duplicates(), [])
+
+
+class TestInterning(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.service = NoteService(filename=str(self.temp_dir / "notes.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_canonical_is_shared_object(self):
+        first = canonical("".join(["Робо", "та"]))
+        second = canonical("РОБОТА")
+        self.assertEqual(first, "робота")
+        self.assertIs(first, second)
+
+    def test_note_tags_interned(self):
+        a = Note.from_dict(json.loads('{"text": "a", "tags": ["Робота"]}'))
+        b = Note.from_dict(json.loads('{"text": "b", "tags": ["Робота"]}'))
+        self.assertIs(a.tags[0], b.tags[0])
+        self.assertEqual(a.tag_keys, ("робота",))
+
+    def test_tag_operations_ignore_case(self):
+        self.service.create("Звіт", ["Робота"])
+        self.service.create("Молоко", ["покупки"])
+        self.assertEqual(len(self.service.search([], ["РОБОТА"])), 1)
+        self.assertEqual(self.service.get_all_tags(), ["покупки", "робота"])
+        self.assertEqual([note.text for note in self.service.sort_by_tag("ПОКУПКИ")][0], "Молоко")
+
+    def test_find_uses_name_index(self):
+        book = AddressBook()
+        contact = Contact("Анна Петренко")
+        book.add_record(contact)
+        self.assertIs(book.find("анна петренко"), contact)
+        self.assertIs(book.find("  АННА   петренко "), contact)
+        self.assertIsNone(book.find("Анна"))
+
+
+class TestCompletion(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.notes = NoteService(filename=str(self.temp_dir / "notes.json"))
+        self.book = AddressBook()
+        for name in ("Андрій", "Анна", "Олена"):
+            self.book.add_record(Contact(name))
+        self.completer = Completer(self.book, self.notes)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_trie_counts_and_case(self):
+        trie = Trie()
+        for word in ("Робота", "робот", "ромашка", "Робота"):
+            trie.add(word)
+        self.assertEqual(trie.complete("РОБ"), ["робот", "Робота"])
+        self.assertEqual(len(trie), 3)
+        trie.discard("Робота")
+        self.assertIn("Робота", trie)
+        trie.discard("Робота")
+        self.assertEqual(trie.complete("ро"), ["робот", "ромашка"])
+        trie.discard("ромашка")
+        self.assertEqual(trie.complete(""), ["робот"])
+
+    def test_bulk_operations_keep_name_trie_in_sync(self):
+        result = self.book.update_many({"Анна": {"email": "anna@example.com"}})
+        self.assertEqual(result.updated, 1)
+        result = self.book.delete_many(["Андрій"])
+        self.assertEqual(result.deleted, 1)
+        self.assertEqual(self.completer.names.complete("Ан"), ["Анна"])
+
+        class Minimal:
+            # Лише обов'язковий інтерфейс attach_index, без remove_many
+            def __init__(self):
+                self.names = set()
+
+            def add_many(self, items):
+                self.names.update(name for name, _ in items)
+
+            def update(self, name, contact):
+                self.names.add(name)
+
+            def remove(self, name):
+                self.names.discard(name)
+
+        minimal = Minimal()
+        self.book.attach_index("minimal", minimal)
+        self.book.delete_many(["Олена"])
+        self.assertEqual(minimal.names, {"Анна"})
+
+    def test_extend_matches_add(self):
+        words = ["ab", "abc", "abd", "b", "", "ab", "Abc"]
+        built, added = Trie(), Trie()
+        built.extend(words)
+        for word in words:
+            added.add(word)
+        self.assertEqual(built.complete(""), added.complete(""))
+        self.assertEqual(len(built), len(added))
+        empty = Trie()
+        empty.extend([])
+        self.assertEqual(empty.complete(""), [])
+
+    def test_commands_and_names(self):
+        self.completer.mode = "command"
+        self.assertEqual(self.completer.candidates("show-"), ["show-all ", "show-info "])
+        self.assertEqual(self.completer.candidates("change ан"), ["change Андрій ", "change Анна "])
+        self.assertEqual(self.completer.candidates("search ан"), [])
+        self.completer.mode = None
+        self.assertEqual(self.completer.candidates("show-"), [])
+
+    def test_names_follow_book(self):
+        self.completer.mode = "command"
+        self.book.add_record(Contact("Антон"))
+        self.book.delete("Анна")
+        self.assertEqual(self.completer.candidates("delete Ан"), ["delete Андрій ", "delete Антон "])
+
+    def test_tags_follow_notes(self):
+        self.completer.mode = "tags"
+        self.notes.create("Звіт", ["Робота", "рахунки"])
+        self.assertEqual(self.completer.candidates("дім, ра"), ["дім, рахунки"])
+        self.notes.update(0, new_tags=["родина"])
+        self.assertEqual(self.completer.candidates("р"), ["родина"])
+        self.notes.delete(0)
+        self.assertEqual(self.completer.candidates("р"), [])
+
+
+class TestSortedViews(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.notes = NoteService(filename=str(self.temp_dir / "notes.json"))
+        self.book = AddressBook()
+        for name, birthday in (("Олена", "01.01.1990"), ("андрій", None), ("Борис", "20.06.1985"),
+                               ("Віра", "10.12.2000")):
+            contact = Contact(name)
+            if birthday:
+                contact.edit_field("birthday", birthday)
+            self.book.add_record(contact)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def names(self, records):
+        return [record.name.value for record in records]
+
+    def test_sorted_list_matches_sorted(self):
+        import random
+        rng = random.Random(5)
+        values = SortedList()
+        reference = []
+        for _ in range(5000):
+            value = rng.randrange(1000)
+            if reference and rng.random() < 0.4:
+                value = rng.choice(reference)
+                values.remove(value)
+                reference.remove(value)
+            else:
+                values.add(value)
+                reference.append(value)
+        self.assertEqual(list(values), sorted(reference))
+        self.assertEqual(list(values.irange(100, 200)), [v for v in sorted(reference) if 100 <= v < 200])
+        with self.assertRaises(ValueError):
+            values.remove(5000)
+
+    def test_book_orders_follow_changes(self):
+        self.assertEqual(self.names(self.book.sorted_records('name')), ["андрій", "Борис", "Віра", "Олена"])
+        today = datetime(2024, 6, 1).date()
+        self.assertEqual(self.names(self.book.sorted_records('birthday', today)), ["Борис", "Віра", "Олена", "андрій"])
+        self.book.find("андрій").edit_field("birthday", "05.06.1999")
+        self.book.delete("Віра")
+        self.assertEqual(self.names(self.book.sorted_records('birthday', today)), ["андрій", "Борис", "Олена"])
+        with self.assertRaises(ValueError):
+            self.book.sorted_records('phones')
+
+    def test_show_all_sort(self):
+        output = show_all(["--sort", "name"], self.book)
+        self.assertLess(output.index("андрій"), output.index("Олена"))
+        self.assertIn("Невідомий порядок", show_all(["--sort", "x"], self.book))
+
+    def test_note_orders_follow_changes(self):
+        self.notes.create("Яблука", ["покупки"])
+        self.notes.create("арбуз", ["дім"])
+        self.notes.create("Без тегів")
+        texts = lambda order: [note.text for note in self.notes.sorted_notes(order)]
+        self.assertEqual(texts("text"), ["арбуз", "Без тегів", "Яблука"])
+        self.assertEqual(texts("tag"), ["арбуз", "Яблука", "Без тегів"])
+        self.notes.update(0, new_text="Абрикоси", new_tags=["аптека"])
+        self.notes.delete(1)
+        self.notes.create("Вишні")
+        self.assertEqual(texts("text"), ["Абрикоси", "Без тегів", "Вишні"])
+        # Нотатки з однаковими тегами (тут — без тегів) упорядковані між собою за id
+        self.assertEqual(texts("tag")[0], "Абрикоси")
+        self.assertEqual(sorted(texts("tag")[1:]), ["Без тегів", "Вишні"])
+
+
+class TestTransliteration(unittest.TestCase):
+
+    def setUp(self):
+        self.book = AddressBook()
+        for name in ("Ольга Петренко", "Юрій", "Olena Koval", "Оля"):
+            self.book.add_record(Contact(name))
+
+    def names(self, query):
+        return sorted(contact.name.value for contact in self.book.search(query))
+
+    def test_kmu_2010(self):
+        self.assertEqual(transliterate("Згурська Їжакевич"), "Zghurska Yizhakevych")
+        self.assertEqual(transliterate("Знам'янка Гадяч Ґалаґан"), "Znamianka Hadiach Galagan")
+        self.assertEqual(transliterate("Юрій Соломія"), "Yurii Solomiia")
+        self.assertEqual(translit_tokens("Olga Yuriy"), translit_tokens("Ольга Юрій"))
+
+    def test_search_across_scripts(self):
+        self.assertEqual(self.names("Olha"), ["Ольга Петренко"])
+        self.assertEqual(self.names("name:olha"), ["Ольга Петренко"])
+        self.assertEqual(self.names("Ol*"), ["Olena Koval", "Ольга Петренко", "Оля"])
+        self.assertEqual(self.names("name:Олен*"), ["Olena Koval"])
+        self.assertEqual(self.names("yuriy"), ["Юрій"])
+
+    def test_find_and_updates(self):
+        # find веде зміни, тому транслітерація лише підказує, а не підставляє контакт
+        self.assertIsNone(self.book.find("Olha Petrenko"))
+        self.assertEqual(self.book.similar_names("Olha Petrenko"), ["Ольга Петренко"])
+        self.assertEqual(self.book.find("ольга петренко").name.value, "Ольга Петренко")
+        self.book.delete("Юрій")
+        self.book.add_record(Contact("Юлія"))
+        self.assertEqual(self.names("Yu*"), ["Юлія"])
+
+
+    def test_add_and_delete_never_resolve_through_transliteration(self):
+        book = AddressBook()
+        book.add_record(Contact("Ольга"))
+        book.add_record(Contact("Ігор"))
+        self.assertEqual(add_contact(["Olga", "0501234567"], book), "Контакт Olga додано.")
+        self.assertEqual(add_contact(["Igor", "0671112233"], book), "Контакт Igor додано.")
+        self.assertEqual(book["Ольга"].phones, [])
+        self.assertEqual(book["Ігор"].phones, [])
+
+        self.assertEqual(delete_contact(["Olha"], book),
+                         "Olha не знайдено. Можливо, ви мали на увазі: Olga, Ольга?")
+        self.assertEqual(book.delete("Olha"), "Контакт 'Olha' не знайдено.")
+        self.assertEqual(book.delete_many(["Olha"]).skipped, ("Olha",))
+        self.assertEqual(book.update_many({"Olha": {"email": "o@example.com"}}).skipped, ("Olha",))
+        self.assertIn("Ольга", book)
+        self.assertEqual(delete_contact(["Olga"], book), "Контакт 'Olga' видалено.")
+        self.assertEqual(sorted(book.data), ["Igor", "Ігор", "Ольга"])
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.notes = NoteService(filename=str(self.temp_dir / "notes.json"))
+        self.book = AddressBook()
+        self.book.add_record(Contact("Ольга", email="olha@example.com"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_lru_and_generation(self):
+        cache = ResultCache(maxsize=2)
+        cache.put("a", 1, [1])
+        cache.put("b", 1, [2])
+        self.assertEqual(cache.get("a", 1), [1])
+        cache.put("c", 1, [3])  # витісняє "b" — найдавніше використаний
+        self.assertIsNone(cache.get("b", 1))
+        self.assertIsNone(cache.get("a", 2))
+        cache.put("a", 2, [4])
+        self.assertEqual(cache.stats().size, 1)
+        self.assertEqual((cache.stats().hits, cache.stats().misses), (1, 2))
+
+    def test_book_search_cached_until_change(self):
+        first = self.book.search("domain:example.com")
+        self.assertEqual(len(first), 1)
+        self.assertEqual(self.book.search("  domain:example.com "), first)
+        self.assertEqual(self.book.cache_stats().hits, 1)
+        self.book.find("Ольга").edit_field("email", "olha@ukr.net")
+        self.assertEqual(self.book.search("domain:example.com"), [])
+        self.book.add_record(Contact("Петро", email="petro@example.com"))
+        self.assertEqual(len(self.book.search("domain:example.com")), 1)
+        self.assertEqual(self.book.cache_stats().misses, 3)
+
+    def test_note_search_cached_until_change(self):
+        self.notes.create("Купити молоко", ["дім"])
+        self.assertEqual(len(self.notes.search(["молоко"])), 1)
+        self.assertEqual(len(self.notes.search(["МОЛОКО"])), 1)
+        self.assertEqual(self.notes.cache_stats().hits, 1)
+        self.notes.update(0, new_text="Купити хліб")
+        self.assertEqual(self.notes.search(["молоко"]), [])
+        self.assertEqual(len(self.notes.search([], ["ДІМ"])), 1)
+
+    def test_disabled_cache(self):
+        book = AddressBook(search_cache=0)
+        book.search("x")
+        book.search("x")
+        self.assertEqual(book.cache_stats().hits, 0)
+
+
+class TestStreamingLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_json_load_with_small_chunks(self):
+        import io
+        data = [{"name": f"Контакт {i}", "phones": ["0501234567"], "n": i * 1.5} for i in range(50)]
+        data += [12345, "рядок, з ] дужкою", None, [1, [2]], {}]
+        text = json.dumps(data, ensure_ascii=False, indent=4)
+        for chunk_size in (1, 3, 7, 1024):
+            self.assertEqual(list(iter_json_array(io.StringIO(text), chunk_size)), data)
+        self.assertEqual(list(iter_json_array(io.StringIO(" [ ] "), 1)), [])
+        self.assertEqual(list(iter_json_array(io.StringIO('{"a": 1}'))), [])
+
+    def test_corrupt_tail_keeps_earlier_records(self):
+        records = [Contact(f"Ім'я {i}", email=f"u{i}@example.com").to_dict() for i in range(20)]
+        text = json.dumps(records, ensure_ascii=False, indent=4)
+        # Файл обірвано посеред останнього запису
+        (self.temp_dir / "contacts.json").write_text(text[:text.rfind('"email"')], encoding="utf-8")
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        repo.repo.chunk_size = 16
+        with unittest.mock.patch("builtins.print") as printed:
+            contacts = repo.load_contacts()
+        self.assertEqual([c.name.value for c in contacts], [f"Ім'я {i}" for i in range(19)])
+        self.assertIn("прочитано записів: 19", printed.call_args[0][0])
+
+    def test_invalid_record_is_skipped_not_the_whole_book(self):
+        records = [{"name": "Anna", "phones": ["0501234567"]}, {"name": "Bad", "phones": ["123"]},
+                   {"name": "Cyril", "phones": []}]
+        (self.temp_dir / "contacts.json").write_text(json.dumps(records), encoding="utf-8")
+        (self.temp_dir / "contacts.json.journal").write_text(
+            json.dumps({"put": {"name": "Anna", "email": "not-an-email"}}) + "\n"
+            + json.dumps({"put": {"name": "Dana", "phones": []}}) + "\n", encoding="utf-8")
+        repo = ContactRepository("contacts.json", storage_dir=self.temp_dir)
+        with unittest.mock.patch("builtins.print") as printed:
+            contacts = repo.load_contacts()
+        self.assertEqual(sorted(c.name.value for c in contacts), ["Anna", "Cyril", "Dana"])
+        self.assertTrue(next(c for c in contacts if c.name.value == "Anna").has_phone("0501234567"))
+        warnings = [call[0][0] for call in printed.call_args_list]
+        self.assertEqual(len(warnings), 2)
+        self.assertIn("запис 2 (Bad) у contacts.json", warnings[0])
+        self.assertIn("запис 1 (Anna) у contacts.json.journal", warnings[1])
+
+        sharded = ContactRepository("contacts.json", storage_dir=self.temp_dir / "sharded", shards=2)
+        sharded.repo.save(records)
+        with unittest.mock.patch("builtins.print"):
+            self.assertEqual(sorted(c.name.value for c in sharded.load_contacts()), ["Anna", "Cyril"])
+
+    def test_hydrated_load_replays_journal(self):
+        repo = NoteRepository("notes.json", storage_dir=self.temp_dir)
+        notes = [Note(f"Нотатка {i}", ["тег"]) for i in range(3)]
+        repo.save_notes(notes)
+        repo.repo.append([Note("Нова", []).to_dict()], [notes[0].id])
+        loaded = repo.load_notes()
+        self.assertTrue(all(isinstance(note, Note) for note in loaded))
+        self.assertEqual(sorted(note.text for note in loaded), ["Нова", "Нотатка 1", "Нотатка 2"])
+
+
+class TestContactCache(unittest.TestCase):
+
+    def setUp(self):
+        self.book = AddressBook(max_resident=3)
+        for i in range(10):
+            self.book.add_record(Contact(f"Контакт {i}", email=f"user{i}@example.com", birthday=f"0{i % 9 + 1}.05.1990"))
+        self.book.clear_changes()
+
+    def test_limit_caps_resident_contacts(self):
+        import gc
+        gc.collect()
+        self.assertEqual(len(self.book), 10)
+        self.assertEqual(len(self.book.data._hot), 3)
+        self.assertIsNone(self.book.data.resident("Контакт 0"))
+        contact = self.book.find("контакт 0")
+        self.assertEqual(contact.email.value, "user0@example.com")
+        stats = self.book.contact_cache_stats()
+        self.assertEqual((stats.size, stats.maxsize), (3, 3))
+        self.assertGreaterEqual(stats.misses, 1)
+        self.assertIsNone(AddressBook().contact_cache_stats())
+
+    def test_find_search_and_show_all_are_transparent(self):
+        self.assertEqual([c.name.value for c in self.book.search("email:user4@example.com")], ["Контакт 4"])
+        self.assertEqual(len(self.book.search("domain:example.com")), 10)
+        self.assertEqual([c.name.value for c in self.book.sorted_records()], [f"Контакт {i}" for i in range(10)])
+        self.assertIn("Всього контактів: 10", show_all([], self.book))
+        self.assertEqual(len(self.book.data._hot), 3)
+
+    def test_edit_of_evicted_contact_is_kept(self):
+        held = self.book.find("Контакт 1")
+        for i in range(2, 10):
+            self.book.find(f"Контакт {i}")
+        held.edit_field("email", "new@ukr.net")
+        for i in range(2, 10):
+            self.book.find(f"Контакт {i}")
+        self.assertEqual(self.book.lookup("domain", "ukr.net")[0].email.value, "new@ukr.net")
+        upserts, _ = self.book.changes()
+        self.assertEqual([c.name.value for c in upserts], ["Контакт 1"])
+        self.book.delete("Контакт 1")
+        self.assertNotIn("Контакт 1", self.book.data)
+        self.assertEqual(len(self.book), 9)
+
+    def test_dupes_and_birthdays_read_only_candidates(self):
+        self.book.add_record(Contact("Дубль", email="user7@example.com"))
+        self.book.clear_changes()
+        decoded = []
+        decode = self.book.data.decode
+        self.book.data.decode = lambda record: decoded.append(record["name"]) or decode(record)
+        import gc
+        gc.collect()
+        clusters = self.book.find_duplicates()
+        self.assertEqual([[c.name.value for c in cluster] for cluster in clusters], [["Контакт 7", "Дубль"]])
+        self.assertLessEqual(set(decoded), {"Контакт 7", "Дубль"})
+        # Вікно в 0 днів — лише поточний місяць: читаються тільки контакти з індексу цього місяця
+        candidates = set(self.book._indexes["birthday"].lookup(f"{datetime.now().month:02d}"))
+        decoded.clear()
+        self.book.get_upcoming_birthdays(0)
+        self.assertLessEqual(set(decoded), candidates)
+
+    def test_spill_compaction_keeps_records(self):
+        cache = ContactCache(1, Contact.from_dict, lambda key, contact: None)
+        with unittest.mock.patch("contacts.cache.SPILL_COMPACT_MIN", 0):
+            for version in range(5):
+                for i in range(4):
+                    cache[f"c{i}"] = Contact(f"c{i}", address=f"вулиця {version}")
+        self.assertLess(cache._spill_size, 2 * cache._live_bytes + 1)
+        self.assertEqual(cache.peek("c0").address.value, "вулиця 4")
+        self.assertEqual(sorted(cache), ["c0", "c1", "c2", "c3"])
+        cache.close()
+
+
 if __name__ == '__main__':
     unittest.main()
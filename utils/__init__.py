@@ -0,0 +1,13 @@
+from .bulk import BulkResult
+from .cache import CacheStats, ResultCache
+from .disjointset import DisjointSet
+from .locks import RWLock, reader, writer
+from .normalize import canonical, fold_text, word_tokens
+from .sortedlist import SortedList, SortedView
+from .translit import translit_tokens, transliterate
+from .trie import Trie
+
+__all__ = [
+    'BulkResult', 'CacheStats', 'ResultCache', 'DisjointSet', 'RWLock', 'reader', 'writer', 'canonical', 'fold_text', 'word_tokens',
+    'SortedList', 'SortedView', 'Trie', 'translit_tokens', 'transliterate',
+]
@@ -0,0 +1,12 @@
+"""Підсумок пакетних операцій (add_many, upsert_many, delete_many, update_many)."""
+from typing import NamedTuple, Tuple
+
+
+class BulkResult(NamedTuple):
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    # Ключі без змін: уже існують, не знайдені або дані не відрізняються
+    skipped: Tuple[str, ...] = ()
+    # (ключ, повідомлення) для записів, що не пройшли валідацію; решта застосовується
+    errors: Tuple[Tuple[str, str], ...] = ()
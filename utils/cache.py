@@ -0,0 +1,66 @@
+"""Обмежений LRU-кеш результатів запитів з перевіркою покоління колекції.
+
+Колекція (AddressBook, NoteService) збільшує лічильник покоління при
+кожній зміні, а запис кешу пам'ятає покоління, для якого його пораховано.
+Запис іншого покоління — промах, тож застарілий результат повернути
+неможливо і явно чистити кеш при змінах не треба: перший запис нового
+покоління просто відкидає старі.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 256):
+        # maxsize=0 — кеш вимкнено (лише рахує промахи)
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._generation = None
+        # Пошук може йти паралельно з кількох потоків (під спільним блокуванням читання)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        """Збережений результат для key або None, якщо його немає чи колекція змінилась."""
+        with self._lock:
+            if generation != self._generation:
+                self.misses += 1
+                return None
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, generation: int, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                # Усі записи попереднього покоління вже недійсні
+                self._entries.clear()
+                self._generation = generation
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, len(self._entries), self.maxsize)
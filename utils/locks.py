@@ -0,0 +1,113 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable
+
+
+class RWLock:
+    """Блокування читач/письменник.
+
+    Читання виконуються паралельно, записи серіалізуються. Письменник має
+    пріоритет: поки він чекає, нові читачі не заходять. Той самий потік може
+    повторно брати блокування (вкладені читання, читання всередині запису,
+    вкладені записи), але не може «підвищити» читання до запису.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        depth = getattr(self._local, "depth", 0)
+        if self._writer == me:
+            self._local.depth = depth + 1
+            return
+        with self._cond:
+            if depth == 0:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.depth = depth + 1
+
+    def release_read(self):
+        self._local.depth -= 1
+        if self._writer == threading.get_ident():
+            return
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, "depth", 0):
+            raise RuntimeError("Неможливо отримати запис, утримуючи читання.")
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+# Декоратори для методів класів з атрибутом self._lock (RWLock або None).
+# Якщо блокування вимкнене (None), метод викликається без накладних витрат.
+
+def reader(method: Callable) -> Callable:
+    @wraps(method)
+    def inner(self, *args, **kwargs):
+        lock = self._lock
+        if lock is None:
+            return method(self, *args, **kwargs)
+        lock.acquire_read()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_read()
+    return inner
+
+
+def writer(method: Callable) -> Callable:
+    @wraps(method)
+    def inner(self, *args, **kwargs):
+        lock = self._lock
+        if lock is None:
+            return method(self, *args, **kwargs)
+        lock.acquire_write()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_write()
+    return inner
@@ -0,0 +1,54 @@
+"""Нормалізація тексту для індексів і пошуку."""
+import re
+import sys
+import unicodedata
+from typing import Dict, List
+
+_WORD = re.compile(r'\w+')
+# Апострофи в українських словах (П'ятихатки, Пʼятихатки) прибираємо
+_APOSTROPHES = str.maketrans('', '', "'\u2019\u02bc`")
+# Латинські літери зі штрихом, які NFKD не розкладає
+_LATIN_EXTRA = str.maketrans({'ł': 'l', 'ø': 'o', 'đ': 'd', 'ħ': 'h', 'ı': 'i'})
+# Знаки наголосу, які прибираємо й у кирилиці (й, ї тощо не чіпаємо)
+_STRESS_MARKS = {'\u0300', '\u0301'}
+
+
+def fold_text(text: str) -> str:
+    """Регістр і діакритика: 'Kraków' → 'krakow', 'Ки́їв' → 'київ'.
+
+    У латиниці прибираються всі діакритичні знаки, у кирилиці — лише
+    наголоси, бо й, ї, ё — окремі літери.
+    """
+    chars = []
+    for char in unicodedata.normalize('NFKD', text.casefold()):
+        if unicodedata.combining(char):
+            base = chars[-1] if chars else ''
+            if char in _STRESS_MARKS or ('a' <= base <= 'z'):
+                continue
+        chars.append(char)
+    return unicodedata.normalize('NFC', ''.join(chars)).translate(_APOSTROPHES).translate(_LATIN_EXTRA)
+
+
+def word_tokens(text: str) -> List[str]:
+    """Слова й числа (назви міст, вулиць, поштові індекси) у нормалізованому вигляді."""
+    return _WORD.findall(fold_text(text))
+
+
+# Кеш канонічних форм: вихідний рядок → інтернований casefold (обмежений за розміром)
+_CANONICAL: Dict[str, str] = {}
+CANONICAL_CACHE_SIZE = 1 << 16
+
+
+def canonical(value: str) -> str:
+    """Інтернована форма без урахування регістру (теги, імена, домени).
+
+    Однакові значення після canonical() — той самий об'єкт рядка, тож
+    порівняння зводяться до перевірки ідентичності або пошуку в словнику,
+    а повторювані значення не займають пам'ять кожне окремо.
+    """
+    folded = _CANONICAL.get(value)
+    if folded is None:
+        folded = sys.intern(value.casefold())
+        if len(_CANONICAL) < CANONICAL_CACHE_SIZE:
+            _CANONICAL[value] = folded
+    return folded
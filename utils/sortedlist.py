@@ -0,0 +1,137 @@
+"""Відсортовані послідовності, що підтримуються при змінах, а не сортуються при запиті.
+
+SortedList зберігає значення в кошиках до 2 * LOAD елементів і окремо —
+максимуми кошиків. Вставка й видалення: бінарний пошук за максимумами,
+потім у кошику, і зсув лише в межах кошика — O(log n + LOAD) замість
+O(n) у звичайному списку. Обхід по порядку — просто обхід кошиків.
+
+SortedView — впорядкований вид колекції ключ → елемент з інтерфейсом
+вторинної структури (add_many/update/remove/remove_many), як індекси AddressBook.
+"""
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+LOAD = 512
+
+
+class SortedList:
+    def __init__(self, values: Iterable = ()):
+        values = sorted(values)
+        self._lists: List[list] = [values[start:start + LOAD] for start in range(0, len(values), LOAD)]
+        self._maxes: List[Any] = [bucket[-1] for bucket in self._lists]
+        self._len = len(values)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self._lists)
+
+    def add(self, value):
+        maxes, lists = self._maxes, self._lists
+        self._len += 1
+        if not maxes:
+            lists.append([value])
+            maxes.append(value)
+            return
+        pos = bisect_right(maxes, value)
+        if pos == len(maxes):
+            pos -= 1
+            lists[pos].append(value)
+            maxes[pos] = value
+        else:
+            insort(lists[pos], value)
+        bucket = lists[pos]
+        if len(bucket) > 2 * LOAD:
+            # Розщеплюємо переповнений кошик навпіл
+            half = bucket[LOAD:]
+            del bucket[LOAD:]
+            maxes[pos] = bucket[-1]
+            lists.insert(pos + 1, half)
+            maxes.insert(pos + 1, half[-1])
+
+    def remove(self, value):
+        """Видаляє значення; ValueError, якщо його немає."""
+        maxes, lists = self._maxes, self._lists
+        pos = bisect_left(maxes, value)
+        if pos < len(maxes):
+            bucket = lists[pos]
+            index = bisect_left(bucket, value)
+            if index < len(bucket) and bucket[index] == value:
+                del bucket[index]
+                self._len -= 1
+                if bucket:
+                    maxes[pos] = bucket[-1]
+                else:
+                    del lists[pos]
+                    del maxes[pos]
+                return
+        raise ValueError(f"{value!r} немає у списку")
+
+    def irange(self, minimum=None, maximum=None) -> Iterator:
+        """Значення v з minimum <= v < maximum (межа None — без обмеження) по порядку."""
+        maxes, lists = self._maxes, self._lists
+        pos = 0 if minimum is None else bisect_left(maxes, minimum)
+        index = 0 if minimum is None or pos == len(maxes) else bisect_left(lists[pos], minimum)
+        for bucket in lists[pos:]:
+            for value in bucket[index:] if index else bucket:
+                if maximum is not None and not value < maximum:
+                    return
+                yield value
+            index = 0
+
+
+class SortedView:
+    """Ключі колекції в порядку sort_key(елемент); рівні ключі сортування — за ключем."""
+
+    def __init__(self, sort_key: Callable[[Any], Tuple], fields: Optional[Tuple[str, ...]] = None):
+        self.sort_key = sort_key
+        # Поля елемента, від яких залежить sort_key (None — невідомо, оновлювати завжди)
+        self.fields = fields
+        self._entries: Dict[Hashable, Tuple] = {}
+        self._order = SortedList()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator:
+        return (key for _, key in self._order)
+
+    def add_many(self, items: Iterable[Tuple[Hashable, Any]]):
+        items = list(items)
+        if self._entries and len(items) <= LOAD:
+            for key, item in items:
+                self.update(key, item)
+            return
+        # Перше заповнення (завантаження) або велика пачка — одне сортування замість n вставок
+        self._entries.update((key, (self.sort_key(item), key)) for key, item in items)
+        self._order = SortedList(self._entries.values())
+
+    def update(self, key: Hashable, item):
+        entry = (self.sort_key(item), key)
+        old = self._entries.get(key)
+        if old == entry:
+            return  # змінилось поле, що не впливає на порядок
+        if old is not None:
+            self._order.remove(old)
+        self._entries[key] = entry
+        self._order.add(entry)
+
+    def remove(self, key: Hashable):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._order.remove(old)
+
+    def remove_many(self, keys: Iterable[Hashable]):
+        old = [entry for entry in (self._entries.pop(key, None) for key in keys) if entry is not None]
+        if len(old) <= LOAD:
+            for entry in old:
+                self._order.remove(entry)
+        else:
+            self._order = SortedList(self._entries.values())
+
+    def irange(self, minimum: Optional[Tuple] = None, maximum: Optional[Tuple] = None) -> Iterator:
+        """Ключі з minimum <= sort_key < maximum по порядку."""
+        return (key for _, key in self._order.irange(None if minimum is None else (minimum,),
+                                                     None if maximum is None else (maximum,)))
@@ -0,0 +1,61 @@
+"""Транслітерація української кирилиці латиницею (КМУ 2010) для пошуку.
+
+transliterate() — офіційна таблиця (постанова КМУ № 55 від 27.01.2010):
+є, ї, й, ю, я на початку слова — ye, yi, y, yu, ya, інакше — ie, i, i,
+iu, ia; «зг» — zgh; м'який знак і апостроф пропускаються. Кілька
+російських літер (ё, ы, э, ъ) теж мають відповідники.
+
+translit_tokens() — ключі пошуку: слова транслітерованого тексту без
+регістру й діакритики, з урахуванням найпоширеніших варіантів написання
+(Olga/Olha, Yuriy/Yurii). Латинський текст дає ті самі ключі, тож
+«Olha» і «Ольга» збігаються.
+"""
+import unicodedata
+from typing import List
+
+from .normalize import fold_text, word_tokens
+
+_LETTERS = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ie', 'ж': 'zh', 'з': 'z',
+    'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p',
+    'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh',
+    'щ': 'shch', 'ь': '', 'ю': 'iu', 'я': 'ia',
+    'ё': 'io', 'ы': 'y', 'э': 'e', 'ъ': '',
+    "'": '', '’': '', 'ʼ': '',
+}
+_WORD_START = {'є': 'ye', 'ї': 'yi', 'й': 'y', 'ю': 'yu', 'я': 'ya', 'ё': 'yo'}
+_APOSTROPHES = {"'", '’', 'ʼ'}
+# Варіанти, якими часто пишуть імена: Olga → olha, Yuriy → yurii
+_VARIANTS = (('g', 'h'), ('iy', 'ii'))
+
+
+def transliterate(text: str) -> str:
+    """'Ольга Згурська' → 'Olha Zghurska'; не кириличні символи лишаються як є."""
+    result = []
+    previous = ' '
+    for char in text:
+        lower = char.lower()
+        latin = _LETTERS.get(lower)
+        if latin is None:
+            result.append(char)
+            previous = char
+            continue
+        in_word = previous.isalpha() or previous in _APOSTROPHES or unicodedata.combining(previous)
+        if lower in _WORD_START and not in_word:
+            latin = _WORD_START[lower]
+        elif lower == 'г' and previous.lower() == 'з':
+            latin = 'gh'
+        result.append(latin.capitalize() if char.isupper() else latin)
+        previous = char
+    return ''.join(result)
+
+
+def _loose(token: str) -> str:
+    for variant, replacement in _VARIANTS:
+        token = token.replace(variant, replacement)
+    return token
+
+
+def translit_tokens(text: str) -> List[str]:
+    """Ключі пошуку однаково для кирилиці й латиниці: 'Юрій' і 'Yuriy' → ['yurii']."""
+    return [_loose(token) for token in word_tokens(transliterate(fold_text(text)))]
@@ -0,0 +1,170 @@
+"""Стиснене префіксне дерево (radix trie) для автодоповнення.
+
+Ключ слова — його канонічна форма (canonical: casefold, інтернована), тож
+доповнення не залежить від регістру, а повертаються слова в початковому
+написанні. Ребра стиснені: вузлів не більше ніж удвічі від кількості
+слів, незалежно від їхньої довжини. Додавання й видалення коштують
+O(довжини слова), доповнення — O(довжини префікса + limit).
+
+Слово може бути додане кілька разів (тег у кількох нотатках): вузол
+рахує входження і видаляє слово, коли лічильник падає до нуля.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .normalize import canonical
+
+COMPLETION_LIMIT = 100
+
+
+class _Node:
+    __slots__ = ("label", "children", "words")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.children: Dict[str, "_Node"] = {}
+        # Слово в початковому написанні → кількість входжень (лише у вузлах-кінцях слів)
+        self.words: Optional[Dict[str, int]] = None
+
+
+class Trie:
+    def __init__(self, key: Callable[[str], str] = canonical):
+        self.key = key
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, word: str) -> bool:
+        node = self._find(self.key(word))
+        return node is not None and bool(node.words) and word in node.words
+
+    def _find(self, key: str) -> Optional[_Node]:
+        node = self._root
+        while key:
+            node = node.children.get(key[0])
+            if node is None or not key.startswith(node.label):
+                return None
+            key = key[len(node.label):]
+        return node
+
+    def add(self, word: str):
+        node, rest = self._root, self.key(word)
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                child = node.children[rest[0]] = _Node(rest)
+                node, rest = child, ""
+                break
+            label = child.label
+            common = 1
+            limit = min(len(label), len(rest))
+            while common < limit and label[common] == rest[common]:
+                common += 1
+            if common < len(label):
+                # Розщеплюємо ребро: спільна частина стає новим вузлом
+                middle = node.children[rest[0]] = _Node(label[:common])
+                child.label = label[common:]
+                middle.children[child.label[0]] = child
+                child = middle
+            node, rest = child, rest[common:]
+        if node.words is None:
+            node.words = {}
+        if word not in node.words:
+            self._size += 1
+        node.words[word] = node.words.get(word, 0) + 1
+
+    def extend(self, words: Iterable[str]):
+        """Додає багато слів; порожнє дерево будується одним проходом по відсортованих ключах."""
+        if self._size:
+            for word in words:
+                self.add(word)
+            return
+        found: Dict[str, Dict[str, int]] = {}
+        for word in words:
+            counts = found.setdefault(self.key(word), {})
+            counts[word] = counts.get(word, 0) + 1
+        keys = sorted(found)
+        self._root = _Node()
+        self._size = sum(len(counts) for counts in found.values())
+        stack = [(self._root, 0, len(keys), 0)]
+        while stack:
+            node, low, high, depth = stack.pop()
+            # Ключ, що закінчується в цьому вузлі, у відсортованому діапазоні перший
+            if low < high and len(keys[low]) == depth:
+                node.words = found[keys[low]]
+                low += 1
+            while low < high:
+                key = keys[low]
+                if low + 1 == high:
+                    end = high
+                    label = key[depth:]
+                else:
+                    # Діапазон ключів з тим самим наступним символом; їхній спільний префікс — мітка ребра
+                    end = bisect_left(keys, key[:depth] + chr(ord(key[depth]) + 1), low, high)
+                    last = keys[end - 1]
+                    common, limit = depth + 1, min(len(key), len(last))
+                    while common < limit and key[common] == last[common]:
+                        common += 1
+                    label = key[depth:common]
+                child = node.children[key[depth]] = _Node(label)
+                if end - low == 1:
+                    child.words = found[key]
+                else:
+                    stack.append((child, low, end, depth + len(label)))
+                low = end
+
+    def discard(self, word: str):
+        """Прибирає одне входження слова (відсутнє слово ігнорується)."""
+        path = [self._root]
+        rest = self.key(word)
+        while rest:
+            child = path[-1].children.get(rest[0])
+            if child is None or not rest.startswith(child.label):
+                return
+            path.append(child)
+            rest = rest[len(child.label):]
+        node = path[-1]
+        if not node.words or word not in node.words:
+            return
+        node.words[word] -= 1
+        if node.words[word]:
+            return
+        del node.words[word]
+        self._size -= 1
+        if not node.words:
+            node.words = None
+        # Прибираємо порожні вузли і зливаємо вузли з єдиною дитиною
+        for depth in range(len(path) - 1, 0, -1):
+            node, parent = path[depth], path[depth - 1]
+            if node.words is None and not node.children:
+                del parent.children[node.label[0]]
+            elif node.words is None and len(node.children) == 1:
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[child.label[0]] = child
+            else:
+                break
+
+    def complete(self, prefix: str, limit: int = COMPLETION_LIMIT) -> List[str]:
+        """До limit слів із префіксом (без урахування регістру), у порядку ключів."""
+        node, rest = self._root, self.key(prefix)
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                return []
+            if child.label.startswith(rest):
+                node, rest = child, ""
+            elif rest.startswith(child.label):
+                node, rest = child, rest[len(child.label):]
+            else:
+                return []
+        result: List[str] = []
+        stack = [node]
+        while stack and len(result) < limit:
+            node = stack.pop()
+            if node.words:
+                result.extend(sorted(node.words))
+            stack.extend(node.children[first] for first in sorted(node.children, reverse=True))
+        return result[:limit]